@@ -1,18 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_, or_
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
+from pydantic import ValidationError
 import json
+import zlib
 
 # Import timezone utilities
 from utils.timezone import get_ist_datetime_for_db, now_ist
 
 from database.connection import get_db
 from database.models import User, Alert, MonitoringSession, AlertStatistics
+from database.statistics import build_daily_statistics, get_daily_rollup, incident_counts
+from database.partitions import alerts_between
+from database.ingest import BULK_MAX_BYTES, BULK_MAX_ITEMS, store_alerts, store_sessions
 from auth.security import get_current_active_user
+from core.cache import cached_response, response_cache
+from core.risk import risk_score as compute_risk_score
 from auth.permissions import require_manager_or_admin, get_accessible_user_ids
-from models.alert import AlertCreate, AlertResponse, AlertAnalytics, SessionResponse
+from models.alert import (
+    AlertCreate, AlertResponse, AlertAnalytics, SessionResponse,
+    BulkAlertItem, BulkItemStatus, BulkAlertResult, EdgeSession, BulkSessionResult
+)
 
 router = APIRouter(prefix="/api/alerts", tags=["Alerts"])
 
@@ -65,9 +75,84 @@ async def store_alert(
     
     db.commit()
     db.refresh(new_alert)
+    await response_cache.invalidate_user(current_user.id)
     
     return AlertResponse.from_orm(new_alert)
 
+def _read_bulk_payload(body: bytes, content_type: str, content_encoding: str) -> List[Any]:
+    """Decode a gzip/plain JSON array or NDJSON upload into raw documents"""
+    if content_encoding == "gzip":
+        decompressor = zlib.decompressobj(wbits=31)
+        try:
+            body = decompressor.decompress(body, BULK_MAX_BYTES + 1)
+        except zlib.error:
+            raise HTTPException(status_code=400, detail="Invalid gzip payload")
+        if not decompressor.eof and len(body) <= BULK_MAX_BYTES:
+            raise HTTPException(status_code=400, detail="Truncated gzip payload")
+    elif content_encoding not in ("", "identity"):
+        raise HTTPException(status_code=415, detail=f"Unsupported Content-Encoding: {content_encoding}")
+    if len(body) > BULK_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"Payload exceeds {BULK_MAX_BYTES} bytes")
+
+    try:
+        if "ndjson" in content_type or "jsonlines" in content_type:
+            documents = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            documents = json.loads(body)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
+    if not isinstance(documents, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array or NDJSON lines")
+    if len(documents) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_ITEMS} alerts per upload")
+    return documents
+
+@router.post("/bulk", response_model=BulkAlertResult)
+async def store_alerts_bulk(
+    request: Request,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+) -> BulkAlertResult:
+    """Store a batch of alerts buffered by an edge device
+
+    The body is a JSON array of alerts or NDJSON (`Content-Type:
+    application/x-ndjson`), optionally with `Content-Encoding: gzip`. Items
+    carry an optional `client_id` idempotency key, so re-sending an upload
+    after a lost response stores nothing twice. All new alerts are inserted
+    in one transaction; each item gets a status (created, duplicate, invalid).
+    """
+    documents = _read_bulk_payload(
+        await request.body(),
+        request.headers.get("content-type", "").lower(),
+        request.headers.get("content-encoding", "").lower()
+    )
+
+    statuses: List[BulkItemStatus] = []
+    items = []
+    for index, document in enumerate(documents):
+        try:
+            items.append((index, BulkAlertItem.parse_obj(document)))
+        except ValidationError as e:
+            client_id = document.get("client_id") if isinstance(document, dict) else None
+            statuses.append(BulkItemStatus(
+                index=index,
+                client_id=client_id if isinstance(client_id, str) else None,
+                status="invalid",
+                error=str(e)
+            ))
+
+    statuses.extend(store_alerts(db, current_user.id, items))
+    statuses.sort(key=lambda status: status.index)
+    if any(status.status == "created" for status in statuses):
+        await response_cache.invalidate_user(current_user.id)
+
+    return BulkAlertResult(
+        created=sum(1 for status in statuses if status.status == "created"),
+        duplicates=sum(1 for status in statuses if status.status == "duplicate"),
+        invalid=sum(1 for status in statuses if status.status == "invalid"),
+        items=statuses
+    )
+
 @router.get("/history", response_model=List[AlertResponse])
 async def get_alert_history(
     start_date: Optional[datetime] = None,
@@ -81,6 +166,9 @@ async def get_alert_history(
     db: Session = Depends(get_db)
 ) -> List[AlertResponse]:
     """Get alert history - drivers see own, managers/admins see all"""
+    # Only the partitions overlapping the requested range are read
+    alerts_table = alerts_between(db, start_date, end_date)
+    
     # Check permissions
     if user_id and user_id != current_user.id:
         # Only managers and admins can view other users' data
@@ -90,36 +178,44 @@ async def get_alert_history(
         # If no user_id specified or it's the current user
         if current_user.role in ["manager", "admin"] and not user_id:
             # Managers/admins see all by default
-            query = db.query(Alert)
+            query = db.query(alerts_table)
         else:
             user_id = user_id or current_user.id
-            query = db.query(Alert).filter(Alert.user_id == user_id)
+            query = db.query(alerts_table).filter(alerts_table.user_id == user_id)
     
     if user_id:
-        query = db.query(Alert).filter(Alert.user_id == user_id)
+        query = db.query(alerts_table).filter(alerts_table.user_id == user_id)
     else:
-        query = db.query(Alert)
+        query = db.query(alerts_table)
     
     if start_date:
-        query = query.filter(Alert.timestamp >= start_date)
+        query = query.filter(alerts_table.timestamp >= start_date)
     if end_date:
-        query = query.filter(Alert.timestamp <= end_date)
+        query = query.filter(alerts_table.timestamp <= end_date)
     if alert_type:
-        query = query.filter(Alert.alert_type == alert_type)
+        query = query.filter(alerts_table.alert_type == alert_type)
     if severity:
-        query = query.filter(Alert.severity == severity)
+        query = query.filter(alerts_table.severity == severity)
     
-    alerts = query.order_by(Alert.timestamp.desc()).offset(offset).limit(limit).all()
+    alerts = query.order_by(alerts_table.timestamp.desc()).offset(offset).limit(limit).all()
     
     return [AlertResponse.from_orm(alert) for alert in alerts]
 
 @router.get("/analytics", response_model=AlertAnalytics)
 async def get_alert_analytics(
+    request: Request,
     period: str = Query("day", regex="^(day|week|month|year)$"),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
-) -> AlertAnalytics:
-    """Get alert analytics for current user"""
+) -> Response:
+    """Get alert analytics for current user (cached, supports If-None-Match)"""
+    return await cached_response(
+        request,
+        (current_user.id, "analytics", period),
+        lambda: compute_alert_analytics(db, current_user, period)
+    )
+
+def compute_alert_analytics(db: Session, current_user: User, period: str) -> AlertAnalytics:
     # Calculate date range
     end_date = now_ist()
     if period == "day":
@@ -131,14 +227,14 @@ async def get_alert_analytics(
     else:  # year
         start_date = end_date - timedelta(days=365)
     
-    # Get alerts in period
-    alerts = db.query(Alert).filter(
-        and_(
-            Alert.user_id == current_user.id,
-            Alert.timestamp >= start_date,
-            Alert.timestamp <= end_date
-        )
-    ).all()
+    # Get alerts in period (only the partitions overlapping it are read)
+    alerts_table = alerts_between(db, start_date, end_date, [current_user.id])
+    in_period = and_(
+        alerts_table.user_id == current_user.id,
+        alerts_table.timestamp >= start_date,
+        alerts_table.timestamp <= end_date
+    )
+    alerts = db.query(alerts_table).filter(in_period).all()
     
     # Calculate statistics
     total_alerts = len(alerts)
@@ -176,36 +272,17 @@ async def get_alert_analytics(
         )
     ).order_by(MonitoringSession.start_time.desc()).limit(10).all()
     
-    # Calculate risk score (0-100) based on incident rate and severity
+    # Risk score (0-100) from incident windows counted in SQL and the severity mix
     total_monitoring_seconds = sum((s.duration_seconds or 0) for s in recent_sessions)
-    
-    if total_monitoring_seconds > 0 and total_alerts > 0:
-        # Group alerts into 5-second windows to avoid counting duplicate alerts
-        # This prevents multiple alerts per second from inflating the score
-        incident_windows = set()
-        for alert in alerts:
-            # Group alerts into 5-second time windows
-            window_start = int(alert.timestamp.timestamp() / 5) * 5
-            incident_windows.add(window_start)
-        
-        # Each incident window represents approximately 5 seconds of issues
-        incident_seconds = len(incident_windows) * 5
-        
-        # Calculate incident rate (percentage of monitoring time with issues)
-        incident_rate = min(100, (incident_seconds / total_monitoring_seconds) * 100)
-        
-        # Calculate severity factor (weighted average severity)
-        severity_weight = (
-            severity_breakdown["severe"] * 3.0 +
-            severity_breakdown["moderate"] * 1.5 +
-            severity_breakdown["mild"] * 0.5
-        ) / total_alerts
-        
-        # Final risk score: 70% based on incident rate, 30% based on severity
-        # This gives a more realistic score that won't immediately max out
-        risk_score = min(100, incident_rate * 0.7 + severity_weight * 30)
-    else:
-        risk_score = 0
+    incidents = incident_counts(db, alerts_table, in_period).get(current_user.id, 0) if alerts else 0
+    risk_score = compute_risk_score(
+        incidents,
+        total_monitoring_seconds,
+        total_alerts,
+        severity_breakdown["mild"],
+        severity_breakdown["moderate"],
+        severity_breakdown["severe"]
+    )
     
     return AlertAnalytics(
         period=period,
@@ -218,9 +295,7 @@ async def get_alert_analytics(
         hourly_distribution=hourly_distribution,
         most_common_alerts=[{"alert": k, "count": v} for k, v in most_common_alerts],
         risk_score=risk_score,
-        total_monitoring_time=sum(
-            (s.duration_seconds or 0) for s in recent_sessions
-        ),
+        total_monitoring_time=total_monitoring_seconds,
         sessions_count=len(recent_sessions)
     )
 
@@ -258,6 +333,73 @@ async def get_monitoring_sessions(
     
     return [SessionResponse.from_orm(session) for session in sessions]
 
+@router.get("/sessions/{session_id}/timeline")
+async def get_session_timeline(
+    session_id: str,
+    start: Optional[float] = Query(None, ge=0, description="Seconds from session start"),
+    end: Optional[float] = Query(None, ge=0, description="Seconds from session start"),
+    max_points: int = Query(2000, ge=10, le=20000),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
+    """Downsampled EAR/MAR/gaze/head/PERCLOS samples of a session for chart replay"""
+    from core.timeline import read_timeline, TIMELINE_HZ
+    
+    session = db.query(MonitoringSession).filter(MonitoringSession.id == session_id).first()
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    if session.user_id != current_user.id and current_user.role not in ["manager", "admin"]:
+        raise HTTPException(status_code=403, detail="You can only access your own data")
+    
+    timeline = read_timeline(session_id, start, end, max_points)
+    if timeline is None:
+        raise HTTPException(status_code=404, detail="No timeline recorded for this session")
+    
+    return {
+        "session_id": session_id,
+        "user_id": session.user_id,
+        "start_time": session.start_time,
+        "hz": TIMELINE_HZ,
+        **timeline
+    }
+
+@router.post("/sessions/bulk", response_model=BulkSessionResult)
+async def store_sessions_bulk(
+    request: Request,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+) -> BulkSessionResult:
+    """Create or update monitoring sessions recorded by an edge device
+
+    Same payload formats as /bulk. Sessions keep the device's ids, so
+    alerts uploaded afterwards can name them in `session_id`.
+    """
+    documents = _read_bulk_payload(
+        await request.body(),
+        request.headers.get("content-type", "").lower(),
+        request.headers.get("content-encoding", "").lower()
+    )
+
+    statuses: List[BulkItemStatus] = []
+    items = []
+    for index, document in enumerate(documents):
+        try:
+            items.append((index, EdgeSession.parse_obj(document)))
+        except ValidationError as e:
+            statuses.append(BulkItemStatus(index=index, status="invalid", error=str(e)))
+
+    if items:
+        statuses.extend(store_sessions(db, current_user.id, items))
+        await response_cache.invalidate_user(current_user.id)
+    statuses.sort(key=lambda status: status.index)
+
+    return BulkSessionResult(
+        created=sum(1 for status in statuses if status.status == "created"),
+        updated=sum(1 for status in statuses if status.status == "updated"),
+        invalid=sum(1 for status in statuses if status.status == "invalid"),
+        items=statuses
+    )
+
 @router.post("/sessions/end")
 async def end_monitoring_session(
     current_user: User = Depends(get_current_active_user),
@@ -284,6 +426,7 @@ async def end_monitoring_session(
     )
     
     db.commit()
+    await response_cache.invalidate_user(current_user.id)
     
     return {
         "message": "Session ended successfully",
@@ -294,85 +437,26 @@ async def end_monitoring_session(
 
 @router.get("/statistics/daily")
 async def get_daily_statistics(
+    request: Request,
     date: Optional[datetime] = None,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
-) -> Dict[str, Any]:
-    """Get or create daily statistics for user"""
-    target_date = date or now_ist().date()
-    
+) -> Response:
+    """Get or create daily statistics for user (cached, supports If-None-Match)"""
+    target_date = date.date() if date else now_ist().date()
+    return await cached_response(
+        request,
+        (current_user.id, "statistics_daily", target_date.isoformat()),
+        lambda: compute_daily_statistics(db, current_user, target_date)
+    )
+
+def compute_daily_statistics(db: Session, current_user: User, target_date) -> Dict[str, Any]:
     # Get existing or create new statistics
-    stats = db.query(AlertStatistics).filter(
-        and_(
-            AlertStatistics.user_id == current_user.id,
-            func.date(AlertStatistics.date) == target_date
-        )
-    ).first()
+    stats = get_daily_rollup(db, current_user.id, target_date)
     
     if not stats:
         # Calculate statistics for the day
-        day_start = datetime.combine(target_date, datetime.min.time())
-        day_end = datetime.combine(target_date, datetime.max.time())
-        
-        alerts = db.query(Alert).filter(
-            and_(
-                Alert.user_id == current_user.id,
-                Alert.timestamp >= day_start,
-                Alert.timestamp <= day_end
-            )
-        ).all()
-        
-        sessions = db.query(MonitoringSession).filter(
-            and_(
-                MonitoringSession.user_id == current_user.id,
-                MonitoringSession.start_time >= day_start,
-                MonitoringSession.start_time <= day_end
-            )
-        ).all()
-        
-        # Create statistics
-        stats = AlertStatistics(
-            user_id=current_user.id,
-            date=target_date,
-            total_monitoring_time=sum((s.duration_seconds or 0) for s in sessions),
-            total_alerts=len(alerts),
-            drowsiness_mild=sum(1 for a in alerts if a.severity == "mild" and "drowsiness" in a.alert_type.lower()),
-            drowsiness_moderate=sum(1 for a in alerts if a.severity == "moderate" and "drowsiness" in a.alert_type.lower()),
-            drowsiness_severe=sum(1 for a in alerts if a.severity == "severe" and "drowsiness" in a.alert_type.lower()),
-            distraction_mild=sum(1 for a in alerts if a.severity == "mild" and "distraction" in a.alert_type.lower()),
-            distraction_moderate=sum(1 for a in alerts if a.severity == "moderate" and "distraction" in a.alert_type.lower()),
-            distraction_severe=sum(1 for a in alerts if a.severity == "severe" and "distraction" in a.alert_type.lower()),
-            total_yawns=sum(1 for a in alerts if "yawn" in a.message.lower()),
-            phone_usage_count=sum(1 for a in alerts if "phone" in a.message.lower() or "mobile" in a.message.lower()),
-            head_turn_count=sum(1 for a in alerts if "head turn" in a.message.lower()),
-        )
-        
-        # Calculate risk score based on incident rate and severity
-        if stats.total_monitoring_time > 0:
-            # Estimate incident time based on alert types and severity
-            # Assume each incident type lasts for different durations
-            estimated_incident_seconds = (
-                (stats.drowsiness_severe + stats.distraction_severe) * 10 +  # Severe incidents ~10 seconds
-                (stats.drowsiness_moderate + stats.distraction_moderate) * 5 +  # Moderate ~5 seconds
-                (stats.drowsiness_mild + stats.distraction_mild) * 2  # Mild ~2 seconds
-            )
-            
-            # Calculate incident rate (percentage of time with issues)
-            incident_rate = min(100, (estimated_incident_seconds / stats.total_monitoring_time) * 100)
-            
-            # Calculate severity multiplier based on proportion of severe alerts
-            if stats.total_alerts > 0:
-                severe_proportion = (stats.drowsiness_severe + stats.distraction_severe) / stats.total_alerts
-                # Severity multiplier ranges from 1.0 to 1.5 based on severe alert proportion
-                severity_multiplier = 1.0 + (severe_proportion * 0.5)
-            else:
-                severity_multiplier = 1.0
-            
-            # Final risk score with severity weighting
-            stats.daily_risk_score = min(100, incident_rate * severity_multiplier)
-        else:
-            stats.daily_risk_score = 0
-        
+        stats = build_daily_statistics(db, current_user.id, target_date)
         db.add(stats)
         db.commit()
         db.refresh(stats)
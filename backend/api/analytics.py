@@ -0,0 +1,256 @@
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy.orm import Session
+from sqlalchemy import func, and_
+from typing import Any, Dict, List
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from utils.timezone import get_ist_datetime_for_db
+
+from database.connection import get_db
+from database.models import User, MonitoringSession, AlertRollup, UserAlertRollup
+from database.rollups import truncate, truncate_expr, as_datetime
+from auth.permissions import require_manager_or_admin
+from core.cache import FLEET, cached_response
+from core.risk import SEVERITY_WEIGHTS, percentiles, rank_order, risk_scores
+from models.alert import RiskRanking, SystemAnalytics
+
+router = APIRouter(prefix="/api/analytics", tags=["Analytics"])
+
+# Each period is a whole number of rollup buckets ending with the current one
+PERIODS = {
+    "day": ("hour", 24),
+    "week": ("day", 7),
+    "month": ("day", 30),
+    "year": ("month", 12),
+}
+LABEL_FORMATS = {"hour": "%Y-%m-%dT%H:00", "day": "%Y-%m-%d", "month": "%Y-%m"}
+
+@router.get("/system", response_model=SystemAnalytics)
+async def get_system_analytics(
+    request: Request,
+    period: str = Query("week", regex="^(day|week|month|year)$"),
+    top: int = Query(5, ge=1, le=50),
+    current_user: User = Depends(require_manager_or_admin),
+    db: Session = Depends(get_db)
+) -> Response:
+    """Fleet-wide totals, alert rate, severity mix, top alerts and riskiest drivers (managers/admins)
+
+    Alert figures are read from the rollups of the period's grain (hourly
+    for a day, daily for a week or month, monthly for a year), so the cost
+    does not grow with the number of alerts.
+    """
+    return await cached_response(
+        request,
+        (FLEET, "analytics_system", (period, top)),
+        lambda: compute_system_analytics(db, period, top)
+    )
+
+def _next_bucket(bucket: datetime, grain: str) -> datetime:
+    if grain == "hour":
+        return bucket + timedelta(hours=1)
+    if grain == "day":
+        return bucket + timedelta(days=1)
+    return (bucket + timedelta(days=32)).replace(day=1)
+
+def period_buckets(now: datetime, period: str) -> List[datetime]:
+    """Bucket starts covering the period, oldest first"""
+    grain, count = PERIODS[period]
+    buckets = [truncate(now, grain)]
+    for _ in range(count - 1):
+        buckets.append(truncate(buckets[-1] - timedelta(seconds=1), grain))
+    return buckets[::-1]
+
+def _monitoring_time(db: Session, start_date: datetime, end_date: datetime) -> Dict[str, int]:
+    """Monitored seconds per user for sessions started in the range"""
+    return {
+        user_id: int(seconds)
+        for user_id, seconds in db.query(
+            MonitoringSession.user_id, func.coalesce(func.sum(MonitoringSession.duration_seconds), 0)
+        ).filter(
+            and_(MonitoringSession.start_time >= start_date, MonitoringSession.start_time <= end_date)
+        ).group_by(MonitoringSession.user_id)
+    }
+
+def fleet_risk(
+    db: Session,
+    grain: str,
+    start_date: datetime,
+    monitoring_time: Dict[str, int]
+) -> Dict[str, np.ndarray]:
+    """Risk inputs, scores, rank order and percentiles for every driver, as parallel arrays
+
+    Per-driver counters come from one grouped scan of the user rollups; the
+    scores for the whole fleet are then computed at once by core.risk.
+    """
+    drivers = db.query(User.id, User.username).filter(User.role == "driver").order_by(User.username).all()
+    index = {user_id: i for i, (user_id, _) in enumerate(drivers)}
+    n = len(drivers)
+    severities = {severity: np.zeros(n, dtype=np.int64) for severity in SEVERITY_WEIGHTS}
+    alerts = np.zeros(n, dtype=np.int64)
+    incidents = np.zeros(n, dtype=np.int64)
+
+    rollup = UserAlertRollup
+    for user_id, severity, count, incident_count in db.query(
+        rollup.user_id, rollup.severity, func.sum(rollup.count), func.sum(rollup.incidents)
+    ).filter(
+        and_(rollup.grain == grain, rollup.bucket >= start_date)
+    ).group_by(rollup.user_id, rollup.severity):
+        i = index.get(user_id)
+        if i is None:
+            continue
+        alerts[i] += count
+        incidents[i] += incident_count
+        if severity in severities:
+            severities[severity][i] += count
+
+    monitoring = np.array([monitoring_time.get(user_id, 0) for user_id, _ in drivers], dtype=np.int64)
+    scores = risk_scores(incidents, monitoring, alerts, severities["mild"], severities["moderate"], severities["severe"])
+    return {
+        "user_id": np.array([user_id for user_id, _ in drivers], dtype=object),
+        "username": np.array([username for _, username in drivers], dtype=object),
+        "risk_score": scores,
+        "percentile": percentiles(scores),
+        "order": rank_order(scores, alerts),
+        "alert_count": alerts,
+        "incidents": incidents,
+        "monitoring_time": monitoring,
+        **severities,
+    }
+
+def _driver_entries(risk: Dict[str, np.ndarray], order: np.ndarray, first_rank: int = 1) -> List[Dict[str, Any]]:
+    return [
+        {
+            "rank": first_rank + position,
+            "user_id": risk["user_id"][i],
+            "username": risk["username"][i],
+            "risk_score": round(float(risk["risk_score"][i]), 1),
+            "percentile": round(float(risk["percentile"][i]), 1),
+            "alert_count": int(risk["alert_count"][i]),
+            "incidents": int(risk["incidents"][i]),
+            "severity_breakdown": {severity: int(risk[severity][i]) for severity in SEVERITY_WEIGHTS},
+            "monitoring_time": int(risk["monitoring_time"][i])
+        }
+        for position, i in enumerate(order.tolist())
+    ]
+
+@router.get("/risk", response_model=RiskRanking)
+async def get_risk_ranking(
+    request: Request,
+    period: str = Query("week", regex="^(day|week|month|year)$"),
+    limit: int = Query(100, ge=1, le=5000),
+    offset: int = Query(0, ge=0),
+    current_user: User = Depends(require_manager_or_admin),
+    db: Session = Depends(get_db)
+) -> Response:
+    """Every driver ranked by risk score over the period, with percentiles (managers/admins)"""
+    return await cached_response(
+        request,
+        (FLEET, "analytics_risk", (period, limit, offset)),
+        lambda: compute_risk_ranking(db, period, limit, offset)
+    )
+
+def compute_risk_ranking(db: Session, period: str, limit: int = 100, offset: int = 0) -> RiskRanking:
+    end_date = get_ist_datetime_for_db()
+    grain, _ = PERIODS[period]
+    start_date = period_buckets(end_date, period)[0]
+    risk = fleet_risk(db, grain, start_date, _monitoring_time(db, start_date, end_date))
+    scores = risk["risk_score"]
+    return RiskRanking(
+        period=period,
+        start_date=start_date,
+        end_date=end_date,
+        total_drivers=len(scores),
+        distribution={
+            "mean": round(float(scores.mean()), 1) if len(scores) else 0.0,
+            **{
+                f"p{q}": round(float(np.percentile(scores, q)), 1) if len(scores) else 0.0
+                for q in (50, 75, 90, 99)
+            }
+        },
+        drivers=_driver_entries(risk, risk["order"][offset:offset + limit], offset + 1)
+    )
+
+def _top_risk_drivers(risk: Dict[str, np.ndarray], top: int) -> List[Dict[str, Any]]:
+    """Riskiest drivers that raised alerts in the period"""
+    order = risk["order"]
+    return _driver_entries(risk, order[risk["alert_count"][order] > 0][:top])
+
+def compute_system_analytics(db: Session, period: str, top: int = 5) -> SystemAnalytics:
+    end_date = get_ist_datetime_for_db()
+    grain, _ = PERIODS[period]
+    buckets = period_buckets(end_date, period)
+    start_date = buckets[0]
+    rollup = AlertRollup
+    in_period = and_(rollup.grain == grain, rollup.bucket >= start_date)
+    total = func.sum(rollup.count)
+
+    activity: Dict[datetime, Dict[str, Any]] = {
+        bucket: {"bucket": bucket.strftime(LABEL_FORMATS[grain]), "sessions": 0, "alerts": 0}
+        for bucket in buckets
+    }
+
+    # Severity mix, alert types and per-bucket counts from one grouped scan
+    severity_breakdown = {"mild": 0, "moderate": 0, "severe": 0}
+    alert_types: Dict[str, int] = {}
+    for bucket, alert_type, severity, count in db.query(
+        rollup.bucket, rollup.alert_type, rollup.severity, total
+    ).filter(in_period).group_by(rollup.bucket, rollup.alert_type, rollup.severity):
+        count = int(count)
+        severity_breakdown[severity] = severity_breakdown.get(severity, 0) + count
+        alert_types[alert_type] = alert_types.get(alert_type, 0) + count
+        if bucket in activity:
+            activity[bucket]["alerts"] += count
+
+    most_common = db.query(rollup.message, total).filter(in_period).group_by(
+        rollup.message
+    ).order_by(total.desc()).limit(5).all()
+
+    sessions_in_period = and_(
+        MonitoringSession.start_time >= start_date,
+        MonitoringSession.start_time <= end_date
+    )
+    session_bucket = truncate_expr(db.get_bind().dialect.name, MonitoringSession.start_time, grain)
+    sessions = 0
+    for bucket, count in db.query(session_bucket, func.count(MonitoringSession.id)).filter(
+        sessions_in_period
+    ).group_by(session_bucket):
+        sessions += count
+        bucket = as_datetime(bucket)
+        if bucket in activity:
+            activity[bucket]["sessions"] = count
+    monitoring_time = _monitoring_time(db, start_date, end_date)
+    total_monitoring_time = sum(monitoring_time.values())
+
+    # Alert rate per bucket; the current bucket has only run until now
+    for bucket, entry in activity.items():
+        hours = (min(_next_bucket(bucket, grain), end_date) - bucket).total_seconds() / 3600
+        entry["alerts_per_hour"] = round(entry["alerts"] / hours, 2) if hours > 0 else 0
+
+    role_distribution = db.query(User.role, func.count(User.id)).group_by(User.role).all()
+    total_alerts = sum(alert_types.values())
+    return SystemAnalytics(
+        period=period,
+        bucket=grain,
+        start_date=start_date,
+        end_date=end_date,
+        totals={
+            "users": sum(count for _, count in role_distribution),
+            "active_users": len(monitoring_time),
+            "sessions": sessions,
+            "alerts": total_alerts,
+            "monitoring_time": total_monitoring_time,
+            "average_session_duration": total_monitoring_time / sessions if sessions else 0,
+            "alerts_per_monitored_hour": round(total_alerts * 3600 / total_monitoring_time, 2) if total_monitoring_time else 0
+        },
+        role_distribution=[{"role": role, "count": count} for role, count in role_distribution],
+        severity_breakdown=severity_breakdown,
+        alert_types=[
+            {"type": alert_type, "count": count}
+            for alert_type, count in sorted(alert_types.items(), key=lambda item: item[1], reverse=True)
+        ],
+        most_common_alerts=[{"alert": message, "count": int(count)} for message, count in most_common],
+        activity=list(activity.values()),
+        top_risk_drivers=_top_risk_drivers(fleet_risk(db, grain, start_date, monitoring_time), top)
+    )
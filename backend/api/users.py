@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
 from database.connection import get_db
-from database.models import User, MonitoringSession, Alert
+from database.models import User, MonitoringSession
+from database.partitions import alerts_between
 from auth.security import get_current_active_user, get_password_hash
 from auth.permissions import require_admin, require_manager_or_admin
+from core.cache import cached_response, response_cache
 from models.auth import UserResponse, UserUpdate, UserCreate
 
 router = APIRouter(prefix="/api/users", tags=["User Management"])
@@ -164,6 +166,7 @@ async def update_user(
     
     db.commit()
     db.refresh(user)
+    await response_cache.invalidate_user(user_id)
     
     return UserResponse(
         id=user.id,
@@ -196,6 +199,7 @@ async def toggle_user_active(
     
     user.is_active = not user.is_active
     db.commit()
+    await response_cache.invalidate_user(user_id)
     
     return {
         "message": f"User {'activated' if user.is_active else 'deactivated'} successfully",
@@ -226,16 +230,18 @@ async def delete_user(
     # Delete user (cascades will handle related data)
     db.delete(user)
     db.commit()
+    await response_cache.invalidate_user(user_id)
     
     return {"message": "User deleted successfully", "user_id": user_id}
 
 @router.get("/{user_id}/statistics")
 async def get_user_statistics(
     user_id: str,
+    request: Request,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
-) -> Dict[str, Any]:
-    """Get user statistics - own or manager/admin can see all"""
+) -> Response:
+    """Get user statistics - own or manager/admin can see all (cached, supports If-None-Match)"""
     # Check permissions
     if user_id != current_user.id and current_user.role not in ["manager", "admin"]:
         raise HTTPException(
@@ -243,6 +249,13 @@ async def get_user_statistics(
             detail="You can only view your own statistics"
         )
     
+    return await cached_response(
+        request,
+        (user_id, "user_statistics", None),
+        lambda: compute_user_statistics(db, user_id)
+    )
+
+def compute_user_statistics(db: Session, user_id: str) -> Dict[str, Any]:
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(
@@ -255,7 +268,8 @@ async def get_user_statistics(
         MonitoringSession.user_id == user_id
     ).count()
     
-    total_alerts = db.query(Alert).filter(Alert.user_id == user_id).count()
+    alerts_table = alerts_between(db, user_ids=[user_id])
+    total_alerts = db.query(alerts_table).filter(alerts_table.user_id == user_id).count()
     
     total_monitoring_time = db.query(
         func.sum(MonitoringSession.duration_seconds)
@@ -0,0 +1,108 @@
+"""
+Bulk ingestion benchmark: alerts per second through /api/alerts/bulk vs /store.
+
+Stores `--alerts` alerts for one driver in a throwaway SQLite database,
+first one at a time the way /api/alerts/store does (session lookup, ORM
+insert, commit per alert), then through database.ingest.store_alerts in
+uploads of `--batch` items, and once more re-sending every upload to time
+the duplicate path an edge device takes after a lost response.
+
+    python -m benchmarks.bulk_ingest --alerts 20000 --batch 500
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import timedelta
+from typing import Any, Dict, List
+
+def make_items(count: int, prefix: str) -> List[Any]:
+    from models.alert import BulkAlertItem
+    from utils.timezone import get_ist_datetime_for_db
+
+    start = get_ist_datetime_for_db() - timedelta(hours=1)
+    return [
+        BulkAlertItem(
+            client_id=f"{prefix}-{i}",
+            timestamp=start + timedelta(milliseconds=66 * i),
+            alert_type="drowsiness" if i % 3 else "distraction",
+            severity=("mild", "moderate", "severe")[i % 3],
+            message="Eyes closed - wake up!" if i % 3 else "Looking away from road",
+            eye_aspect_ratio=0.18,
+            mouth_aspect_ratio=0.4,
+            head_position={"x": 0.1, "y": -0.05},
+            states={"eyes_closed": True},
+        )
+        for i in range(count)
+    ]
+
+def store_one_by_one(db, user_id: str, items) -> float:
+    from sqlalchemy import and_
+    from database.models import Alert, MonitoringSession
+
+    t0 = time.perf_counter()
+    for item in items:
+        session = db.query(MonitoringSession).filter(
+            and_(MonitoringSession.user_id == user_id, MonitoringSession.end_time == None)
+        ).first()
+        if session is None:
+            session = MonitoringSession(user_id=user_id)
+            db.add(session)
+            db.commit()
+        db.add(Alert(
+            user_id=user_id, session_id=session.id, timestamp=item.timestamp,
+            alert_type=item.alert_type, severity=item.severity, message=item.message,
+            eye_aspect_ratio=item.eye_aspect_ratio, mouth_aspect_ratio=item.mouth_aspect_ratio,
+            head_position=item.head_position, states=item.states
+        ))
+        session.total_alerts += 1
+        db.commit()
+    return time.perf_counter() - t0
+
+def store_in_batches(db, user_id: str, items, batch: int) -> float:
+    from database.ingest import store_alerts
+
+    t0 = time.perf_counter()
+    for i in range(0, len(items), batch):
+        store_alerts(db, user_id, list(enumerate(items[i:i + batch])))
+    return time.perf_counter() - t0
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk alert ingestion throughput")
+    parser.add_argument("--alerts", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=500, help="Alerts per bulk upload")
+    parser.add_argument("--json", help="Write the report to this file")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="dms-bulk-")
+    # Must be set before database.connection is imported
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    from database.connection import SessionLocal, init_db
+    from database.models import User
+
+    init_db()
+    db = SessionLocal()
+    try:
+        user = User(username="bench", email="bench@example.com", hashed_password="x", role="driver")
+        db.add(user)
+        db.commit()
+
+        report: Dict[str, Any] = {"alerts": args.alerts, "batch": args.batch}
+        single = store_one_by_one(db, user.id, make_items(args.alerts, "single"))
+        items = make_items(args.alerts, "bulk")
+        bulk = store_in_batches(db, user.id, items, args.batch)
+        replay = store_in_batches(db, user.id, items, args.batch)
+        for name, seconds in (("store", single), ("bulk", bulk), ("bulk_replay", replay)):
+            report[name] = {"seconds": round(seconds, 3), "alerts_per_s": round(args.alerts / seconds, 1)}
+            print(f"{name:<12} {seconds:>8.2f} s {args.alerts / seconds:>10.0f} alerts/s")
+    finally:
+        db.close()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
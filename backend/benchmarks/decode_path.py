@@ -0,0 +1,75 @@
+"""
+Decode-path benchmark: full-size decode and fresh RGB copies vs. core.decode.
+
+For each source resolution a synthetic JPEG is decoded the way the server
+used to (cv2.imdecode at full size, then a new RGB array from cvtColor) and
+through FrameDecoder with the given inference width (reduced decode, RGB
+written into the reused buffer). Reports time and tracemalloc peak bytes per
+frame for each stage. That the RGB conversion allocates no frame buffer is
+checked by tests/test_decode.py.
+
+    python -m benchmarks.decode_path --target-width 640
+"""
+
+import argparse
+import json
+from typing import Any, Dict
+
+import cv2
+import numpy as np
+
+from benchmarks.micro_processor import measure_allocations, time_case
+from core.decode import FrameDecoder
+
+RESOLUTIONS = {
+    "480p": (480, 640),
+    "720p": (720, 1280),
+    "1080p": (1080, 1920),
+}
+
+def synthetic_jpeg(h: int, w: int, quality: int = 80) -> bytes:
+    """Smooth noise, so the JPEG has realistic entropy for its size"""
+    rng = np.random.default_rng(0)
+    image = cv2.GaussianBlur(rng.integers(0, 255, (h, w, 3), dtype=np.uint8), (7, 7), 2)
+    ok, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return encoded.tobytes()
+
+def main():
+    parser = argparse.ArgumentParser(description="Frame decode and RGB conversion cost")
+    parser.add_argument("--target-width", type=int, default=640, help="Inference width (frame_width x scale_factor)")
+    parser.add_argument("--quality", type=int, default=80)
+    parser.add_argument("--min-time", type=float, default=0.5, help="Seconds of timing per case")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="Write the report to this file")
+    args = parser.parse_args()
+
+    report: Dict[str, Any] = {"target_width": args.target_width}
+    print(f"{'case':<28} {'us/frame':>10} {'peak B':>10}")
+    for name, (h, w) in RESOLUTIONS.items():
+        data = synthetic_jpeg(h, w, args.quality)
+        full = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        decoder = FrameDecoder(args.target_width)
+        decoded = decoder.decode(data)
+        cases = {
+            "imdecode": lambda: cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR),
+            "decode": lambda: decoder.decode(data),
+            "cvtColor": lambda: cv2.cvtColor(full, cv2.COLOR_BGR2RGB),
+            "to_rgb": lambda: decoder.to_rgb(decoded),
+            "imdecode+cvtColor": lambda: cv2.cvtColor(
+                cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR), cv2.COLOR_BGR2RGB
+            ),
+            "decode+to_rgb": lambda: decoder.to_rgb(decoder.decode(data)),
+        }
+        report[name] = {"decoded_shape": list(decoded.shape)}
+        for case, fn in cases.items():
+            stats = {"us_per_frame": time_case(fn, args.min_time, args.repeat) / 1000.0}
+            stats.update(measure_allocations(fn))
+            report[name][case] = stats
+            print(f"{name + ' ' + case:<28} {stats['us_per_frame']:>10.1f} {stats['peak_bytes']:>10.0f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Landmark fixtures for camera-free benchmarks.
+
+A fixture file is JSON of the form:
+
+    {"width": 1280, "height": 720,
+     "frames": [{"name": "...", "face": [[x, y, z], ...] | null,
+                 "hands": [[[x, y, z], ...], ...]}, ...]}
+
+Record a new file from a video (requires MediaPipe), naming the frames that
+show each scene the benchmarks look up by name (1-based frame numbers of the
+video; the other recorded frames are named `frame_<n>`):
+
+    python -m benchmarks.fixtures record driving.mp4 benchmarks/fixtures/landmarks.json \
+        --scene neutral=120 --scene phone_call=480 --scene texting=900
+"""
+
+import argparse
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from core.landmarks import LandmarkPoint, from_lists
+
+DEFAULT_FIXTURE_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "landmarks.json")
+# Frames benchmarks.micro_processor looks up by name
+REQUIRED_SCENES = ("neutral", "phone_call", "texting")
+
+
+class FixtureFrame:
+    """One recorded frame of face and hand landmarks"""
+
+    def __init__(self, name: str, face: Optional[List[LandmarkPoint]], hands: List[List[LandmarkPoint]]):
+        self.name = name
+        self.face = face
+        self.hands = hands
+
+
+class Fixtures:
+    """Recorded landmark frames plus the frame size they were captured at"""
+
+    def __init__(self, width: int, height: int, frames: List[FixtureFrame]):
+        self.width = width
+        self.height = height
+        self.frames = frames
+
+    def by_name(self, name: str) -> FixtureFrame:
+        for frame in self.frames:
+            if frame.name == name:
+                return frame
+        raise KeyError(name)
+
+
+def load_fixtures(path: str = DEFAULT_FIXTURE_PATH) -> Fixtures:
+    """Load a landmark fixture file"""
+    with open(path) as f:
+        data = json.load(f)
+    frames = [
+        FixtureFrame(
+            name=frame.get("name", f"frame_{i}"),
+            face=from_lists(frame["face"]) if frame.get("face") else None,
+            hands=[from_lists(hand) for hand in frame.get("hands", [])],
+        )
+        for i, frame in enumerate(data["frames"])
+    ]
+    return Fixtures(data["width"], data["height"], frames)
+
+
+def _round_points(points: List[LandmarkPoint]) -> List[List[float]]:
+    return [[round(p.x, 5), round(p.y, 5), round(p.z, 5)] for p in points]
+
+
+def record_fixtures(
+    video_path: str,
+    out_path: str,
+    max_frames: int = 300,
+    stride: int = 5,
+    scenes: Optional[Dict[str, int]] = None
+):
+    """Run MediaPipe over a video and save every `stride`-th frame's landmarks
+
+    `scenes` maps fixture names to frame numbers (1-based); those frames are
+    recorded under that name whether or not they fall on the stride.
+    """
+    import cv2
+    from core.processor import DriverMonitorProcessor
+
+    names = {index: name for name, index in (scenes or {}).items()}
+    processor = DriverMonitorProcessor()
+    capture = cv2.VideoCapture(video_path)
+    frames: List[Dict[str, Any]] = []
+    width = height = 0
+    index = 0
+    while len(frames) < max_frames or any(i > index for i in names):
+        ok, frame = capture.read()
+        if not ok:
+            break
+        index += 1
+        if index % stride and index not in names:
+            continue
+        if len(frames) >= max_frames and index not in names:
+            continue
+        height, width = frame.shape[:2]
+        faces, hands = processor.detect_landmarks(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        face, hands = processor.driver_landmarks(faces, hands, capture.get(cv2.CAP_PROP_POS_MSEC) / 1000.0)
+        frames.append({
+            "name": names.get(index, f"frame_{index}"),
+            "face": _round_points(face) if face else None,
+            "hands": [_round_points(hand) for hand in hands],
+        })
+    capture.release()
+
+    with open(out_path, "w") as f:
+        json.dump({"width": width, "height": height, "frames": frames}, f, separators=(",", ":"))
+    print(f"Recorded {len(frames)} frames to {out_path}")
+    recorded = {frame["name"] for frame in frames}
+    missing = [name for name in REQUIRED_SCENES if name not in recorded]
+    if missing:
+        print(f"Warning: no {', '.join(missing)} frame; benchmarks.micro_processor needs them (use --scene)")
+
+
+def _scene(value: str):
+    name, sep, index = value.partition("=")
+    if not sep or not name or not index.isdigit() or int(index) < 1:
+        raise argparse.ArgumentTypeError(f"expected NAME=FRAME, got {value!r}")
+    return name, int(index)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Landmark fixtures for camera-free benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record = commands.add_parser("record", help="Record landmarks from a video (requires MediaPipe)")
+    record.add_argument("video")
+    record.add_argument("out", help="Fixture JSON to write")
+    record.add_argument("--max-frames", type=int, default=300, help="Frames recorded at the stride")
+    record.add_argument("--stride", type=int, default=5, help="Record every n-th frame")
+    record.add_argument(
+        "--scene", type=_scene, action="append", default=[], metavar="NAME=FRAME",
+        help=f"Name a frame (1-based); {', '.join(REQUIRED_SCENES)} are required by the micro-benchmarks"
+    )
+    args = parser.parse_args()
+    record_fixtures(args.video, args.out, args.max_frames, args.stride, dict(args.scene))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,381 @@
+"""
+Synthetic load generator and end-to-end benchmark for the /ws endpoint.
+
+Authenticates N synthetic drivers, opens one /ws connection per driver and
+streams JPEG frames at a fixed rate, then reports frame-to-result latency,
+dropped frames, server CPU/RSS and database write rate.
+
+Run from the backend directory against a throwaway SQLite database:
+
+    python -m benchmarks.load_ws --spawn-server --users 10 --fps 15 --duration 60
+
+or against an already running server:
+
+    python -m benchmarks.load_ws --url http://localhost:8000 --server-pid 1234 \
+        --db ./dms_database.db --users 10
+"""
+
+import argparse
+import asyncio
+import base64
+import glob
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+import cv2
+import numpy as np
+import websockets
+
+BENCH_PASSWORD = "bench-password"
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = int(round(pct / 100.0 * (len(sorted_values) - 1)))
+    return sorted_values[min(max(rank, 0), len(sorted_values) - 1)]
+
+
+def http_post(url: str, data: Dict[str, Any], form: bool = False) -> Dict[str, Any]:
+    """POST JSON (or form-encoded) data and return the decoded JSON response"""
+    if form:
+        body = urllib.parse.urlencode(data).encode()
+        content_type = "application/x-www-form-urlencoded"
+    else:
+        body = json.dumps(data).encode()
+        content_type = "application/json"
+    request = urllib.request.Request(url, data=body, headers={"Content-Type": content_type})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return json.loads(response.read())
+
+
+def ensure_user(base_url: str, index: int) -> str:
+    """Register (if needed) and log in a synthetic driver, returning its access token"""
+    username = f"bench_driver_{index:04d}"
+    try:
+        http_post(f"{base_url}/api/auth/register", {
+            "username": username,
+            "email": f"{username}@bench.local",
+            "password": BENCH_PASSWORD,
+            "role": "driver",
+        })
+    except urllib.error.HTTPError as e:
+        # 400 means the user already exists from a previous run
+        if e.code != 400:
+            raise
+    tokens = http_post(
+        f"{base_url}/api/auth/login",
+        {"username": username, "password": BENCH_PASSWORD},
+        form=True,
+    )
+    return tokens["access_token"]
+
+
+def load_frames(frames_dir: Optional[str], width: int, height: int, count: int, quality: int) -> List[str]:
+    """Load recorded JPEGs from a directory or synthesize a moving test pattern"""
+    encoded: List[bytes] = []
+    if frames_dir:
+        for path in sorted(glob.glob(os.path.join(frames_dir, "*.jp*g"))):
+            with open(path, "rb") as f:
+                encoded.append(f.read())
+        if not encoded:
+            raise SystemExit(f"No JPEG files found in {frames_dir}")
+    else:
+        for i in range(count):
+            frame = np.full((height, width, 3), 96, dtype=np.uint8)
+            cx = int(width / 2 + np.sin(i / 10.0) * width / 8)
+            cy = int(height / 2 + np.cos(i / 12.0) * height / 10)
+            cv2.circle(frame, (cx, cy), min(width, height) // 5, (180, 160, 150), -1)
+            cv2.putText(frame, f"frame {i}", (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2)
+            ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+            if ok:
+                encoded.append(buf.tobytes())
+    return ["data:image/jpeg;base64," + base64.b64encode(b).decode() for b in encoded]
+
+
+class ClientStats:
+    """Per-connection counters collected by a synthetic driver"""
+
+    def __init__(self):
+        self.sent = 0
+        self.received = 0
+        self.dropped = 0
+        self.latencies_ms: List[float] = []
+        self.errors: List[str] = []
+
+
+async def run_client(
+    ws_url: str,
+    token: str,
+    frames: List[str],
+    fps: float,
+    duration: float,
+    max_in_flight: int,
+    stats: ClientStats,
+):
+    """Stream frames over one /ws connection and record frame-to-result latency"""
+    pending: Deque[float] = deque()
+    try:
+        async with websockets.connect(ws_url, max_size=None) as ws:
+            await ws.send(json.dumps({"type": "authenticate", "token": token}))
+            reply = json.loads(await ws.recv())
+            if reply.get("type") != "auth_success":
+                stats.errors.append(f"auth failed: {reply}")
+                return
+
+            await ws.send(json.dumps({"type": "start_monitoring"}))
+            while True:
+                reply = json.loads(await ws.recv())
+                if reply.get("type") == "monitoring_status":
+                    break
+
+            async def receiver():
+                async for raw in ws:
+                    message = json.loads(raw)
+                    # Detection results are the only replies without a "type" field
+                    if "type" in message:
+                        continue
+                    if pending:
+                        sent_at = pending.popleft()
+                        stats.latencies_ms.append((time.perf_counter() - sent_at) * 1000.0)
+                        stats.received += 1
+
+            receive_task = asyncio.create_task(receiver())
+            interval = 1.0 / fps
+            start = time.perf_counter()
+            next_send = start
+            frame_index = 0
+            while time.perf_counter() - start < duration:
+                if len(pending) >= max_in_flight:
+                    # Server is not keeping up; a real client would skip this capture
+                    stats.dropped += 1
+                else:
+                    pending.append(time.perf_counter())
+                    await ws.send(json.dumps({
+                        "type": "frame",
+                        "data": frames[frame_index % len(frames)],
+                    }))
+                    stats.sent += 1
+                frame_index += 1
+                next_send += interval
+                await asyncio.sleep(max(0.0, next_send - time.perf_counter()))
+
+            # Give in-flight frames a short grace period to complete
+            drain_deadline = time.perf_counter() + 5.0
+            while pending and time.perf_counter() < drain_deadline:
+                await asyncio.sleep(0.05)
+            stats.dropped += len(pending)
+
+            await ws.send(json.dumps({"type": "stop_monitoring"}))
+            receive_task.cancel()
+    except Exception as e:
+        stats.errors.append(str(e))
+
+
+class ServerSampler:
+    """Samples server CPU/RSS from /proc and the alert row count from SQLite"""
+
+    def __init__(self, pid: Optional[int], db_path: Optional[str]):
+        self.pid = pid
+        self.db_path = db_path
+        self.clock_ticks = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+        self.cpu_percent: List[float] = []
+        self.rss_mb: List[float] = []
+        self.alert_rows: List[int] = []
+        self.timestamps: List[float] = []
+
+    def _cpu_seconds(self) -> Optional[float]:
+        try:
+            with open(f"/proc/{self.pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            # utime and stime are fields 14 and 15 of /proc/<pid>/stat
+            return (int(fields[11]) + int(fields[12])) / self.clock_ticks
+        except (OSError, IndexError, ValueError):
+            return None
+
+    def _rss_mb(self) -> Optional[float]:
+        try:
+            with open(f"/proc/{self.pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) / 1024.0
+        except OSError:
+            pass
+        return None
+
+    def _alert_count(self) -> Optional[int]:
+        try:
+            conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, timeout=1.0)
+            try:
+                return conn.execute("SELECT COUNT(*) FROM alerts").fetchone()[0]
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return None
+
+    async def run(self, stop: asyncio.Event, interval: float = 1.0):
+        last_cpu = self._cpu_seconds() if self.pid else None
+        last_time = time.perf_counter()
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            now = time.perf_counter()
+            self.timestamps.append(now)
+            if self.pid:
+                cpu = self._cpu_seconds()
+                if cpu is not None and last_cpu is not None:
+                    self.cpu_percent.append((cpu - last_cpu) / (now - last_time) * 100.0)
+                last_cpu = cpu
+                rss = self._rss_mb()
+                if rss is not None:
+                    self.rss_mb.append(rss)
+            if self.db_path:
+                count = await asyncio.to_thread(self._alert_count)
+                if count is not None:
+                    self.alert_rows.append(count)
+            last_time = now
+
+    def db_write_rate(self) -> float:
+        """Alert rows inserted per second over the sampling period"""
+        if len(self.alert_rows) < 2 or len(self.timestamps) < 2:
+            return 0.0
+        elapsed = self.timestamps[-1] - self.timestamps[0]
+        return (self.alert_rows[-1] - self.alert_rows[0]) / elapsed if elapsed > 0 else 0.0
+
+
+def spawn_server(port: int, db_path: str) -> subprocess.Popen:
+    """Start a local uvicorn instance backed by a throwaway SQLite database"""
+    env = dict(os.environ)
+    env["DATABASE_URL"] = f"sqlite:///{db_path}"
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=backend_dir,
+        env=env,
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1):
+                return process
+        except OSError:
+            if process.poll() is not None:
+                raise SystemExit("uvicorn exited during startup")
+            time.sleep(0.5)
+    process.terminate()
+    raise SystemExit("Timed out waiting for uvicorn to start")
+
+
+def build_report(args: argparse.Namespace, clients: List[ClientStats], sampler: ServerSampler, elapsed: float) -> Dict[str, Any]:
+    """Aggregate per-client statistics into a single report"""
+    latencies = sorted(l for c in clients for l in c.latencies_ms)
+    sent = sum(c.sent for c in clients)
+    received = sum(c.received for c in clients)
+    dropped = sum(c.dropped for c in clients)
+    return {
+        "users": args.users,
+        "target_fps": args.fps,
+        "duration_s": round(elapsed, 2),
+        "frames_sent": sent,
+        "results_received": received,
+        "frames_dropped": dropped,
+        "drop_rate": round(dropped / (sent + dropped), 4) if sent + dropped else 0.0,
+        "throughput_fps": round(received / elapsed, 2) if elapsed > 0 else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "p99": round(percentile(latencies, 99), 2),
+            "max": round(latencies[-1], 2) if latencies else 0.0,
+        },
+        "server": {
+            "cpu_percent_avg": round(sum(sampler.cpu_percent) / len(sampler.cpu_percent), 1) if sampler.cpu_percent else None,
+            "cpu_percent_max": round(max(sampler.cpu_percent), 1) if sampler.cpu_percent else None,
+            "rss_mb_max": round(max(sampler.rss_mb), 1) if sampler.rss_mb else None,
+            "db_alert_writes_per_s": round(sampler.db_write_rate(), 2),
+        },
+        "errors": [e for c in clients for e in c.errors][:20],
+    }
+
+
+async def main_async(args: argparse.Namespace) -> Dict[str, Any]:
+    base_url = args.url.rstrip("/")
+    ws_url = base_url.replace("http://", "ws://").replace("https://", "wss://") + "/ws"
+
+    print(f"Authenticating {args.users} synthetic drivers...")
+    tokens = await asyncio.gather(*[
+        asyncio.to_thread(ensure_user, base_url, i) for i in range(args.users)
+    ])
+    frames = load_frames(args.frames_dir, args.width, args.height, args.synthetic_frames, args.quality)
+    print(f"Loaded {len(frames)} frames; streaming at {args.fps} FPS for {args.duration}s")
+
+    sampler = ServerSampler(args.server_pid, args.db)
+    stop = asyncio.Event()
+    sampler_task = asyncio.create_task(sampler.run(stop))
+
+    clients = [ClientStats() for _ in range(args.users)]
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        run_client(ws_url, token, frames, args.fps, args.duration, args.max_in_flight, stats)
+        for token, stats in zip(tokens, clients)
+    ])
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await sampler_task
+
+    return build_report(args, clients, sampler, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end /ws load benchmark")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Backend base URL")
+    parser.add_argument("--users", type=int, default=5, help="Number of concurrent synthetic drivers")
+    parser.add_argument("--fps", type=float, default=15.0, help="Frames per second per driver")
+    parser.add_argument("--duration", type=float, default=30.0, help="Streaming duration in seconds")
+    parser.add_argument("--max-in-flight", type=int, default=4, help="Unanswered frames before a client drops captures")
+    parser.add_argument("--frames-dir", help="Directory of recorded JPEG frames (default: synthetic)")
+    parser.add_argument("--synthetic-frames", type=int, default=60, help="Number of synthetic frames to cycle")
+    parser.add_argument("--width", type=int, default=1280, help="Synthetic frame width")
+    parser.add_argument("--height", type=int, default=720, help="Synthetic frame height")
+    parser.add_argument("--quality", type=int, default=80, help="Synthetic JPEG quality")
+    parser.add_argument("--server-pid", type=int, help="PID of the uvicorn process to sample CPU/RSS from")
+    parser.add_argument("--db", help="SQLite database file to sample the alert write rate from")
+    parser.add_argument("--spawn-server", action="store_true", help="Start a local uvicorn with a fresh SQLite DB")
+    parser.add_argument("--port", type=int, default=8765, help="Port for --spawn-server")
+    parser.add_argument("--json", dest="json_path", help="Write the report as JSON to this path")
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn_server:
+        args.db = args.db or os.path.abspath(f"bench_{int(time.time())}.db")
+        print(f"Starting uvicorn on port {args.port} with database {args.db}")
+        server = spawn_server(args.port, args.db)
+        args.url = f"http://127.0.0.1:{args.port}"
+        args.server_pid = server.pid
+
+    try:
+        report = asyncio.run(main_async(args))
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=10)
+
+    print(json.dumps(report, indent=2))
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
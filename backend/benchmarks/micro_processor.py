@@ -0,0 +1,278 @@
+"""
+Micro-benchmarks for DriverMonitorProcessor hot functions.
+
+Replays recorded landmark fixtures, so no camera is needed and MediaPipe is
+never invoked. Reports nanoseconds per call plus peak and retained bytes
+allocated per call, and flags regressions against a stored baseline.
+
+    python -m benchmarks.micro_processor                    # run and compare
+    python -m benchmarks.micro_processor --update-baseline  # store new baseline
+    python -m benchmarks.micro_processor --filter process_  # subset of cases
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from benchmarks.fixtures import DEFAULT_FIXTURE_PATH, Fixtures, load_fixtures
+from core.processor import DriverMonitorProcessor
+from models.detection import CalibrationData
+
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines", "micro_processor.json")
+
+
+class _LandmarkList:
+    """Mimics a MediaPipe NormalizedLandmarkList"""
+
+    def __init__(self, points):
+        self.landmark = points
+
+
+class _ReplayResult:
+    def __init__(self, multi_face_landmarks=None, multi_hand_landmarks=None):
+        self.multi_face_landmarks = multi_face_landmarks
+        self.multi_hand_landmarks = multi_hand_landmarks
+
+
+class ReplayFaceMesh:
+    """Stands in for mp.solutions.face_mesh.FaceMesh by cycling fixture frames"""
+
+    def __init__(self, fixtures: Fixtures):
+        self.frames = fixtures.frames
+        self.index = 0
+
+    def process(self, rgb):
+        frame = self.frames[self.index % len(self.frames)]
+        self.index += 1
+        return _ReplayResult(multi_face_landmarks=[_LandmarkList(frame.face)] if frame.face else None)
+
+
+class ReplayHands:
+    """Stands in for mp.solutions.hands.Hands by cycling fixture frames"""
+
+    def __init__(self, fixtures: Fixtures):
+        self.frames = fixtures.frames
+        self.index = 0
+
+    def process(self, rgb):
+        frame = self.frames[self.index % len(self.frames)]
+        self.index += 1
+        hands = [_LandmarkList(hand) for hand in frame.hands]
+        return _ReplayResult(multi_hand_landmarks=hands or None)
+
+
+def calibrated_processor(fixtures: Fixtures, **graphs) -> DriverMonitorProcessor:
+    """Processor calibrated to the neutral fixture pose"""
+    processor = DriverMonitorProcessor(**graphs)
+    neutral = fixtures.by_name("neutral")
+    result = processor.process_landmarks(neutral.face, [], fixtures.width, fixtures.height)
+    processor.calibrate(CalibrationData(
+        gaze_center=result.calibration_data["gaze_x"],
+        head_center_x=result.calibration_data["head_x"],
+        head_center_y=result.calibration_data["head_y"],
+        head_yaw=result.calibration_data["head_yaw"],
+        head_pitch=result.calibration_data["head_pitch"],
+        head_roll=result.calibration_data["head_roll"],
+    ))
+    processor.reset_state()
+    return processor
+
+
+def build_cases(fixtures: Fixtures) -> Dict[str, Callable[[], Any]]:
+    """Benchmark cases keyed by name"""
+    w, h = fixtures.width, fixtures.height
+    processor = calibrated_processor(fixtures)
+    neutral = fixtures.by_name("neutral")
+    phone = fixtures.by_name("phone_call")
+    texting = fixtures.by_name("texting")
+    face_center = (int(neutral.face[processor.NOSE_TIP].x * w), int(neutral.face[processor.NOSE_TIP].y * h))
+
+    cases: Dict[str, Callable[[], Any]] = {
+        "get_aspect_ratio": lambda: processor.get_aspect_ratio(neutral.face, processor.LEFT_EYE, w, h),
+        "get_mar": lambda: processor.get_mar(neutral.face, processor.MOUTH, w, h),
+        "get_iris_center": lambda: processor.get_iris_center(neutral.face, processor.LEFT_IRIS, w, h),
+        "hand_near_ear": lambda: processor.hand_near_ear(phone.face, phone.hands[0], w, h),
+        "hand_near_face": lambda: processor.hand_near_face(face_center, texting.hands[0], (h, w)),
+    }
+
+    for frame in fixtures.frames:
+        cases[f"process_landmarks[{frame.name}]"] = (
+            lambda f=frame: processor.process_landmarks(f.face, f.hands, w, h)
+        )
+
+    # Alerts that expire on the next frame: measures add, expiry and merge
+    expiry_processor = calibrated_processor(fixtures)
+    expiry_processor.settings.alert_duration = 0
+    alert_messages = [f"Warning: synthetic alert {i}" for i in range(10)]
+
+    def alert_expiry():
+        for message in alert_messages:
+            expiry_processor.add_alert(message, "warning")
+        return expiry_processor.process_landmarks(None, [], w, h)
+
+    cases["alert_expiry"] = alert_expiry
+
+    # The same alerts raised on every frame at 15 fps for longer than they last
+    sustained_processor = calibrated_processor(fixtures)
+    sustained_processor.settings.alert_duration = 3
+    sustained_clock = [0.0]
+
+    def alert_sustained():
+        sustained_clock[0] += 1 / 15
+        for message in alert_messages:
+            sustained_processor.add_alert(message, "warning")
+        return sustained_processor.process_landmarks(None, [], w, h, sustained_clock[0])
+
+    cases["alert_sustained"] = alert_sustained
+
+    # Driver plus a passenger to the side, as returned with DMS_MAX_NUM_FACES=2
+    tracker_processor = calibrated_processor(fixtures)
+    passenger = [p._replace(x=p.x * 0.5 + 0.5, y=p.y * 0.5) for p in neutral.face]
+    tracker_clock = [0.0]
+
+    def face_tracker_select():
+        tracker_clock[0] += 1 / 15
+        return tracker_processor.face_tracker.select(
+            [passenger, neutral.face], tracker_clock[0],
+            (tracker_processor.head_center_x, tracker_processor.head_center_y)
+        )
+
+    cases["face_tracker_select"] = face_tracker_select
+
+    full_result = calibrated_processor(fixtures).process_landmarks(phone.face, phone.hands, w, h)
+    cases["result_dict"] = lambda: full_result.dict()
+    cases["result_json"] = lambda: json.dumps(full_result.dict())
+
+    replay_processor = calibrated_processor(
+        fixtures, face_mesh=ReplayFaceMesh(fixtures), hands=ReplayHands(fixtures)
+    )
+    # Inference on every frame; the still case below measures skipping
+    replay_processor.settings.roi_skip = False
+    blank_frame = np.zeros((h, w, 3), dtype=np.uint8)
+    cases["process_frame[replay]"] = lambda: replay_processor.process_frame(blank_frame)
+
+    # Unchanged frames at 15 fps: landmarks are reused between inferences
+    still_processor = calibrated_processor(
+        fixtures, face_mesh=ReplayFaceMesh(fixtures), hands=ReplayHands(fixtures)
+    )
+    still_clock = [0.0]
+
+    def process_frame_still():
+        still_clock[0] += 1 / 15
+        return still_processor.process_frame(blank_frame, still_clock[0])
+
+    cases["process_frame[still]"] = process_frame_still
+
+    return cases
+
+
+def time_case(fn: Callable[[], Any], min_seconds: float, repeat: int) -> float:
+    """Best-of-`repeat` nanoseconds per call, auto-scaling the loop count"""
+    number = 1
+    while True:
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter_ns() - start
+        if elapsed >= min_seconds * 1e9 / repeat or number >= 1_000_000:
+            break
+        number *= 2
+
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter_ns() - start) / number)
+    return best
+
+
+def measure_allocations(fn: Callable[[], Any], calls: int = 50) -> Dict[str, float]:
+    """Peak bytes allocated by a single call and bytes retained per call"""
+    fn()
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        fn()
+        current, peak = tracemalloc.get_traced_memory()
+        peak_bytes = peak - before
+
+        before = current
+        for _ in range(calls):
+            fn()
+        retained, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"peak_bytes": float(peak_bytes), "retained_bytes_per_call": (retained - before) / calls}
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], tolerance: float) -> List[str]:
+    """Names of cases that are slower or allocate more than the baseline allows"""
+    regressions = []
+    for name, stats in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if stats["ns_per_call"] > base["ns_per_call"] * (1 + tolerance):
+            regressions.append(name)
+        elif stats["peak_bytes"] > base["peak_bytes"] * (1 + tolerance) + 1024:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DriverMonitorProcessor micro-benchmarks")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURE_PATH, help="Landmark fixture JSON")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH, help="Baseline JSON to compare against")
+    parser.add_argument("--update-baseline", action="store_true", help="Write results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before flagging (0.25 = 25%%)")
+    parser.add_argument("--min-time", type=float, default=0.5, help="Seconds of timing per case")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing repeats per case (best is kept)")
+    parser.add_argument("--filter", help="Only run cases whose name contains this string")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures)
+    cases = build_cases(fixtures)
+    if args.filter:
+        cases = {k: v for k, v in cases.items() if args.filter in k}
+
+    baseline: Dict[str, Dict[str, float]] = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results: Dict[str, Dict[str, float]] = {}
+    print(f"{'case':<36} {'ns/call':>12} {'peak B':>10} {'kept B':>9} {'vs base':>8}")
+    for name, fn in cases.items():
+        stats = {"ns_per_call": time_case(fn, args.min_time, args.repeat)}
+        stats.update(measure_allocations(fn))
+        results[name] = stats
+        base: Optional[Dict[str, float]] = baseline.get(name)
+        delta = f"{stats['ns_per_call'] / base['ns_per_call'] - 1:+.0%}" if base else "new"
+        print(f"{name:<36} {stats['ns_per_call']:>12.0f} {stats['peak_bytes']:>10.0f} "
+              f"{stats['retained_bytes_per_call']:>9.0f} {delta:>8}")
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"REGRESSIONS (> {args.tolerance:.0%} over baseline): {', '.join(regressions)}")
+        sys.exit(1)
+    if not baseline:
+        print("No baseline found; run with --update-baseline to store one")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Frame transport benchmark: shared-memory ring vs. pickling through a queue.
+
+A worker process receives frames from the parent and returns a small result
+(standing in for landmarks), once with every frame pickled through a
+multiprocessing queue and once with frames written into a core.frame_ring
+slot and only (slot, height, width) sent. Reports per-frame round-trip
+latency and throughput for 640p (640x480) and 1080p (1920x1080) frames.
+
+    python -m benchmarks.shm_transport --frames 300
+"""
+
+import argparse
+import json
+import multiprocessing
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from benchmarks.load_ws import percentile
+from core.frame_ring import FrameRing
+
+RESOLUTIONS = {
+    "640p": (480, 640),
+    "1080p": (1080, 1920),
+}
+
+
+def _worker(jobs, results, ring_spec: Optional[Dict[str, Any]]):
+    """Echo a tiny per-frame result; reads frames from the ring when given one"""
+    ring = FrameRing.attach(ring_spec) if ring_spec else None
+    try:
+        while True:
+            item = jobs.get()
+            if item is None:
+                break
+            frame = ring.view(*item) if ring else item
+            # Touch the frame the way inference would, without copying it
+            results.put((int(frame[0, 0, 0]), int(frame[-1, -1, -1])))
+    finally:
+        if ring:
+            ring.close()
+
+
+def run_transport(mode: str, shape, frames: int, slots: int) -> Dict[str, float]:
+    """Send `frames` frames one at a time and time each round trip"""
+    ctx = multiprocessing.get_context("spawn")
+    jobs, results = ctx.Queue(), ctx.Queue()
+    h, w = shape
+    ring = FrameRing(slots, w, h) if mode == "shm" else None
+    worker = ctx.Process(target=_worker, args=(jobs, results, ring.spec() if ring else None))
+    worker.start()
+
+    rng = np.random.default_rng(0)
+    source = [rng.integers(0, 255, (h, w, 3), dtype=np.uint8) for _ in range(4)]
+    latencies: List[float] = []
+    try:
+        # Warm-up round trip so process start-up is not measured
+        if ring:
+            slot = ring.acquire()
+            jobs.put((slot, 1, 1))
+            results.get()
+            ring.release(slot)
+        else:
+            jobs.put(source[0])
+            results.get()
+
+        started = time.perf_counter()
+        for i in range(frames):
+            frame = source[i % len(source)]
+            t0 = time.perf_counter()
+            if ring:
+                slot = ring.acquire()
+                ring.write(slot, frame)
+                jobs.put((slot, h, w))
+                results.get()
+                ring.release(slot)
+            else:
+                jobs.put(frame)
+                results.get()
+            latencies.append((time.perf_counter() - t0) * 1000.0)
+        elapsed = time.perf_counter() - started
+    finally:
+        jobs.put(None)
+        worker.join()
+        if ring:
+            ring.close()
+
+    latencies.sort()
+    return {
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "fps": round(frames / elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared-memory vs. pickled frame transport")
+    parser.add_argument("--frames", type=int, default=300, help="Frames per resolution and mode")
+    parser.add_argument("--slots", type=int, default=4, help="Frame ring slots")
+    parser.add_argument("--json", help="Write the report to this file")
+    args = parser.parse_args()
+
+    report: Dict[str, Any] = {}
+    print(f"{'resolution':<10} {'mode':<7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'fps':>9}")
+    for name, shape in RESOLUTIONS.items():
+        report[name] = {}
+        for mode in ("pickle", "shm"):
+            stats = run_transport(mode, shape, args.frames, args.slots)
+            report[name][mode] = stats
+            print(f"{name:<10} {mode:<7} {stats['p50_ms']:>9.3f} {stats['p95_ms']:>9.3f} "
+                  f"{stats['p99_ms']:>9.3f} {stats['fps']:>9.1f}")
+        pickled, shared = report[name]["pickle"]["p50_ms"], report[name]["shm"]["p50_ms"]
+        report[name]["speedup_p50"] = round(pickled / shared, 2) if shared else None
+        print(f"{name:<10} shm speedup (p50): {report[name]['speedup_p50']}x")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
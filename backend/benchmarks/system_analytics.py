@@ -0,0 +1,156 @@
+"""
+System analytics benchmark: /api/analytics/system query time at fleet scale.
+
+Seeds a throwaway SQLite database with drivers, sessions and the hourly,
+daily and monthly rollups that `--alerts` alerts spread over the last year would produce
+(raw alert rows are not needed by the endpoint), then times
+compute_system_analytics for each period. Alerts arrive in incidents of
+`--alerts-per-incident` rows, as a condition that persists is stored once
+per processed frame. Query time depends on the rollup rows of the period's
+grain (distinct bucket/alert and bucket/driver/severity combinations), not
+on the alert count. The fleet risk ranking (/api/analytics/risk, every
+driver scored and ranked) is timed for the same periods.
+
+    python -m benchmarks.system_analytics --alerts 5000000 --users 1000
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+import numpy as np
+
+from benchmarks.load_ws import percentile
+
+MESSAGES = [
+    ("drowsiness", "Eyes closed - wake up!"),
+    ("drowsiness", "Frequent yawning detected"),
+    ("drowsiness", "PERCLOS above threshold"),
+    ("distraction", "Looking away from road"),
+    ("distraction", "Head turned away"),
+    ("distraction", "Phone usage detected"),
+]
+SEVERITIES = ["mild", "moderate", "severe"]
+
+def seed(db, alerts: int, per_incident: int, users: int, sessions_per_user: int, rng) -> int:
+    """Insert drivers, sessions and hourly rollups; returns rollup rows"""
+    from database.models import AlertRollup, MonitoringSession, User, UserAlertRollup
+    from database.rollups import GRAINS, truncate
+    from utils.timezone import get_ist_datetime_for_db
+
+    now = truncate(get_ist_datetime_for_db(), "hour")
+    hours = 365 * 24
+    user_ids = [str(uuid.uuid4()) for _ in range(users)]
+    db.execute(User.__table__.insert(), [
+        {"id": user_id, "username": f"driver{i}", "email": f"driver{i}@example.com",
+         "hashed_password": "x", "role": "driver", "is_active": True}
+        for i, user_id in enumerate(user_ids)
+    ])
+
+    session_hours = rng.integers(0, hours, users * sessions_per_user)
+    db.execute(MonitoringSession.__table__.insert(), [
+        {"id": str(uuid.uuid4()), "user_id": user_ids[i % users],
+         "start_time": now - timedelta(hours=int(h)), "duration_seconds": int(d),
+         "total_alerts": 0, "drowsiness_alerts": 0, "distraction_alerts": 0}
+        for i, (h, d) in enumerate(zip(session_hours, rng.integers(600, 4 * 3600, len(session_hours))))
+    ])
+
+    # Aggregate random incidents into rollup rows per grain, as the rollup hook would
+    incidents = max(1, alerts // per_incident)
+    offsets = [now - timedelta(hours=h) for h in range(hours)]
+    incident_hours = rng.integers(0, hours, incidents)
+    incident_users = rng.integers(0, users, incidents)
+    incident_kinds = rng.integers(0, len(MESSAGES) * len(SEVERITIES), incidents)
+    written = 0
+    for grain in GRAINS:
+        buckets = np.array([truncate(offset, grain) for offset in offsets], dtype="datetime64[s]")
+        bucket_ids, bucket_index = np.unique(buckets[incident_hours], return_inverse=True)
+        fleet = Counter(zip(bucket_index.tolist(), incident_kinds.tolist()))
+        per_user = Counter(zip(
+            bucket_index.tolist(), incident_users.tolist(), (incident_kinds % len(SEVERITIES)).tolist(),
+            (incident_kinds // len(SEVERITIES) >= 3).tolist()
+        ))
+        rows = []
+        for (bucket, kind), count in fleet.items():
+            alert_type, message = MESSAGES[kind // len(SEVERITIES)]
+            rows.append({
+                "id": str(uuid.uuid4()), "grain": grain, "bucket": bucket_ids[bucket].astype(datetime),
+                "alert_type": alert_type, "severity": SEVERITIES[kind % len(SEVERITIES)],
+                "message": message, "count": count * per_incident,
+            })
+        db.execute(AlertRollup.__table__.insert(), rows)
+        rows = []
+        for (bucket, user, severity, distraction), count in per_user.items():
+            rows.append({
+                "id": str(uuid.uuid4()), "grain": grain, "bucket": bucket_ids[bucket].astype(datetime),
+                "user_id": user_ids[user], "alert_type": "distraction" if distraction else "drowsiness",
+                "severity": SEVERITIES[severity], "count": count * per_incident, "incidents": count,
+            })
+            if len(rows) == 50000:
+                db.execute(UserAlertRollup.__table__.insert(), rows)
+                rows = []
+        if rows:
+            db.execute(UserAlertRollup.__table__.insert(), rows)
+        written += len(fleet) + len(per_user)
+    db.commit()
+    return written
+
+def time_period(db, compute, period: str, repeat: int) -> Dict[str, float]:
+    latencies: List[float] = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        compute(db, period)
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+    latencies.sort()
+    return {
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "max_ms": round(latencies[-1], 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="System analytics query time over alert rollups")
+    parser.add_argument("--alerts", type=int, default=2_000_000, help="Alerts represented by the seeded rollups")
+    parser.add_argument("--alerts-per-incident", type=int, default=30)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--sessions-per-user", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", help="Write the report to this file")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="dms-analytics-")
+    # Must be set before database.connection is imported
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    from database.connection import SessionLocal, init_db
+    from api.analytics import compute_risk_ranking, compute_system_analytics
+
+    init_db()
+    db = SessionLocal()
+    try:
+        t0 = time.perf_counter()
+        rollups = seed(db, args.alerts, args.alerts_per_incident, args.users, args.sessions_per_user, np.random.default_rng(0))
+        print(f"Seeded {rollups} rollup rows for {args.alerts} alerts in {time.perf_counter() - t0:.1f}s")
+
+        report: Dict[str, Any] = {"alerts": args.alerts, "users": args.users, "rollup_rows": rollups}
+        print(f"{'query':<14} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+        for name, compute in (("system", compute_system_analytics), ("risk", compute_risk_ranking)):
+            for period in ("day", "week", "month", "year"):
+                stats = time_period(db, compute, period, args.repeat)
+                report[f"{name}_{period}"] = stats
+                label = f"{name} {period}"
+                print(f"{label:<14} {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} {stats['max_ms']:>9.2f}")
+    finally:
+        db.close()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
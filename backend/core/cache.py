@@ -0,0 +1,141 @@
+"""
+Result cache for the analytics endpoints.
+
+Entries are keyed by (user, endpoint, period bucket), expire after a TTL,
+and are evicted least-recently-used beyond a size bound. Each user has a
+data version kept in the state store (core.state_store): new alerts and
+session ends for a user increment it, and an entry computed at an older
+version is stale. With DMS_STATE_BACKEND=redis the version is shared, so
+a change handled by one uvicorn worker invalidates the entries of every
+worker; the entries themselves stay per process.
+
+Fleet-wide results are cached under the FLEET pseudo-user, shared by every
+manager. Its version is bumped together with any user's, since a new alert,
+session or user change for any driver changes the fleet figures.
+
+Cached bodies are stored serialized together with an ETag made of the
+version and a hash of the body, so the same data gets the same ETag on
+every worker, and a client that sends a matching If-None-Match gets a 304
+without the body being rebuilt or sent.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set, Tuple, Union
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from core.state_store import state_store
+
+RESPONSE_CACHE_SIZE = int(os.getenv("DMS_RESPONSE_CACHE_SIZE", "1024"))
+RESPONSE_CACHE_TTL_S = float(os.getenv("DMS_RESPONSE_CACHE_TTL_S", "30"))
+
+CacheKey = Tuple[str, str, Hashable]
+
+# Cache "user" of fleet-wide results; never a user id (those are UUIDs)
+FLEET = "fleet"
+
+def version_name(user_id: str) -> str:
+    """State store counter holding a user's data version"""
+    return f"cache_version:{user_id}"
+
+class ResponseCache:
+    """Size-bounded LRU of serialized responses with TTL and per-user data versions"""
+
+    def __init__(self, max_entries: int = 1024, ttl_s: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.entries: "OrderedDict[CacheKey, Tuple[float, int, str, bytes]]" = OrderedDict()
+        self.by_user: Dict[str, Set[CacheKey]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: CacheKey, version: int) -> Optional[Tuple[str, bytes]]:
+        """(etag, body) for a live entry computed at `version`, refreshing its LRU position"""
+        entry = self.entries.get(key)
+        if entry is None or entry[0] < time.monotonic() or entry[1] != version:
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[2], entry[3]
+
+    def put(self, key: CacheKey, version: int, value: Any) -> Tuple[str, bytes]:
+        body = json.dumps(jsonable_encoder(value), separators=(",", ":")).encode()
+        etag = f'"{version}-{hashlib.sha1(body).hexdigest()}"'
+        if key in self.entries:
+            self._remove(key)
+        self.entries[key] = (time.monotonic() + self.ttl_s, version, etag, body)
+        self.by_user.setdefault(key[0], set()).add(key)
+        while len(self.entries) > self.max_entries:
+            self._remove(next(iter(self.entries)))
+            self.evictions += 1
+        return etag, body
+
+    def _remove(self, key: CacheKey):
+        self.entries.pop(key, None)
+        keys = self.by_user.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.by_user[key[0]]
+
+    async def invalidate_user(self, user_id: str):
+        """Bump a user's data version (new alert, session ended), staling their entries in every process
+
+        The fleet version is bumped too, staling the fleet-wide entries.
+        """
+        for owner in (user_id, FLEET):
+            await state_store.increment(version_name(owner))
+            keys = self.by_user.pop(owner, None)
+            if keys:
+                for key in keys:
+                    self.entries.pop(key, None)
+                self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "ttl_s": self.ttl_s,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "not_modified": self.not_modified,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+response_cache = ResponseCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL_S)
+
+async def cached_response(
+    request: Request,
+    key: CacheKey,
+    compute: Callable[[], Union[Any, Awaitable[Any]]]
+) -> Response:
+    """Serve `key` from the cache (or compute and cache it) with ETag/304 support"""
+    version = await state_store.counter(version_name(key[0]))
+    entry = response_cache.get(key, version)
+    if entry is None:
+        value = compute()
+        if inspect.isawaitable(value):
+            value = await value
+        entry = response_cache.put(key, version, value)
+    etag, body = entry
+
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        response_cache.not_modified += 1
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -1,33 +1,66 @@
 from pydantic import BaseSettings, Field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 class Settings(BaseSettings):
     """Configuration settings for the Driver Monitoring System"""
     
     # Eye detection thresholds
     ear_threshold: float = Field(default=0.140, description="Eye Aspect Ratio threshold")
-    eye_closed_frames_threshold: int = Field(default=9, description="Frames before eye closure alert")
+    eye_closed_frames_threshold: int = Field(default=9, description="Frames before eye closure alert (legacy, converted to eye_closed_warning_s)")
+    eye_closed_warning_s: float = Field(default=0.6, description="Seconds of eye closure before a warning")
+    eye_closed_severe_s: float = Field(default=2.0, description="Seconds of eye closure before a severe alert")
+    blink_min_s: float = Field(default=0.1, description="Minimum closure duration counted as a blink")
     blink_rate_threshold: int = Field(default=5, description="Blinks per minute threshold")
     
     # Mouth/Yawn detection
     mar_threshold: float = Field(default=0.6, description="Mouth Aspect Ratio threshold")
-    yawn_threshold: int = Field(default=3, description="Frames before yawn alert")
+    yawn_threshold: int = Field(default=3, description="Frames before yawn alert (legacy, converted to yawn_duration_s)")
+    yawn_duration_s: float = Field(default=0.2, description="Seconds of open mouth before a yawn alert")
+    
+    # Frame timing
+    reference_fps: float = Field(default=15.0, description="Frame rate used to convert legacy frame-count thresholds")
+    max_frame_gap_s: float = Field(default=0.5, description="Longest frame interval counted towards durations")
     
     # Video settings
     frame_width: int = Field(default=1920, description="Video frame width")
     frame_height: int = Field(default=1080, description="Video frame height")
     scale_factor: float = Field(default=1.0, description="Resolution scaling factor")
     
+    # Adaptive frame rate / resolution control
+    adaptive_rate: bool = Field(default=True, description="Send rate and resolution hints to the client under load")
+    min_fps: float = Field(default=5.0, description="Lowest frame rate the client is asked to send")
+    max_fps: float = Field(default=15.0, description="Highest frame rate the client is asked to send")
+    target_latency_ms: float = Field(default=150.0, description="Target server latency per frame")
+    max_queue_depth: int = Field(default=4, description="Frames in flight before the node counts as saturated")
+    rate_control_interval_s: float = Field(default=1.0, description="Seconds between rate control adjustments")
+    
     # Head pose and gaze
     gaze_deviation_threshold: float = Field(default=0.05, description="Gaze deviation threshold")
-    head_turn_threshold: float = Field(default=0.08, description="Head turn threshold")
+    head_turn_threshold: float = Field(default=0.08, description="Nose-offset head turn/tilt threshold, used only for calibrations made before pose estimation")
+    head_yaw_threshold_deg: float = Field(default=20.0, description="Head turn (yaw) from the calibrated pose before an alert, degrees")
+    head_pitch_up_threshold_deg: float = Field(default=15.0, description="Upward head tilt from the calibrated pose before an alert, degrees")
+    head_pitch_down_threshold_deg: float = Field(default=15.0, description="Downward head droop from the calibrated pose before an alert, degrees")
     
     # Hand detection
-    hand_near_face_px: int = Field(default=200, description="Pixel distance for hand near face")
+    hand_near_face_px: int = Field(default=200, description="Pixel distance for hand near face at the client's capture resolution (scaled when frames are reduced)")
     
     # Alert settings
     alert_duration: int = Field(default=3, description="Alert display duration in seconds")
     
+    # Signal smoothing and hysteresis
+    signal_filter: str = Field(default="median", description="Signal smoothing: median, ema or none")
+    ema_alpha: float = Field(default=0.5, description="EMA smoothing factor (0-1, higher follows faster)")
+    median_window: int = Field(default=3, description="Median filter window in frames")
+    hysteresis_margin: float = Field(default=0.1, description="Exit threshold offset as a fraction of the enter threshold")
+    
+    # Fatigue metrics
+    fatigue_windows: List[int] = Field(default=[30, 60, 300], description="Rolling windows (seconds) for PERCLOS, blink and yawn metrics")
+    
+    # Inference skipping on still frames
+    roi_skip: bool = Field(default=True, description="Reuse the previous landmarks when the face region has not changed")
+    roi_motion_threshold: float = Field(default=8.0, description="Largest grey-level change in the face thumbnail counted as still")
+    roi_max_skip_s: float = Field(default=0.25, description="Longest time landmarks are reused without inference (capped below blink_min_s)")
+    
     class Config:
         env_prefix = "DMS_"
         case_sensitive = False
@@ -37,16 +70,39 @@ class Settings(BaseSettings):
         return {
             "ear_threshold": self.ear_threshold,
             "eye_closed_frames_threshold": self.eye_closed_frames_threshold,
+            "eye_closed_warning_s": self.eye_closed_warning_s,
+            "eye_closed_severe_s": self.eye_closed_severe_s,
+            "blink_min_s": self.blink_min_s,
             "blink_rate_threshold": self.blink_rate_threshold,
             "mar_threshold": self.mar_threshold,
             "yawn_threshold": self.yawn_threshold,
+            "yawn_duration_s": self.yawn_duration_s,
+            "reference_fps": self.reference_fps,
+            "max_frame_gap_s": self.max_frame_gap_s,
             "frame_width": self.frame_width,
             "frame_height": self.frame_height,
             "scale_factor": self.scale_factor,
+            "adaptive_rate": self.adaptive_rate,
+            "min_fps": self.min_fps,
+            "max_fps": self.max_fps,
+            "target_latency_ms": self.target_latency_ms,
+            "max_queue_depth": self.max_queue_depth,
+            "rate_control_interval_s": self.rate_control_interval_s,
             "gaze_deviation_threshold": self.gaze_deviation_threshold,
             "head_turn_threshold": self.head_turn_threshold,
+            "head_yaw_threshold_deg": self.head_yaw_threshold_deg,
+            "head_pitch_up_threshold_deg": self.head_pitch_up_threshold_deg,
+            "head_pitch_down_threshold_deg": self.head_pitch_down_threshold_deg,
             "hand_near_face_px": self.hand_near_face_px,
-            "alert_duration": self.alert_duration
+            "alert_duration": self.alert_duration,
+            "signal_filter": self.signal_filter,
+            "ema_alpha": self.ema_alpha,
+            "median_window": self.median_window,
+            "hysteresis_margin": self.hysteresis_margin,
+            "fatigue_windows": list(self.fatigue_windows),
+            "roi_skip": self.roi_skip,
+            "roi_motion_threshold": self.roi_motion_threshold,
+            "roi_max_skip_s": self.roi_max_skip_s
         }
     
     def update(self, updates: Dict[str, Any]) -> Dict[str, Any]:
@@ -54,4 +110,10 @@ class Settings(BaseSettings):
         for key, value in updates.items():
             if hasattr(self, key):
                 setattr(self, key, value)
+        
+        # Frame-count thresholds from older clients map onto the duration settings
+        if "eye_closed_frames_threshold" in updates and "eye_closed_warning_s" not in updates:
+            self.eye_closed_warning_s = self.eye_closed_frames_threshold / self.reference_fps
+        if "yawn_threshold" in updates and "yawn_duration_s" not in updates:
+            self.yawn_duration_s = self.yawn_threshold / self.reference_fps
         return self.dict()
\ No newline at end of file
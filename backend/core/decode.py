@@ -0,0 +1,112 @@
+"""
+Decoding of incoming camera frames, sized for inference.
+
+A JPEG at least twice as wide as the inference resolution (frame_width x
+scale_factor) is decoded at 1/2, 1/4 or 1/8 size with IMREAD_REDUCED_COLOR_*:
+libjpeg scales during the inverse DCT, so this is faster than a full decode
+and its output is 4-64x smaller. The source size is read from the JPEG
+header, so no full decode is needed to choose the factor.
+
+The reduced frame is narrower than the one the client sent. Landmarks are
+normalized, but the pixel distances derived from them shrink with the
+frame, so the processor scales its pixel thresholds by the analysed width
+(DriverMonitorProcessor.pixel_scale) and the pose solver builds its camera
+from the same size.
+
+The RGB copy the MediaPipe graphs need is converted into a buffer kept by
+the decoder and reused while the frame size stays the same. The decoded BGR
+frame itself is the one remaining allocation per frame: the Python binding
+of cv2.imdecode has no destination argument.
+"""
+
+import struct
+from typing import Optional, Tuple
+
+import numpy as np
+
+from core.config import Settings
+
+# Start-of-frame markers carrying the image size (SOF0-SOF15 except DHT, JPG and DAC)
+_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+REDUCTION_FACTORS = (8, 4, 2)
+
+def inference_width(settings: Settings) -> int:
+    """Widest frame the pipeline needs, as used by the rate controller"""
+    return int(settings.frame_width * settings.scale_factor)
+
+def jpeg_size(data: bytes) -> Optional[Tuple[int, int]]:
+    """(width, height) from a JPEG header, None if the data is not a JPEG"""
+    if data[:2] != b"\xff\xd8":
+        return None
+    i = 2
+    while i + 9 <= len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:
+            # Fill byte
+            i += 1
+            continue
+        if marker in _SOF_MARKERS:
+            height, width = struct.unpack(">HH", data[i + 5:i + 9])
+            return width, height
+        if marker == 0x01 or 0xD0 <= marker <= 0xD7:
+            i += 2
+            continue
+        i += 2 + struct.unpack(">H", data[i + 2:i + 4])[0]
+    return None
+
+def reduction_factor(source_width: int, target_width: int) -> int:
+    """Largest supported factor that keeps the decoded width at or above the target"""
+    for factor in REDUCTION_FACTORS:
+        if source_width // factor >= target_width:
+            return factor
+    return 1
+
+def _flag(factor: int) -> int:
+    import cv2
+    return {
+        1: cv2.IMREAD_COLOR,
+        2: cv2.IMREAD_REDUCED_COLOR_2,
+        4: cv2.IMREAD_REDUCED_COLOR_4,
+        8: cv2.IMREAD_REDUCED_COLOR_8,
+    }[factor]
+
+def decode_factor(data: bytes, target_width: Optional[int]) -> int:
+    """Reduction factor for a frame; only JPEGs are decoded reduced"""
+    size = jpeg_size(data) if target_width else None
+    return reduction_factor(size[0], target_width) if size else 1
+
+def decode_frame(data: bytes, target_width: Optional[int] = None, factor: Optional[int] = None) -> Optional[np.ndarray]:
+    """Decode JPEG/PNG bytes to a BGR frame no narrower than needed (None if not an image)"""
+    import cv2
+    if factor is None:
+        factor = decode_factor(data, target_width)
+    # frombuffer wraps the bytes without copying them
+    return cv2.imdecode(np.frombuffer(data, np.uint8), _flag(factor))
+
+class FrameDecoder:
+    """Per-processor decode stage with a reused RGB buffer"""
+
+    def __init__(self, target_width: Optional[int] = None):
+        self.target_width = target_width
+        self.rgb: Optional[np.ndarray] = None
+        # (width, height) of the last frame as the client sent it, before any reduction
+        self.source_size: Optional[Tuple[int, int]] = None
+
+    def decode(self, data: bytes) -> Optional[np.ndarray]:
+        """BGR frame for JPEG/PNG bytes, None if the data is not an image"""
+        size = jpeg_size(data)
+        factor = reduction_factor(size[0], self.target_width) if size and self.target_width else 1
+        frame = decode_frame(data, factor=factor)
+        if frame is not None:
+            self.source_size = size or (frame.shape[1], frame.shape[0])
+        return frame
+
+    def to_rgb(self, frame: np.ndarray) -> np.ndarray:
+        """RGB copy of a BGR frame, written into the reused buffer"""
+        import cv2
+        if self.rgb is None or self.rgb.shape != frame.shape:
+            self.rgb = np.empty(frame.shape, dtype=np.uint8)
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self.rgb)
+        return self.rgb
@@ -0,0 +1,188 @@
+"""
+Follows the driver's face across frames when FaceMesh returns several faces.
+
+With DMS_MAX_NUM_FACES above 1, passengers in view are detected too. Each
+face is reduced to a bounding box from four face-oval landmarks and matched
+to the tracks of previous frames, greedily from the highest IoU down, with
+a centroid-distance fallback for heads that moved further than their own
+width overlaps. The driver's track is chosen when there is none (the face
+whose nose tip is closest to the calibrated head position, or the largest
+face before calibration) and kept while it is seen: a frame in which only
+passengers are visible has no driver face, rather than a passenger's.
+
+A track not seen for `max_age_s` is dropped; the driver's track is kept for
+`driver_max_age_s`, since a drooping or turned head is often missed for a
+while. If the driver's track is lost anyway, only a face within
+`reselect_widths` face widths of where the driver was last seen can become
+the driver, so a passenger is not picked up in their place. That bound is
+lifted once the driver has been gone for `anchor_max_age_s`.
+
+Matching works on a handful of boxes, so the cost per frame is negligible
+next to inference, and the rule engine still runs once per frame.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from core.landmarks import LandmarkPoint
+
+Box = Tuple[float, float, float, float]
+
+# Forehead, chin, and the left and right edges of the face oval
+OVAL_POINTS = (10, 152, 234, 454)
+NOSE_TIP = 1
+
+def face_box(face: List[LandmarkPoint]) -> Box:
+    """Normalized (x0, y0, x1, y1) bounding box of a face"""
+    xs = [face[i].x for i in OVAL_POINTS]
+    ys = [face[i].y for i in OVAL_POINTS]
+    return min(xs), min(ys), max(xs), max(ys)
+
+def iou(a: Box, b: Box) -> float:
+    """Intersection over union of two boxes"""
+    w = min(a[2], b[2]) - max(a[0], b[0])
+    h = min(a[3], b[3]) - max(a[1], b[1])
+    if w <= 0 or h <= 0:
+        return 0.0
+    inter = w * h
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+def _center(box: Box) -> Tuple[float, float]:
+    return (box[0] + box[2]) / 2, (box[1] + box[3]) / 2
+
+def _center_distance2(a: Box, b: Box) -> float:
+    (ax, ay), (bx, by) = _center(a), _center(b)
+    return (ax - bx) ** 2 + (ay - by) ** 2
+
+def _area(box: Box) -> float:
+    return (box[2] - box[0]) * (box[3] - box[1])
+
+class FaceTrack:
+    __slots__ = ("id", "box", "last_seen")
+
+    def __init__(self, track_id: int, box: Box, t: float):
+        self.id = track_id
+        self.box = box
+        self.last_seen = t
+
+class FaceTracker:
+    """IoU/centroid tracker that keeps the driver's face identity"""
+
+    def __init__(self, iou_threshold: float = 0.3, max_age_s: float = 1.0, driver_max_age_s: float = 3.0,
+                 reselect_widths: float = 1.0, anchor_max_age_s: float = 30.0):
+        self.iou_threshold = iou_threshold
+        self.max_age_s = max_age_s
+        self.driver_max_age_s = driver_max_age_s
+        self.reselect_widths = reselect_widths
+        self.anchor_max_age_s = anchor_max_age_s
+        self.reset()
+
+    def reset(self):
+        self.tracks: Dict[int, FaceTrack] = {}
+        self.next_id = 1
+        self.driver_id: Optional[int] = None
+        # Where the driver's face was last seen, bounding reselection after the track is lost
+        self.driver_anchor: Optional[FaceTrack] = None
+        self.last_t: Optional[float] = None
+        self.driver_changes = 0
+        self.frames_without_driver = 0
+
+    def update(self, faces: List[List[LandmarkPoint]], t: float) -> List[int]:
+        """Match faces to tracks and return the track id of each face"""
+        if self.last_t is not None and t < self.last_t:
+            # The timebase restarted; ages are meaningless, start over
+            self.tracks = {}
+            self.driver_id = None
+            self.driver_anchor = None
+        self.last_t = t
+        expired = [
+            i for i, track in self.tracks.items()
+            if t - track.last_seen > (self.driver_max_age_s if i == self.driver_id else self.max_age_s)
+        ]
+        for track_id in expired:
+            del self.tracks[track_id]
+            if track_id == self.driver_id:
+                self.driver_id = None
+        if self.driver_anchor is not None and t - self.driver_anchor.last_seen > self.anchor_max_age_s:
+            self.driver_anchor = None
+
+        boxes = [face_box(face) for face in faces]
+        ids: List[Optional[int]] = [None] * len(faces)
+        free = dict(self.tracks)
+        pairs = sorted(
+            ((iou(track.box, box), track.id, f) for track in free.values() for f, box in enumerate(boxes)),
+            reverse=True
+        )
+        for overlap, track_id, f in pairs:
+            if overlap < self.iou_threshold:
+                break
+            if ids[f] is None and track_id in free:
+                ids[f] = track_id
+                del free[track_id]
+
+        # Fast movement: nearest remaining track within one face width
+        for f, box in enumerate(boxes):
+            if ids[f] is not None or not free:
+                continue
+            cx, cy = _center(box)
+            width = box[2] - box[0]
+            nearest = min(
+                free.values(),
+                key=lambda track: (_center(track.box)[0] - cx) ** 2 + (_center(track.box)[1] - cy) ** 2
+            )
+            nx, ny = _center(nearest.box)
+            if (nx - cx) ** 2 + (ny - cy) ** 2 <= width ** 2:
+                ids[f] = nearest.id
+                del free[nearest.id]
+
+        for f, box in enumerate(boxes):
+            if ids[f] is None:
+                ids[f] = self.next_id
+                self.next_id += 1
+                self.tracks[ids[f]] = FaceTrack(ids[f], box, t)
+            else:
+                track = self.tracks[ids[f]]
+                track.box = box
+                track.last_seen = t
+        return ids
+
+    def select(self, faces: List[List[LandmarkPoint]], t: float,
+               anchor: Optional[Tuple[float, float]] = None) -> Optional[List[LandmarkPoint]]:
+        """The driver's face among `faces`, None if the driver is not in this frame
+
+        `anchor` is the calibrated (x, y) of the driver's nose tip; before
+        calibration the largest face is taken as the driver.
+        """
+        ids = self.update(faces, t)
+        if self.driver_id is None and faces:
+            candidates = list(range(len(faces)))
+            if self.driver_anchor is not None:
+                # Driver lost recently: only a face near where they were seen
+                last = self.driver_anchor.box
+                reach = (last[2] - last[0]) * self.reselect_widths
+                candidates = [f for f in candidates if _center_distance2(self.tracks[ids[f]].box, last) <= reach ** 2]
+            if candidates:
+                if anchor is None:
+                    index = max(candidates, key=lambda f: _area(self.tracks[ids[f]].box))
+                else:
+                    index = min(
+                        candidates,
+                        key=lambda f: (faces[f][NOSE_TIP].x - anchor[0]) ** 2 + (faces[f][NOSE_TIP].y - anchor[1]) ** 2
+                    )
+                self.driver_id = ids[index]
+                self.driver_changes += 1
+        for face, track_id in zip(faces, ids):
+            if track_id == self.driver_id:
+                track = self.tracks[track_id]
+                self.driver_anchor = FaceTrack(track_id, track.box, t)
+                return face
+        self.frames_without_driver += 1
+        return None
+
+    def stats(self) -> Dict[str, int]:
+        """Session figures stored in session_metadata.face_tracker"""
+        return {
+            "tracks": len(self.tracks),
+            "driver_changes": self.driver_changes,
+            "frames_without_driver": self.frames_without_driver,
+        }
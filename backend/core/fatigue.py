@@ -0,0 +1,183 @@
+import math
+from typing import Any, Dict, List, Optional, Sequence
+
+class RollingWindow:
+    """Rolling sums over a fixed time window, kept in a ring of time buckets
+
+    Values are added to the bucket for the current time slice and to running
+    totals. When time advances, only the buckets that fall out of the window
+    are subtracted, so updates are O(1) amortized and reads are O(1).
+    """
+
+    def __init__(self, window_s: float, n_fields: int, bucket_s: float = 1.0):
+        self.window_s = window_s
+        self.bucket_s = bucket_s
+        self.size = max(1, int(math.ceil(window_s / bucket_s)))
+        self.n_fields = n_fields
+        self.buckets = [[0.0] * n_fields for _ in range(self.size)]
+        self.totals = [0.0] * n_fields
+        self.current: Optional[int] = None
+
+    def _advance(self, bucket: int):
+        if self.current is None:
+            self.current = bucket
+            return
+        if bucket <= self.current:
+            return
+        # Clear every bucket that is reused between the old and new position
+        for b in range(self.current + 1, min(bucket, self.current + self.size) + 1):
+            slot = self.buckets[b % self.size]
+            for i in range(self.n_fields):
+                self.totals[i] -= slot[i]
+                slot[i] = 0.0
+        self.current = bucket
+
+    def add(self, t: float, values: Sequence[float]):
+        """Add per-field values observed at time t (seconds)"""
+        bucket = int(t // self.bucket_s)
+        self._advance(bucket)
+        slot = self.buckets[bucket % self.size]
+        for i, v in enumerate(values):
+            if v:
+                slot[i] += v
+                self.totals[i] += v
+
+    def reset(self):
+        for slot in self.buckets:
+            for i in range(self.n_fields):
+                slot[i] = 0.0
+        self.totals = [0.0] * self.n_fields
+        self.current = None
+
+    def export_state(self) -> Dict[str, Any]:
+        return {"buckets": [list(slot) for slot in self.buckets], "current": self.current}
+
+    def load_state(self, state: Dict[str, Any]):
+        buckets = state.get("buckets", [])
+        if len(buckets) != self.size:
+            # Window size changed since the state was saved; start empty
+            self.reset()
+            return
+        self.buckets = [list(slot) for slot in buckets]
+        self.totals = [sum(slot[i] for slot in self.buckets) for i in range(self.n_fields)]
+        self.current = state.get("current")
+
+class FatigueMetrics:
+    """PERCLOS, blink rate, blink duration and yawn frequency over rolling windows"""
+
+    # Fields stored per bucket
+    OBSERVED, CLOSED, BLINKS, BLINK_TIME, YAWNS = range(5)
+
+    def __init__(self, windows: Sequence[int] = (30, 60, 300), max_frame_gap_s: float = 0.5):
+        # Frame gaps longer than this (Settings.max_frame_gap_s) are not counted as observed time
+        self.max_frame_gap_s = max_frame_gap_s
+        self.configure(windows)
+
+    def configure(self, windows: Sequence[int]):
+        self.window_sizes: List[int] = sorted(set(int(w) for w in windows if w > 0))
+        self.windows = {w: RollingWindow(w, 5) for w in self.window_sizes}
+        self.reset()
+
+    def reset(self):
+        for window in self.windows.values():
+            window.reset()
+        self.first_time: Optional[float] = None
+        self.last_time: Optional[float] = None
+        self.session_totals = [0.0] * 5
+        self.peak_perclos: Dict[int, float] = {w: 0.0 for w in self.window_sizes}
+
+    def update(self, t: float, face_visible: bool, eyes_closed: bool,
+               blink_duration: Optional[float] = None, yawn_started: bool = False):
+        """Record one frame; blink_duration is set on the frame a blink ends"""
+        dt = 0.0
+        if self.first_time is None:
+            self.first_time = t
+        if self.last_time is not None:
+            dt = t - self.last_time
+            if dt < 0 or dt > self.max_frame_gap_s:
+                dt = 0.0
+        self.last_time = t
+
+        values = [0.0] * 5
+        if face_visible:
+            values[self.OBSERVED] = dt
+            if eyes_closed:
+                values[self.CLOSED] = dt
+        if blink_duration is not None:
+            values[self.BLINKS] = 1.0
+            values[self.BLINK_TIME] = blink_duration
+        if yawn_started:
+            values[self.YAWNS] = 1.0
+
+        for i, v in enumerate(values):
+            self.session_totals[i] += v
+        for size, window in self.windows.items():
+            window.add(t, values)
+            # Only track peaks once the window is at least half filled
+            if window.totals[self.OBSERVED] >= size / 2:
+                perclos = self._perclos(window.totals)
+                if perclos > self.peak_perclos[size]:
+                    self.peak_perclos[size] = perclos
+
+    def export_state(self) -> Dict[str, Any]:
+        """Window buckets and session totals as JSON-serializable data"""
+        return {
+            "windows": {str(w): window.export_state() for w, window in self.windows.items()},
+            "first_time": self.first_time,
+            "last_time": self.last_time,
+            "session_totals": list(self.session_totals),
+            "peak_perclos": {str(w): v for w, v in self.peak_perclos.items()},
+        }
+
+    def load_state(self, state: Dict[str, Any]):
+        """Restore state saved by export_state() for the configured windows"""
+        self.reset()
+        for w, window_state in state.get("windows", {}).items():
+            if int(w) in self.windows:
+                self.windows[int(w)].load_state(window_state)
+        self.first_time = state.get("first_time")
+        self.last_time = state.get("last_time")
+        self.session_totals = list(state.get("session_totals", self.session_totals))
+        for w, v in state.get("peak_perclos", {}).items():
+            if int(w) in self.peak_perclos:
+                self.peak_perclos[int(w)] = v
+
+    def _perclos(self, totals: Sequence[float]) -> float:
+        observed = totals[self.OBSERVED]
+        return totals[self.CLOSED] / observed * 100.0 if observed > 0 else 0.0
+
+    def _window_metrics(self, totals: Sequence[float], span_s: float) -> Dict[str, float]:
+        blinks = totals[self.BLINKS]
+        minutes = span_s / 60.0 if span_s > 0 else 0.0
+        return {
+            "perclos": self._perclos(totals),
+            "blink_rate": blinks / minutes if minutes else 0.0,
+            "blink_duration_ms": totals[self.BLINK_TIME] / blinks * 1000.0 if blinks else 0.0,
+            "yawn_rate": totals[self.YAWNS] / minutes if minutes else 0.0,
+        }
+
+    def metrics(self) -> Dict[str, float]:
+        """Flat metrics for DetectionResult.metrics, e.g. perclos_60s, blink_rate_60s"""
+        flat: Dict[str, float] = {}
+        elapsed = self.last_time - self.first_time if self.last_time is not None else 0.0
+        for size, window in self.windows.items():
+            # Rates are per minute of the time actually covered by the window
+            span = min(float(size), elapsed)
+            for name, value in self._window_metrics(window.totals, span).items():
+                flat[f"{name}_{size}s"] = round(value, 3)
+        return flat
+
+    def summary(self) -> Dict[str, Any]:
+        """Session-level summary for MonitoringSession.session_metadata"""
+        observed = self.session_totals[self.OBSERVED]
+        session = self._window_metrics(self.session_totals, observed)
+        return {
+            "observed_seconds": round(observed, 1),
+            "perclos": round(session["perclos"], 3),
+            "blinks": int(self.session_totals[self.BLINKS]),
+            "blink_rate": round(session["blink_rate"], 3),
+            "blink_duration_ms": round(session["blink_duration_ms"], 1),
+            "yawns": int(self.session_totals[self.YAWNS]),
+            "yawn_rate": round(session["yawn_rate"], 3),
+            "peak_perclos": {f"{w}s": round(v, 3) for w, v in self.peak_perclos.items()},
+        }
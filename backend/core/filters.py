@@ -0,0 +1,183 @@
+from bisect import bisect_left, insort
+from collections import deque
+from typing import Any, Dict, Optional
+
+class PassthroughFilter:
+    """No smoothing; returns the raw value"""
+
+    def update(self, value: float) -> float:
+        return value
+
+    def reset(self):
+        pass
+
+    def export_state(self) -> Any:
+        return None
+
+    def load_state(self, state: Any):
+        pass
+
+class EMAFilter:
+    """Exponential moving average, O(1) per update"""
+
+    def __init__(self, alpha: float = 0.5):
+        self.alpha = alpha
+        self.value: Optional[float] = None
+
+    def update(self, value: float) -> float:
+        if self.value is None:
+            self.value = value
+        else:
+            self.value += self.alpha * (value - self.value)
+        return self.value
+
+    def reset(self):
+        self.value = None
+
+    def export_state(self) -> Any:
+        return self.value
+
+    def load_state(self, state: Any):
+        self.value = state
+
+class MedianFilter:
+    """Running median over a fixed-size ring buffer
+
+    The ring keeps arrival order for eviction and a sorted copy is maintained
+    with bisect, so each update costs O(window) at worst for a small, fixed window.
+    """
+
+    def __init__(self, window: int = 3):
+        self.window = max(1, window)
+        self.ring: deque = deque(maxlen=self.window)
+        self.sorted_values = []
+
+    def update(self, value: float) -> float:
+        if len(self.ring) == self.window:
+            oldest = self.ring[0]
+            del self.sorted_values[bisect_left(self.sorted_values, oldest)]
+        self.ring.append(value)
+        insort(self.sorted_values, value)
+
+        n = len(self.sorted_values)
+        mid = n // 2
+        if n % 2:
+            return self.sorted_values[mid]
+        return (self.sorted_values[mid - 1] + self.sorted_values[mid]) / 2
+
+    def reset(self):
+        self.ring.clear()
+        self.sorted_values = []
+
+    def export_state(self) -> Any:
+        return list(self.ring)
+
+    def load_state(self, state: Any):
+        self.reset()
+        for value in (state or [])[-self.window:]:
+            self.update(value)
+
+class Hysteresis:
+    """Two-threshold (Schmitt trigger) state for one signal
+
+    For a rising signal the state turns on above `enter` and only turns off
+    again below `exit`; for a falling signal (e.g. EAR) the comparisons are
+    reversed. Thresholds are passed on every update so settings changes apply
+    immediately.
+    """
+
+    def __init__(self, rising: bool = True):
+        self.rising = rising
+        self.active = False
+
+    def update(self, value: float, enter: float, exit: float) -> bool:
+        if self.rising:
+            self.active = value > exit if self.active else value > enter
+        else:
+            self.active = value < exit if self.active else value < enter
+        return self.active
+
+    def reset(self):
+        self.active = False
+
+def make_filter(mode: str, ema_alpha: float, median_window: int):
+    """Build a signal filter for the configured smoothing mode"""
+    if mode == "ema":
+        return EMAFilter(ema_alpha)
+    if mode == "median":
+        return MedianFilter(median_window)
+    return PassthroughFilter()
+
+class SignalFilterBank:
+    """Per-signal filters and hysteresis states used by the rule engine"""
+
+    # Signal name -> True if the alert condition is "value above threshold"
+    SIGNALS = {
+        "avg_ear": False,
+        "mar": True,
+        "gaze_x": True,
+        "head_x": True,
+        "head_y": True,
+        "head_yaw": True,
+        "head_pitch": True,
+        "head_roll": True,
+    }
+
+    def __init__(self, mode: str = "median", ema_alpha: float = 0.5, median_window: int = 3):
+        self.configure(mode, ema_alpha, median_window)
+
+    def configure(self, mode: str, ema_alpha: float, median_window: int):
+        """(Re)build the filters; hysteresis states are kept"""
+        self.mode = mode
+        self.ema_alpha = ema_alpha
+        self.median_window = median_window
+        self.filters = {
+            name: make_filter(mode, ema_alpha, median_window) for name in self.SIGNALS
+        }
+        if not hasattr(self, "hysteresis"):
+            self.hysteresis: Dict[str, Hysteresis] = {
+                name: Hysteresis(rising) for name, rising in self.SIGNALS.items()
+            }
+
+    def needs_rebuild(self, mode: str, ema_alpha: float, median_window: int) -> bool:
+        return (mode, ema_alpha, median_window) != (self.mode, self.ema_alpha, self.median_window)
+
+    def smooth(self, name: str, value: float) -> float:
+        """Feed a raw value and return the filtered one"""
+        return self.filters[name].update(value)
+
+    def crossed(self, name: str, value: float, threshold: float, margin: float) -> bool:
+        """Hysteresis test of a (filtered) value against its threshold
+
+        The exit threshold sits `margin` (a fraction of the threshold) on the
+        non-alert side, so noise around the threshold does not toggle the state.
+        """
+        state = self.hysteresis[name]
+        if state.rising:
+            exit = threshold * (1 - margin)
+        else:
+            exit = threshold * (1 + margin)
+        return state.update(value, threshold, exit)
+
+    def reset(self):
+        for f in self.filters.values():
+            f.reset()
+        for h in self.hysteresis.values():
+            h.reset()
+
+    def export_state(self) -> Dict[str, Any]:
+        """Filter contents and hysteresis states as JSON-serializable data"""
+        return {
+            "filters": {name: f.export_state() for name, f in self.filters.items()},
+            "hysteresis": {name: h.active for name, h in self.hysteresis.items()},
+        }
+
+    def load_state(self, state: Dict[str, Any]):
+        """Restore state saved by export_state() under the current filter configuration"""
+        self.reset()
+        for name, value in state.get("filters", {}).items():
+            if name in self.filters:
+                self.filters[name].load_state(value)
+        for name, active in state.get("hysteresis", {}).items():
+            if name in self.hysteresis:
+                self.hysteresis[name].active = bool(active)
@@ -0,0 +1,76 @@
+from collections import deque
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+class FrameRing:
+    """Preallocated frame slots in shared memory with NumPy views
+
+    The owning (API) process creates the ring, hands out free slots, writes
+    frames into them and releases a slot once its result is back. Worker
+    processes attach by name and read slots zero-copy; only the slot index
+    and frame size cross the process boundary.
+    """
+
+    CHANNELS = 3
+
+    def __init__(self, slots: int, max_width: int, max_height: int, name: Optional[str] = None):
+        self.slots = slots
+        self.max_width = max_width
+        self.max_height = max_height
+        self.slot_bytes = max_width * max_height * self.CHANNELS
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=slots * self.slot_bytes)
+            self.free = deque(range(slots))
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            # Only the owner may unlink the segment; stop this process's
+            # resource tracker from removing it when the worker exits
+            resource_tracker.unregister(self.shm._name, "shared_memory")
+            self.free = deque()
+
+    @classmethod
+    def attach(cls, spec: Dict[str, Any]) -> "FrameRing":
+        """Attach to a ring created in another process from its spec()"""
+        return cls(spec["slots"], spec["max_width"], spec["max_height"], name=spec["name"])
+
+    def spec(self) -> Dict[str, Any]:
+        return {
+            "name": self.shm.name,
+            "slots": self.slots,
+            "max_width": self.max_width,
+            "max_height": self.max_height,
+        }
+
+    def fits(self, frame: np.ndarray) -> bool:
+        h, w = frame.shape[:2]
+        return h <= self.max_height and w <= self.max_width
+
+    def acquire(self) -> Optional[int]:
+        """Take a free slot, or None if all slots are in use"""
+        return self.free.popleft() if self.free else None
+
+    def release(self, slot: int):
+        self.free.append(slot)
+
+    def view(self, slot: int, height: int, width: int) -> np.ndarray:
+        """Contiguous HxWx3 uint8 array backed by the slot's shared memory"""
+        return np.ndarray(
+            (height, width, self.CHANNELS),
+            dtype=np.uint8,
+            buffer=self.shm.buf,
+            offset=slot * self.slot_bytes,
+        )
+
+    def write(self, slot: int, frame: np.ndarray) -> Tuple[int, int]:
+        """Copy a frame into a slot and return its (height, width)"""
+        h, w = frame.shape[:2]
+        np.copyto(self.view(slot, h, w), frame)
+        return h, w
+
+    def close(self):
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
@@ -0,0 +1,91 @@
+"""
+Pre-built MediaPipe graphs handed to new driver processors.
+
+Building a FaceMesh and Hands graph takes long enough that doing it on the
+first frame of a session stalls that driver's socket. At startup the pool
+builds DMS_PREWARM_GRAPHS graph pairs in parallel threads (graph
+construction runs in native code); each new processor takes a warm pair and
+the pool refills itself in the background.
+"""
+
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.inference import INFERENCE_WORKERS
+
+# With inference workers the API process runs no graphs, so nothing is prewarmed by default
+PREWARM_GRAPHS = int(os.getenv("DMS_PREWARM_GRAPHS", "0" if INFERENCE_WORKERS > 0 else "2"))
+
+GraphPair = Tuple[Any, Any]
+
+def build_graphs() -> GraphPair:
+    """Build one FaceMesh + Hands pair with the video-mode settings processors use"""
+    from core.processor import create_face_mesh, create_hands
+    return create_face_mesh(), create_hands()
+
+class GraphPool:
+    """Warm FaceMesh/Hands pairs kept ready for new sessions"""
+
+    def __init__(self, size: int):
+        self.size = max(0, size)
+        self.graphs: List[GraphPair] = []
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.building = 0
+        self.prewarmed = self.size == 0
+        self.prewarm_s: Optional[float] = None
+        self.handed_out = 0
+        self.cold_starts = 0
+
+    async def prewarm(self):
+        """Build the pool's graphs in parallel"""
+        if self.size == 0:
+            return
+        started = time.perf_counter()
+        self.executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="graph-warmup")
+        await asyncio.gather(*[self._build() for _ in range(self.size)])
+        self.prewarm_s = round(time.perf_counter() - started, 3)
+        self.prewarmed = True
+
+    async def _build(self):
+        self.building += 1
+        try:
+            loop = asyncio.get_running_loop()
+            self.graphs.append(await loop.run_in_executor(self.executor, build_graphs))
+        finally:
+            self.building -= 1
+
+    def acquire(self) -> Optional[GraphPair]:
+        """Take a warm pair (None if the pool is empty) and refill in the background"""
+        if not self.graphs:
+            self.cold_starts += 1
+            return None
+        pair = self.graphs.pop()
+        self.handed_out += 1
+        if self.executor and len(self.graphs) + self.building < self.size:
+            asyncio.get_running_loop().create_task(self._build())
+        return pair
+
+    def close(self):
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        for face_mesh, hands in self.graphs:
+            face_mesh.close()
+            hands.close()
+        self.graphs = []
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": self.size,
+            "warm": len(self.graphs),
+            "building": self.building,
+            "prewarmed": self.prewarmed,
+            "prewarm_s": self.prewarm_s,
+            "handed_out": self.handed_out,
+            "cold_starts": self.cold_starts,
+        }
+
+graph_pool = GraphPool(PREWARM_GRAPHS)
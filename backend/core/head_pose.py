@@ -0,0 +1,93 @@
+"""
+Head pose (yaw, pitch, roll in degrees) from six face landmarks with cv2.solvePnP.
+
+The nose tip, chin, outer eye corners and mouth corners are fitted to a
+generic 3D head model (millimetres, camera axes: x right, y down, z away
+from the camera) with a pinhole camera whose focal length is the frame
+width. The absolute angles depend on where the camera is mounted; the
+processor compares them with the pose measured at calibration.
+
+Each frame starts the iterative solver from the previous frame's solution
+(useExtrinsicGuess), so it converges in a few iterations. The guess is
+dropped when the face is lost, the frame size changes or a solution lands
+behind the camera.
+
+Signs: yaw is positive when the nose turns towards the left of the image,
+pitch is positive looking up and negative with the chin down, roll is
+positive when the head tilts clockwise in the image.
+"""
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from core.landmarks import LandmarkPoint
+
+# FaceMesh indices: nose tip, chin, outer eye corners (image left, right), mouth corners (left, right)
+POSE_LANDMARKS = (1, 152, 33, 263, 61, 291)
+MODEL_POINTS = np.array([
+    (0.0, 0.0, 0.0),
+    (0.0, 330.0, 65.0),
+    (-225.0, -170.0, 135.0),
+    (225.0, -170.0, 135.0),
+    (-150.0, 150.0, 125.0),
+    (150.0, 150.0, 125.0),
+], dtype=np.float64)
+
+HeadPose = Tuple[float, float, float]
+
+class HeadPoseEstimator:
+    """Per-session solvePnP head pose with the previous solution as initial guess"""
+
+    def __init__(self):
+        self.image_points = np.zeros((len(POSE_LANDMARKS), 2), dtype=np.float64)
+        self.camera: Optional[np.ndarray] = None
+        self.size: Optional[Tuple[int, int]] = None
+        self.rvec: Optional[np.ndarray] = None
+        self.tvec: Optional[np.ndarray] = None
+
+    def reset(self):
+        """Forget the previous solution; the next frame is solved from scratch"""
+        self.rvec = None
+        self.tvec = None
+
+    def _camera(self, w: int, h: int) -> np.ndarray:
+        if self.size != (w, h):
+            self.size = (w, h)
+            self.camera = np.array([[w, 0.0, w / 2], [0.0, w, h / 2], [0.0, 0.0, 1.0]], dtype=np.float64)
+            self.reset()
+        return self.camera
+
+    def estimate(self, landmarks: List[LandmarkPoint], w: int, h: int) -> Optional[HeadPose]:
+        """(yaw, pitch, roll) in degrees, None if the pose could not be solved"""
+        import cv2
+        camera = self._camera(w, h)
+        for row, index in enumerate(POSE_LANDMARKS):
+            point = landmarks[index]
+            self.image_points[row, 0] = point.x * w
+            self.image_points[row, 1] = point.y * h
+
+        if self.rvec is None:
+            ok, rvec, tvec = cv2.solvePnP(MODEL_POINTS, self.image_points, camera, None, flags=cv2.SOLVEPNP_ITERATIVE)
+        else:
+            ok, rvec, tvec = cv2.solvePnP(
+                MODEL_POINTS, self.image_points, camera, None, self.rvec, self.tvec,
+                useExtrinsicGuess=True, flags=cv2.SOLVEPNP_ITERATIVE
+            )
+        if not ok or tvec[2, 0] <= 0:
+            self.reset()
+            return None
+        self.rvec, self.tvec = rvec, tvec
+
+        rotation, _ = cv2.Rodrigues(rvec)
+        pitch, yaw, roll = cv2.RQDecomp3x3(rotation)[0]
+        # A positive rotation about x (y down, z away) tips the chin down; report it as negative pitch
+        return yaw, -pitch, roll
+
+def severity_level(deviation: float, threshold: float) -> int:
+    """1 (mild), 2 (moderate) or 3 (severe) for a deviation past its threshold"""
+    if deviation < threshold * 1.5:
+        return 1
+    if deviation < threshold * 2.5:
+        return 2
+    return 3
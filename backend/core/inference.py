@@ -0,0 +1,257 @@
+"""
+Central inference scheduler for many concurrent driver sessions.
+
+Frames from all /ws sessions are queued here, grouped into micro-batches
+(up to INFERENCE_MAX_BATCH frames, waiting at most INFERENCE_MAX_WAIT_MS for
+a batch to fill) and dispatched to a fixed pool of worker processes. Each
+worker owns one FaceMesh and one Hands graph and returns plain landmarks;
+the per-session rule engine (DriverMonitorProcessor.process_landmarks)
+still runs in the API process, so detection state never leaves its session.
+
+Pooled graphs serve frames from many sessions in turn, so they run in static
+image mode: video-mode tracking would carry one driver's face region over
+into another driver's frame.
+
+Frames reach the workers through a shared-memory ring (core.frame_ring): the
+API process converts each decoded frame straight into a free slot and only
+the slot index and frame size are pickled; the worker reads the slot in
+place. Frames larger than a slot, or arriving while every slot is in use,
+fall back to being pickled with the batch.
+
+If a worker dies (BrokenProcessPool), the pool is rebuilt and the batch
+is run once more on the new pool.
+"""
+
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.frame_ring import FrameRing
+from core.landmarks import LandmarkPoint
+
+# Number of inference worker processes; 0 keeps inference inline per processor
+INFERENCE_WORKERS = int(os.getenv("DMS_INFERENCE_WORKERS", "0"))
+INFERENCE_MAX_BATCH = int(os.getenv("DMS_INFERENCE_MAX_BATCH", "8"))
+INFERENCE_MAX_WAIT_MS = float(os.getenv("DMS_INFERENCE_MAX_WAIT_MS", "5"))
+# Shared-memory frame slots; 0 pickles every frame to the workers
+FRAME_RING_SLOTS = int(os.getenv("DMS_FRAME_RING_SLOTS", str(max(1, INFERENCE_WORKERS) * INFERENCE_MAX_BATCH * 2)))
+FRAME_RING_MAX_WIDTH = int(os.getenv("DMS_FRAME_RING_MAX_WIDTH", "1920"))
+FRAME_RING_MAX_HEIGHT = int(os.getenv("DMS_FRAME_RING_MAX_HEIGHT", "1080"))
+
+# Every detected face and hand; the driver's face is picked by the session's processor
+Landmarks = Tuple[List[List[LandmarkPoint]], List[List[LandmarkPoint]]]
+
+# Graphs and attached frame ring owned by the current worker process
+_worker_graphs = None
+_worker_ring: Optional[FrameRing] = None
+
+def _init_worker(ring_spec: Optional[Dict[str, Any]] = None):
+    """Build this worker's FaceMesh and Hands graphs once and attach the frame ring"""
+    global _worker_graphs, _worker_ring
+    from core.processor import create_face_mesh, create_hands
+    _worker_graphs = (create_face_mesh(static_image_mode=True), create_hands(static_image_mode=True))
+    if ring_spec:
+        _worker_ring = FrameRing.attach(ring_spec)
+
+def _warmup(delay: float) -> int:
+    """Keep a worker busy briefly so every worker in the pool gets started"""
+    time.sleep(delay)
+    return os.getpid()
+
+def _process_batch(frames: List[Any]) -> List[Landmarks]:
+    """Run the worker's graphs over a batch of frames
+
+    Each item is either an RGB array or a (slot, height, width) reference
+    into the shared frame ring.
+    """
+    from core.processor import run_graphs
+    face_mesh, hands = _worker_graphs
+    results = []
+    for frame in frames:
+        rgb = _worker_ring.view(*frame) if isinstance(frame, tuple) else frame
+        results.append(run_graphs(face_mesh, hands, rgb))
+    return results
+
+class _Job:
+    __slots__ = ("frame", "slot", "future", "queued_at")
+
+    def __init__(self, frame: Any, slot: Optional[int], future: asyncio.Future):
+        self.frame = frame
+        self.slot = slot
+        self.future = future
+        self.queued_at = time.perf_counter()
+
+class InferenceScheduler:
+    """Collects frames into micro-batches and runs them on a worker pool"""
+
+    def __init__(self, workers: int, max_batch: int = 8, max_wait_ms: float = 5.0,
+                 ring_slots: int = 0, ring_max_width: int = 1920, ring_max_height: int = 1080):
+        self.workers = workers
+        self.max_batch = max(1, max_batch)
+        self.max_wait_s = max_wait_ms / 1000.0
+        self.ring_slots = ring_slots
+        self.ring_max_width = ring_max_width
+        self.ring_max_height = ring_max_height
+        self.ring: Optional[FrameRing] = None
+        self.pool: Optional[ProcessPoolExecutor] = None
+        self.queue: Optional[asyncio.Queue] = None
+        self.slots: Optional[asyncio.Semaphore] = None
+        self.dispatcher: Optional[asyncio.Task] = None
+        self.batch_tasks = set()
+        self.ready_workers = 0
+        self.batches = 0
+        self.frames = 0
+        self.queue_wait_s = 0.0
+        self.shared_frames = 0
+        # Frames submitted but not yet handed to a worker, and worker-seconds spent on batches
+        self.waiting = 0
+        self.busy_s = 0.0
+        self.pool_restarts = 0
+
+    @property
+    def running(self) -> bool:
+        return self.dispatcher is not None and not self.dispatcher.done()
+
+    async def start(self):
+        """Start the worker processes, wait until each has built its graphs"""
+        loop = asyncio.get_running_loop()
+        if self.ring_slots > 0:
+            self.ring = FrameRing(self.ring_slots, self.ring_max_width, self.ring_max_height)
+        self.pool = self._create_pool()
+        pids = await asyncio.gather(*[
+            loop.run_in_executor(self.pool, _warmup, 0.5) for _ in range(self.workers)
+        ])
+        self.ready_workers = len(set(pids))
+        self.queue = asyncio.Queue()
+        # One batch in flight per worker; further frames wait and join the next batch
+        self.slots = asyncio.Semaphore(self.workers)
+        self.dispatcher = asyncio.create_task(self._dispatch_loop())
+
+    def _create_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.ring.spec() if self.ring else None,),
+        )
+
+    def _restart_pool(self, broken: ProcessPoolExecutor):
+        """Replace a pool whose worker died; batches that hit the same pool share one replacement"""
+        if self.pool is not broken:
+            return
+        broken.shutdown(wait=False, cancel_futures=True)
+        self.pool = self._create_pool()
+        self.pool_restarts += 1
+
+    async def stop(self):
+        if self.dispatcher:
+            self.dispatcher.cancel()
+            self.dispatcher = None
+        if self.pool:
+            # Wait for the workers so none still reads the ring when it is unlinked
+            await asyncio.get_running_loop().run_in_executor(
+                None, lambda pool=self.pool: pool.shutdown(wait=True, cancel_futures=True)
+            )
+            self.pool = None
+        if self.ring:
+            self.ring.close()
+            self.ring = None
+        self.ready_workers = 0
+
+    async def submit(self, frame: np.ndarray) -> Landmarks:
+        """Queue a decoded BGR frame and wait for its landmarks"""
+        import cv2
+        slot = self.ring.acquire() if self.ring and self.ring.fits(frame) else None
+        if slot is not None:
+            # Convert straight into shared memory; only the slot reference is pickled
+            h, w = frame.shape[:2]
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self.ring.view(slot, h, w))
+            payload = (slot, h, w)
+        else:
+            payload = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        future = asyncio.get_running_loop().create_future()
+        self.waiting += 1
+        await self.queue.put(_Job(payload, slot, future))
+        return await future
+
+    async def _dispatch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait_s
+            while len(batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            await self.slots.acquire()
+            # Frames that arrived while waiting for a free worker join this batch
+            while len(batch) < self.max_batch and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            task = asyncio.create_task(self._run_batch(batch))
+            self.batch_tasks.add(task)
+            task.add_done_callback(self.batch_tasks.discard)
+
+    async def _run_batch(self, batch: List[_Job]):
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        self.waiting -= len(batch)
+        frames = [job.frame for job in batch]
+        try:
+            pool = self.pool
+            try:
+                results = await loop.run_in_executor(pool, _process_batch, frames)
+            except BrokenProcessPool:
+                self._restart_pool(pool)
+                results = await loop.run_in_executor(self.pool, _process_batch, frames)
+            for job, landmarks in zip(batch, results):
+                if not job.future.done():
+                    job.future.set_result(landmarks)
+        except Exception as e:
+            for job in batch:
+                if not job.future.done():
+                    job.future.set_exception(e)
+        finally:
+            self.slots.release()
+            for job in batch:
+                if job.slot is not None:
+                    self.ring.release(job.slot)
+                    self.shared_frames += 1
+            self.batches += 1
+            self.frames += len(batch)
+            self.busy_s += time.perf_counter() - started
+            self.queue_wait_s += sum(started - job.queued_at for job in batch)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "ready_workers": self.ready_workers,
+            "queued": self.queue.qsize() if self.queue else 0,
+            "waiting": self.waiting,
+            "pool_restarts": self.pool_restarts,
+            "batches": self.batches,
+            "frames": self.frames,
+            "avg_batch_size": round(self.frames / self.batches, 2) if self.batches else 0.0,
+            "avg_queue_wait_ms": round(self.queue_wait_s / self.frames * 1000.0, 2) if self.frames else 0.0,
+            "ring_slots": self.ring_slots,
+            "ring_free": len(self.ring.free) if self.ring else 0,
+            "shared_frames": self.shared_frames,
+        }
+
+scheduler: Optional[InferenceScheduler] = (
+    InferenceScheduler(
+        INFERENCE_WORKERS, INFERENCE_MAX_BATCH, INFERENCE_MAX_WAIT_MS,
+        FRAME_RING_SLOTS, FRAME_RING_MAX_WIDTH, FRAME_RING_MAX_HEIGHT
+    )
+    if INFERENCE_WORKERS > 0 else None
+)
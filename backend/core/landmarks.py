@@ -0,0 +1,19 @@
+from typing import List, NamedTuple, Sequence
+
+class LandmarkPoint(NamedTuple):
+    """Normalized landmark, detached from the MediaPipe protobuf types"""
+    x: float
+    y: float
+    z: float = 0.0
+    visibility: float = 0.0
+
+def from_mediapipe(landmarks) -> List[LandmarkPoint]:
+    """Convert a MediaPipe landmark sequence into plain LandmarkPoint tuples"""
+    return [
+        LandmarkPoint(lm.x, lm.y, lm.z, getattr(lm, "visibility", 0.0))
+        for lm in landmarks
+    ]
+
+def from_lists(points: Sequence[Sequence[float]]) -> List[LandmarkPoint]:
+    """Build landmarks from [x, y, z, visibility] lists (z and visibility optional)"""
+    return [LandmarkPoint(*p) for p in points]
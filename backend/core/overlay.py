@@ -0,0 +1,139 @@
+"""
+Server-rendered overlay preview for thin clients.
+
+Draws face/hand landmarks and the active alert text onto a downscaled copy
+of the processed frame and encodes it as JPEG or WebP, at most `fps` times a
+second. The canvas and resize buffers are reused between frames, and the
+alert text band is rendered once per distinct set of alerts and then only
+copied in (it changes far less often than the landmarks).
+"""
+
+import base64
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from models.detection import DetectionResult
+
+# BGR colours matching the alert colours used by the frontend
+ALERT_COLORS = {
+    "white": (255, 255, 255),
+    "yellow": (0, 255, 255),
+    "red": (0, 0, 255),
+}
+FACE_COLOR = (0, 255, 0)
+HAND_COLOR = (255, 128, 0)
+FORMATS = ("jpeg", "webp")
+
+class OverlayRenderer:
+    """Per-connection overlay renderer and encoder"""
+
+    LINE_HEIGHT = 22
+    MAX_LINES = 4
+
+    def __init__(self, fps: float = 5.0, fmt: str = "jpeg", quality: int = 70, width: int = 640):
+        self.canvas: Optional[np.ndarray] = None
+        self.band_key: Optional[Tuple] = None
+        self.band: Optional[np.ndarray] = None
+        self.last_sent = 0.0
+        self.frames = 0
+        self.configure(fps, fmt, quality, width)
+
+    def configure(self, fps: float, fmt: str, quality: int, width: int):
+        import cv2
+        self.fps = min(max(fps, 0.5), 30.0)
+        self.format = fmt if fmt in FORMATS else "jpeg"
+        self.quality = min(max(int(quality), 10), 100)
+        self.width = min(max(int(width), 160), 1920)
+        if self.format == "webp":
+            self.extension, self.mime = ".webp", "image/webp"
+            self.params = [cv2.IMWRITE_WEBP_QUALITY, self.quality]
+        else:
+            self.extension, self.mime = ".jpg", "image/jpeg"
+            self.params = [cv2.IMWRITE_JPEG_QUALITY, self.quality]
+
+    def options(self) -> Dict[str, Any]:
+        return {"fps": self.fps, "format": self.format, "quality": self.quality, "width": self.width}
+
+    def due(self, now: Optional[float] = None) -> bool:
+        """True if enough time has passed since the last overlay frame"""
+        now = time.monotonic() if now is None else now
+        if now - self.last_sent < 1.0 / self.fps:
+            return False
+        self.last_sent = now
+        return True
+
+    def _canvas(self, frame: np.ndarray) -> np.ndarray:
+        """Resize the frame into the reused canvas buffer"""
+        import cv2
+        h, w = frame.shape[:2]
+        out_w = min(self.width, w)
+        out_h = int(round(h * out_w / w))
+        if self.canvas is None or self.canvas.shape[:2] != (out_h, out_w):
+            self.canvas = np.empty((out_h, out_w, 3), dtype=np.uint8)
+            self.band_key = None
+        if (out_h, out_w) == (h, w):
+            np.copyto(self.canvas, frame)
+        else:
+            cv2.resize(frame, (out_w, out_h), dst=self.canvas, interpolation=cv2.INTER_AREA)
+        return self.canvas
+
+    @staticmethod
+    def _draw_points(canvas: np.ndarray, points: List[Dict[str, float]], color: Tuple[int, int, int]):
+        """Draw 2x2 dots for normalized points with one vectorized write per offset"""
+        if not points:
+            return
+        h, w = canvas.shape[:2]
+        xy = np.array([(p["x"], p["y"]) for p in points], dtype=np.float32)
+        xs = np.clip((xy[:, 0] * w).astype(np.int32), 0, w - 2)
+        ys = np.clip((xy[:, 1] * h).astype(np.int32), 0, h - 2)
+        for dy in (0, 1):
+            for dx in (0, 1):
+                canvas[ys + dy, xs + dx] = color
+
+    def _alert_band(self, alerts, width: int) -> Optional[np.ndarray]:
+        """Rendered alert text band, re-rendered only when the alerts change"""
+        import cv2
+        lines = tuple((a.message, a.color) for a in alerts[:self.MAX_LINES])
+        key = (lines, width)
+        if key == self.band_key:
+            return self.band
+        self.band_key = key
+        if not lines:
+            self.band = None
+            return None
+        band = np.zeros((self.LINE_HEIGHT * len(lines) + 6, width, 3), dtype=np.uint8)
+        for i, (message, color) in enumerate(lines):
+            cv2.putText(
+                band, message, (8, self.LINE_HEIGHT * (i + 1)),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.55, ALERT_COLORS.get(color, ALERT_COLORS["red"]),
+                1, cv2.LINE_AA
+            )
+        self.band = band
+        return band
+
+    def render(self, frame: np.ndarray, result: DetectionResult) -> Dict[str, Any]:
+        """Draw the overlay for a processed BGR frame and return an overlay_frame message"""
+        import cv2
+        canvas = self._canvas(frame)
+        self._draw_points(canvas, result.face_landmarks, FACE_COLOR)
+        for hand in result.hand_landmarks:
+            self._draw_points(canvas, hand, HAND_COLOR)
+
+        band = self._alert_band(result.alerts, canvas.shape[1])
+        if band is not None:
+            rows = min(band.shape[0], canvas.shape[0])
+            np.copyto(canvas[:rows], band[:rows])
+
+        ok, encoded = cv2.imencode(self.extension, canvas, self.params)
+        if not ok:
+            raise ValueError(f"Could not encode overlay as {self.format}")
+        self.frames += 1
+        return {
+            "type": "overlay_frame",
+            "format": self.format,
+            "width": canvas.shape[1],
+            "height": canvas.shape[0],
+            "data": f"data:{self.mime};base64,{base64.b64encode(encoded).decode('ascii')}"
+        }
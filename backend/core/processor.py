@@ -1,6 +1,5 @@
-import cv2
-import mediapipe as mp
 import numpy as np
+import os
 import time
 from collections import deque, defaultdict
 from datetime import datetime
@@ -11,26 +10,66 @@ from utils.timezone import format_ist_timestamp
 
 from models.detection import DetectionResult, Alert, CalibrationData
 from core.config import Settings
+from core.landmarks import LandmarkPoint, from_mediapipe
+from core.filters import SignalFilterBank
+from core.fatigue import FatigueMetrics
+from core.roi_gate import RoiGate
+from core.decode import FrameDecoder, inference_width
+from core.face_tracker import FaceTracker
+from core.head_pose import HeadPoseEstimator, severity_level
+
+SEVERITIES = ("mild", "moderate", "severe")
+
+# Landmarks are not reused while the EAR is below this multiple of ear_threshold (eyes closing or closed)
+ROI_EAR_GUARD = 1.5
+
+# Faces FaceMesh returns per frame; above 1, passengers are tracked and only the driver is analysed
+MAX_NUM_FACES = int(os.getenv("DMS_MAX_NUM_FACES", "1"))
+
+Landmarks = Tuple[Optional[List[LandmarkPoint]], List[List[LandmarkPoint]]]
+
+def create_face_mesh(static_image_mode: bool = False):
+    """Build a MediaPipe FaceMesh graph with the detection settings used here"""
+    import mediapipe as mp
+    return mp.solutions.face_mesh.FaceMesh(
+        static_image_mode=static_image_mode,
+        max_num_faces=MAX_NUM_FACES,
+        refine_landmarks=True,
+        min_detection_confidence=0.5,
+        min_tracking_confidence=0.5
+    )
+
+def create_hands(static_image_mode: bool = False):
+    """Build a MediaPipe Hands graph with the detection settings used here"""
+    import mediapipe as mp
+    return mp.solutions.hands.Hands(
+        static_image_mode=static_image_mode,
+        max_num_hands=2,
+        min_detection_confidence=0.6,
+        min_tracking_confidence=0.5
+    )
+
+def run_graphs(face_mesh, hands, rgb: np.ndarray) -> Tuple[List[List[LandmarkPoint]], List[List[LandmarkPoint]]]:
+    """Run FaceMesh and Hands on an RGB frame and return plain landmarks of every face and hand"""
+    face_result = face_mesh.process(rgb)
+    hand_result = hands.process(rgb)
+    
+    faces = [
+        from_mediapipe(face.landmark) for face in (face_result.multi_face_landmarks or [])
+    ]
+    hand_landmarks = [
+        from_mediapipe(hand.landmark) for hand in (hand_result.multi_hand_landmarks or [])
+    ]
+    return faces, hand_landmarks
 
 class DriverMonitorProcessor:
-    def __init__(self):
+    def __init__(self, face_mesh=None, hands=None):
         self.settings = Settings()
         
-        # MediaPipe setup
-        self.mp_face_mesh = mp.solutions.face_mesh
-        self.mp_hands = mp.solutions.hands
-        self.face_mesh = self.mp_face_mesh.FaceMesh(
-            static_image_mode=False,
-            max_num_faces=1,
-            refine_landmarks=True,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
-        self.hands = self.mp_hands.Hands(
-            max_num_hands=2,
-            min_detection_confidence=0.6,
-            min_tracking_confidence=0.5
-        )
+        # MediaPipe graphs are built on first use unless pre-built ones
+        # (or replay objects with the same interface) are passed in
+        self._face_mesh = face_mesh
+        self._hands = hands
         
         # Landmark indices
         self.LEFT_EYE = [33, 160, 158, 133, 153, 144]
@@ -42,40 +81,200 @@ class DriverMonitorProcessor:
         self.LEFT_EAR_TIP = 234
         self.RIGHT_EAR_TIP = 454
         
+        # Frame timebase (monotonic seconds, from the client when it sends timestamps)
+        self.frame_time: Optional[float] = None
+        self.time_offset = 0.0
+        
         # State variables
         self.eye_closure_counter = 0
         self.blink_counter = 0
-        self.blink_timer = time.time()
+        self.blink_timer: Optional[float] = None
         self.yawn_counter = 0
-        self.mar_deque = deque(maxlen=30)
-        self.active_alerts: Dict[str, float] = {}
+        self.yawn_open_time = 0.0
+        self.eye_closed_since: Optional[float] = None
+        self.mouth_open = False
+        # Smoothed EAR of the last frame with a face
+        self.last_ear: Optional[float] = None
+        # Active alerts by message: (last raised frame time, display timestamp),
+        # and raises in time order so expiry only looks at the oldest ones
+        self.active_alerts: Dict[str, Tuple[float, str]] = {}
+        self.alert_expiry: deque = deque()
+        self.lingering_alerts: Dict[str, Alert] = {}
+        
+        # Rolling-window fatigue metrics (PERCLOS, blink rate/duration, yawns)
+        self.fatigue = FatigueMetrics(self.settings.fatigue_windows, self.settings.max_frame_gap_s)
+        
+        # Reuses landmarks on frames where the face region has not changed
+        self.roi_gate = RoiGate()
+        
+        # Decodes incoming frames at the inference size and keeps the RGB buffer
+        self.decoder = FrameDecoder(inference_width(self.settings))
+        # Width of the client's first, unthrottled frame; pixel thresholds are set for it
+        self.reference_width: Optional[int] = None
+        
+        # Keeps the driver's face identity when several faces are detected
+        self.face_tracker = FaceTracker()
+        
+        # solvePnP head pose, seeded with the previous frame's solution
+        self.head_pose = HeadPoseEstimator()
+        
+        # Signal smoothing and hysteresis between landmark extraction and rules
+        self.filters = SignalFilterBank(
+            self.settings.signal_filter,
+            self.settings.ema_alpha,
+            self.settings.median_window
+        )
         
         # Calibration
         self.calibration_mode = True
         self.gaze_center = 0.5
         self.head_center_x = 0.5
         self.head_center_y = 0.5
+        self.head_yaw_center = 0.0
+        self.head_pitch_center = 0.0
+        self.head_roll_center = 0.0
+        # Calibrated before pose estimation: head alerts use the nose-offset rules until recalibrated
+        self.legacy_calibration = False
+        
+    @property
+    def face_mesh(self):
+        """FaceMesh graph, built on first use"""
+        if self._face_mesh is None:
+            self._face_mesh = create_face_mesh()
+        return self._face_mesh
+    
+    @property
+    def hands(self):
+        """Hands graph, built on first use"""
+        if self._hands is None:
+            self._hands = create_hands()
+        return self._hands
         
     def update_settings(self, settings: Settings):
         """Update processor settings"""
         self.settings = settings
+        self.decoder.target_width = inference_width(settings)
+        if self.filters.needs_rebuild(settings.signal_filter, settings.ema_alpha, settings.median_window):
+            self.filters.configure(settings.signal_filter, settings.ema_alpha, settings.median_window)
+        if sorted(settings.fatigue_windows) != self.fatigue.window_sizes:
+            self.fatigue.configure(settings.fatigue_windows)
+        self.fatigue.max_frame_gap_s = settings.max_frame_gap_s
         
     def calibrate(self, calibration: CalibrationData):
         """Calibrate the system with user's normal position"""
         self.gaze_center = calibration.gaze_center
         self.head_center_x = calibration.head_center_x
         self.head_center_y = calibration.head_center_y
+        self.legacy_calibration = calibration.head_yaw is None or calibration.head_pitch is None
+        self.head_yaw_center = calibration.head_yaw or 0.0
+        self.head_pitch_center = calibration.head_pitch or 0.0
+        self.head_roll_center = calibration.head_roll or 0.0
         self.calibration_mode = False
     
     def reset_state(self):
         """Reset all monitoring state variables"""
         self.eye_closure_counter = 0
         self.blink_counter = 0
-        self.blink_timer = time.time()
+        self.blink_timer = None
         self.yawn_counter = 0
-        self.mar_deque = deque(maxlen=30)
+        self.yawn_open_time = 0.0
+        self.eye_closed_since = None
+        self.mouth_open = False
+        self.last_ear = None
         self.active_alerts = {}
+        self.alert_expiry = deque()
+        self.lingering_alerts = {}
+        self.filters.reset()
+        self.fatigue.reset()
+        self.roi_gate.reset()
+        self.face_tracker.reset()
+        self.head_pose.reset()
+
+    def export_state(self) -> Dict[str, Any]:
+        """Detection state as JSON-serializable data
+
+        Settings and calibration are not included: the config repository
+        owns them, and a checkpoint must not overwrite a change made since.
+        """
+        return {
+            "calibration_mode": self.calibration_mode,
+            "clock": {
+                "frame_time": self.frame_time,
+                "time_offset": self.time_offset
+            },
+            "counters": {
+                "eye_closure_counter": self.eye_closure_counter,
+                "blink_counter": self.blink_counter,
+                "blink_timer": self.blink_timer,
+                "yawn_counter": self.yawn_counter,
+                "yawn_open_time": self.yawn_open_time,
+                "eye_closed_since": self.eye_closed_since,
+                "mouth_open": self.mouth_open
+            },
+            "active_alerts": {message: list(active) for message, active in self.active_alerts.items()},
+            "filters": self.filters.export_state(),
+            "fatigue": self.fatigue.export_state()
+        }
+
+    def load_state(self, state: Dict[str, Any]):
+        """Restore state saved by export_state(), e.g. on another API node
+
+        Apply the user's settings and calibration first; settings and
+        calibration in checkpoints written by older versions are ignored.
+        """
+        self.calibration_mode = state.get("calibration_mode", state.get("calibration", {}).get("calibration_mode", False))
+        clock = state.get("clock", {})
+        self.frame_time = clock.get("frame_time")
+        self.time_offset = clock.get("time_offset", 0.0)
+        for key, value in state.get("counters", {}).items():
+            setattr(self, key, value)
+        self.active_alerts = {}
+        for message, active in state.get("active_alerts", {}).items():
+            if isinstance(active, (int, float)):
+                # Saved before alerts were keyed by message: "HH:MM:SS message" -> raised time
+                ts, _, message = message.partition(" ")
+                active = (active, ts)
+            raised, ts = active
+            if message not in self.active_alerts or raised >= self.active_alerts[message][0]:
+                self.active_alerts[message] = (raised, ts)
+        self.alert_expiry = deque(sorted((raised, message) for message, (raised, _) in self.active_alerts.items()))
+        self.lingering_alerts = {}
+        self.filters.load_state(state.get("filters", {}))
+        self.fatigue.load_state(state.get("fatigue", {}))
+
+    def legacy_head_alerts(self, head_x: float, head_y: float, result: DetectionResult, margin: float) -> Tuple[int, int, int]:
+        """Head turn/tilt/droop from the nose-tip offset, for calibrations without a pose baseline
+
+        Returns the (turn, tilt, droop) severity levels, 0 when not raised.
+        """
+        head_turn = head_tilt = head_droop = 0
+        head_x_offset = abs(head_x - self.head_center_x)
+        head_y_offset = abs(head_y - self.head_center_y)
+        threshold = self.settings.head_turn_threshold
         
+        if self.filters.crossed("head_x", head_x_offset, threshold, margin):
+            head_turn = 1 if head_x_offset < 0.1 else 2 if head_x_offset < 0.2 else 3
+            alert = self.add_alert(
+                ("Mild Head Turn", "Moderate Head Turn", "Severe Head Turn")[head_turn - 1],
+                SEVERITIES[head_turn - 1]
+            )
+            result.alerts.append(alert)
+            result.states["head_turn"] = True
+        
+        if self.filters.crossed("head_y", head_y_offset, threshold, margin):
+            if head_y < self.head_center_y:
+                head_tilt = 1 if head_y_offset < 0.08 else 2 if head_y_offset < 0.15 else 3
+                message = ("Mild Looking Upward", "Moderate Looking Upward", "Severe Looking Upward")[head_tilt - 1]
+                level = head_tilt
+                result.states["head_tilt_up"] = True
+            else:
+                head_droop = 1 if head_y_offset < 0.07 else 2 if head_y_offset < 0.12 else 3
+                message = ("Head drooping symptom", "Head drooping started", "Head drooped")[head_droop - 1]
+                level = head_droop
+                result.states["head_droop"] = True
+            result.alerts.append(self.add_alert(message, SEVERITIES[level - 1]))
+        return head_turn, head_tilt, head_droop
+    
     def get_aspect_ratio(self, landmarks, eye_indices: List[int], w: int, h: int) -> float:
         """Calculate Eye Aspect Ratio (EAR)"""
         def pt(i): 
@@ -104,17 +303,29 @@ class DriverMonitorProcessor:
         points = np.array([[landmarks[i].x * w, landmarks[i].y * h] for i in indices])
         return np.mean(points, axis=0)
     
+    def pixel_scale(self, w: int) -> float:
+        """Factor from pixel thresholds, set for the client's own capture width, to a `w`-wide frame
+        
+        Frames get smaller than the client captures when the rate controller
+        steps it down or the decoder reduces them, and a fixed pixel distance
+        would then cover a larger part of the face. Without a reference width
+        (frames not received over /ws) thresholds apply as they are.
+        """
+        return w / self.reference_width if self.reference_width else 1.0
+    
     def hand_near_ear(self, landmarks, hand_landmarks, w: int, h: int) -> bool:
         """Check if hand is near ear (phone call detection)"""
+        scale = self.pixel_scale(w)
+        max_dx, max_dy = 40 * scale, 90 * scale
         ear_l = np.array([landmarks[self.LEFT_EAR_TIP].x * w, landmarks[self.LEFT_EAR_TIP].y * h])
         ear_r = np.array([landmarks[self.RIGHT_EAR_TIP].x * w, landmarks[self.RIGHT_EAR_TIP].y * h])
         
-        for lm in hand_landmarks.landmark:
+        for lm in hand_landmarks:
             hx, hy = lm.x * w, lm.y * h
             dx_l, dy_l = abs(hx - ear_l[0]), abs(hy - ear_l[1])
             dx_r, dy_r = abs(hx - ear_r[0]), abs(hy - ear_r[1])
             
-            if (dx_l < 40 and dy_l < 90) or (dx_r < 40 and dy_r < 90):
+            if (dx_l < max_dx and dy_l < max_dy) or (dx_r < max_dx and dy_r < max_dy):
                 return True
         return False
     
@@ -122,18 +333,20 @@ class DriverMonitorProcessor:
         """Check if hand is near face"""
         fcx, fcy = face_center
         ih, iw = shape[:2]
+        max_distance = self.settings.hand_near_face_px * self.pixel_scale(iw)
         
-        for lm in hand_landmarks.landmark:
+        for lm in hand_landmarks:
             x, y = int(lm.x * iw), int(lm.y * ih)
-            if np.hypot(fcx - x, fcy - y) < self.settings.hand_near_face_px:
+            if np.hypot(fcx - x, fcy - y) < max_distance:
                 return True
         return False
     
     def add_alert(self, message: str, severity: str = "warning") -> Alert:
         """Add an alert with timestamp"""
         ts = format_ist_timestamp()
-        key = f"{ts} {message}"
-        self.active_alerts[key] = time.time()
+        raised = self.frame_time if self.frame_time is not None else time.monotonic()
+        self.active_alerts[message] = (raised, ts)
+        self.alert_expiry.append((raised, message))
         
         # Determine color based on message content
         if "Mild" in message or "Warning" in message:
@@ -152,16 +365,100 @@ class DriverMonitorProcessor:
             color=color
         )
     
-    def process_frame(self, frame: np.ndarray) -> DetectionResult:
-        """Process a single frame and return detection results"""
+    def lingering_alert(self, message: str, ts: str) -> Alert:
+        """Alert shown for an active alert that was not raised on the current frame"""
+        if "Mild" in message or "Warning" in message:
+            severity, color = "mild", "white"
+        elif "Moderate" in message or "Alert" in message:
+            severity, color = "moderate", "yellow"
+        elif "Severe" in message:
+            severity, color = "severe", "red"
+        else:
+            severity, color = "warning", "red"
+        return Alert(message=message, severity=severity, timestamp=ts, color=color)
+    
+    def detect_landmarks(self, rgb: np.ndarray) -> Tuple[List[List[LandmarkPoint]], List[List[LandmarkPoint]]]:
+        """Run the MediaPipe graphs on an RGB frame and return plain landmarks of every face and hand"""
+        return run_graphs(self.face_mesh, self.hands, rgb)
+    
+    def driver_landmarks(self, faces: List[List[LandmarkPoint]], hands: List[List[LandmarkPoint]], t: float) -> Landmarks:
+        """The driver's face among the detected ones (None if not in view), with the hands"""
+        if MAX_NUM_FACES == 1:
+            return (faces[0] if faces else None), hands
+        anchor = None if self.calibration_mode else (self.head_center_x, self.head_center_y)
+        return self.face_tracker.select(faces, t, anchor), hands
+    
+    def process_frame(self, frame: np.ndarray, timestamp: Optional[float] = None) -> DetectionResult:
+        """Process a single frame and return detection results
+        
+        timestamp is the frame's capture time in monotonic seconds; when omitted
+        the server's monotonic clock at processing time is used.
+        """
         h, w = frame.shape[:2]
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        t = timestamp if timestamp is not None else time.monotonic()
+        landmarks = self.reuse_landmarks(frame, t)
+        if landmarks is None:
+            started = time.perf_counter()
+            # Process with MediaPipe
+            faces, hands = self.detect_landmarks(self.decoder.to_rgb(frame))
+            landmarks = self.driver_landmarks(faces, hands, t)
+            self.remember_landmarks(frame, landmarks, t, time.perf_counter() - started)
+        face_landmarks, hand_landmarks = landmarks
+        return self.process_landmarks(face_landmarks, hand_landmarks, w, h, t)
+    
+    def reuse_landmarks(self, frame: np.ndarray, t: float) -> Optional[Landmarks]:
+        """Landmarks of the last inference if the face region is still, else None (run inference)
         
-        # Process with MediaPipe
-        face_result = self.face_mesh.process(rgb)
-        hand_result = self.hands.process(rgb)
+        Eyelids barely move the face thumbnail, so landmarks are never reused
+        while the eyes are closed or closing, and reuse lasts less than
+        `blink_min_s`, so a blink that starts while the eyes are open still
+        reaches an inferred frame.
+        """
+        if not self.settings.roi_skip:
+            return None
+        if self.eye_closed_since is not None or (
+            self.last_ear is not None and self.last_ear < self.settings.ear_threshold * ROI_EAR_GUARD
+        ):
+            return None
+        max_skip_s = min(self.settings.roi_max_skip_s, self.settings.blink_min_s)
+        return self.roi_gate.reuse(frame, t, self.settings.roi_motion_threshold, max_skip_s)
+    
+    def remember_landmarks(self, frame: np.ndarray, landmarks: Landmarks, t: float, inference_s: float):
+        """Record the landmarks inference returned for a frame, for reuse on the following still frames"""
+        if self.settings.roi_skip:
+            self.roi_gate.store(frame, landmarks, t, inference_s)
+    
+    def advance_clock(self, timestamp: Optional[float] = None) -> Tuple[float, float]:
+        """Move the frame clock forward and return (frame time, seconds since previous frame)
         
-        current_time = time.time()
+        If the timebase restarts (e.g. the client reloaded and its clock began
+        again at zero) the clock continues from the last frame instead of
+        jumping backwards. The returned interval is capped so that a stalled
+        stream does not count as one long observation.
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+        t = timestamp + self.time_offset
+        previous = self.frame_time
+        if previous is not None and t < previous:
+            self.time_offset += previous - t
+            t = previous
+        self.frame_time = t
+        dt = min(t - previous, self.settings.max_frame_gap_s) if previous is not None else 0.0
+        return t, dt
+    
+    def process_landmarks(
+        self,
+        face_landmarks: Optional[List[LandmarkPoint]],
+        hand_landmarks: List[List[LandmarkPoint]],
+        w: int,
+        h: int,
+        timestamp: Optional[float] = None
+    ) -> DetectionResult:
+        """Run the detection rules on extracted landmarks for a w x h frame"""
+        current_time, frame_dt = self.advance_clock(timestamp)
+        if self.blink_timer is None:
+            self.blink_timer = current_time
         
         # Initialize result
         result = DetectionResult()
@@ -174,16 +471,20 @@ class DriverMonitorProcessor:
         head_tilt = 0
         head_droop = 0
         yawn = False
+        eyes_closed_now = False
+        blink_duration = None
+        yawn_started = False
         
-        if face_result.multi_face_landmarks:
-            landmarks = face_result.multi_face_landmarks[0].landmark
+        if face_landmarks:
+            landmarks = face_landmarks
             face_center = (int(landmarks[self.NOSE_TIP].x * w), int(landmarks[self.NOSE_TIP].y * h))
             
             # Eye closure detection
             left_ear = self.get_aspect_ratio(landmarks, self.LEFT_EYE, w, h)
             right_ear = self.get_aspect_ratio(landmarks, self.RIGHT_EYE, w, h)
-            avg_ear = (left_ear + right_ear) / 2
+            avg_ear = self.filters.smooth("avg_ear", (left_ear + right_ear) / 2)
             result.metrics["avg_ear"] = avg_ear
+            self.last_ear = avg_ear
             
             # Iris visibility check
             visible_iris_points = [
@@ -199,26 +500,35 @@ class DriverMonitorProcessor:
             iris_y_avg = iris_center_avg[1] / h
             
             iris_missing_or_low = (not iris_visible) or (iris_y_avg > 0.5)
-            eye_closed_by_ear = avg_ear < self.settings.ear_threshold
+            eye_closed_by_ear = self.filters.crossed(
+                "avg_ear", avg_ear, self.settings.ear_threshold, self.settings.hysteresis_margin
+            )
             
             if eye_closed_by_ear and iris_missing_or_low:
+                eyes_closed_now = True
+                if self.eye_closed_since is None:
+                    self.eye_closed_since = current_time
                 self.eye_closure_counter += 1
+                closed_for = current_time - self.eye_closed_since
                 
-                if self.eye_closure_counter > 30:
+                if closed_for > self.settings.eye_closed_severe_s:
                     alert = self.add_alert("Alert: Eyes Closed Too Long", "severe")
                     result.alerts.append(alert)
                     eye_closed = 2
                     result.states["eyes_closed"] = True
-                elif self.eye_closure_counter > self.settings.eye_closed_frames_threshold:
+                elif closed_for > self.settings.eye_closed_warning_s:
                     alert = self.add_alert("Warning: Eyes Closed", "warning")
                     result.alerts.append(alert)
                     eye_closed = 1
                     result.states["eyes_closed"] = True
             else:
-                if 2 <= self.eye_closure_counter < self.settings.eye_closed_frames_threshold:
+                closed_for = current_time - self.eye_closed_since if self.eye_closed_since is not None else 0.0
+                if self.settings.blink_min_s <= closed_for <= self.settings.eye_closed_warning_s:
                     self.blink_counter += 1
                     result.states["blink"] = True
+                    blink_duration = closed_for
                 self.eye_closure_counter = 0
+                self.eye_closed_since = None
             
             # Blink rate monitoring
             if current_time - self.blink_timer > 60:
@@ -231,24 +541,40 @@ class DriverMonitorProcessor:
             result.metrics["blink_count"] = self.blink_counter
             
             # Yawn detection
-            mar = self.get_mar(landmarks, self.MOUTH, w, h)
-            self.mar_deque.append(mar)
+            mar = self.filters.smooth("mar", self.get_mar(landmarks, self.MOUTH, w, h))
             result.metrics["mar"] = mar
             
-            if mar > self.settings.mar_threshold:
+            mouth_open = self.filters.crossed("mar", mar, self.settings.mar_threshold, self.settings.hysteresis_margin)
+            yawn_started = mouth_open and not self.mouth_open
+            self.mouth_open = mouth_open
+            if mouth_open:
                 self.yawn_counter += 1
+                self.yawn_open_time += frame_dt
                 
-            if self.yawn_counter > self.settings.yawn_threshold:
+            if self.yawn_open_time > self.settings.yawn_duration_s:
                 alert = self.add_alert("Warning: Yawning", "warning")
                 result.alerts.append(alert)
                 yawn = True
                 result.states["yawning"] = True
                 self.yawn_counter = 0
+                self.yawn_open_time = 0.0
             
             # Gaze and head pose estimation
-            gaze_x_norm = iris_center_avg[0] / w
-            head_x = landmarks[self.NOSE_TIP].x
-            head_y = landmarks[self.NOSE_TIP].y
+            gaze_x_norm = self.filters.smooth("gaze_x", iris_center_avg[0] / w)
+            head_x = self.filters.smooth("head_x", landmarks[self.NOSE_TIP].x)
+            head_y = self.filters.smooth("head_y", landmarks[self.NOSE_TIP].y)
+            result.metrics["gaze_x"] = gaze_x_norm
+            result.metrics["head_x"] = head_x
+            result.metrics["head_y"] = head_y
+            
+            pose = self.head_pose.estimate(landmarks, w, h)
+            if pose is not None:
+                yaw = self.filters.smooth("head_yaw", pose[0])
+                pitch = self.filters.smooth("head_pitch", pose[1])
+                roll = self.filters.smooth("head_roll", pose[2])
+                result.metrics["head_yaw"] = yaw
+                result.metrics["head_pitch"] = pitch
+                result.metrics["head_roll"] = roll
             
             if self.calibration_mode:
                 result.calibration_data = {
@@ -256,13 +582,15 @@ class DriverMonitorProcessor:
                     "head_x": head_x,
                     "head_y": head_y
                 }
+                if pose is not None:
+                    result.calibration_data.update(head_yaw=yaw, head_pitch=pitch, head_roll=roll)
             else:
                 gaze_offset = abs(gaze_x_norm - self.gaze_center)
-                head_x_offset = abs(head_x - self.head_center_x)
-                head_y_offset = abs(head_y - self.head_center_y)
+                
+                margin = self.settings.hysteresis_margin
                 
                 # Gaze deviation
-                if gaze_offset > self.settings.gaze_deviation_threshold:
+                if self.filters.crossed("gaze_x", gaze_offset, self.settings.gaze_deviation_threshold, margin):
                     if gaze_offset < 0.1:
                         alert = self.add_alert("Mild Gaze Deviation", "mild")
                     elif gaze_offset < 0.2:
@@ -272,47 +600,41 @@ class DriverMonitorProcessor:
                     result.alerts.append(alert)
                     result.states["gaze_deviation"] = True
                 
-                # Head turn detection
-                if head_x_offset > self.settings.head_turn_threshold:
-                    if head_x_offset < 0.1:
-                        alert = self.add_alert("Mild Head Turn", "mild")
-                        head_turn = 1
-                    elif head_x_offset < 0.2:
-                        alert = self.add_alert("Moderate Head Turn", "moderate")
-                        head_turn = 2
-                    else:
-                        alert = self.add_alert("Severe Head Turn", "severe")
-                        head_turn = 3
-                    result.alerts.append(alert)
-                    result.states["head_turn"] = True
-                
-                # Head tilt/droop detection
-                if abs(head_y_offset) > self.settings.head_turn_threshold:
-                    if head_y < self.head_center_y:
-                        # Looking up
-                        if abs(head_y_offset) < 0.08:
-                            alert = self.add_alert("Mild Looking Upward", "mild")
-                            head_tilt = 1
-                        elif abs(head_y_offset) < 0.15:
-                            alert = self.add_alert("Moderate Looking Upward", "moderate")
-                            head_tilt = 2
-                        else:
-                            alert = self.add_alert("Severe Looking Upward", "severe")
-                            head_tilt = 3
-                        result.states["head_tilt_up"] = True
+                if self.legacy_calibration:
+                    # No pose baseline to measure against; nose offsets from the calibrated position
+                    head_turn, head_tilt, head_droop = self.legacy_head_alerts(head_x, head_y, result, margin)
+                    result.states["recalibration_needed"] = True
+                elif pose is not None:
+                    # Head turn detection (yaw against the calibrated pose)
+                    yaw_offset = abs(yaw - self.head_yaw_center)
+                    yaw_threshold = self.settings.head_yaw_threshold_deg
+                    if self.filters.crossed("head_yaw", yaw_offset, yaw_threshold, margin):
+                        head_turn = severity_level(yaw_offset, yaw_threshold)
+                        alert = self.add_alert(
+                            ("Mild Head Turn", "Moderate Head Turn", "Severe Head Turn")[head_turn - 1],
+                            SEVERITIES[head_turn - 1]
+                        )
+                        result.alerts.append(alert)
+                        result.states["head_turn"] = True
+                    
+                    # Head tilt/droop detection (pitch against the calibrated pose)
+                    pitch_offset = pitch - self.head_pitch_center
+                    if pitch_offset > 0:
+                        pitch_threshold = self.settings.head_pitch_up_threshold_deg
                     else:
-                        # Head drooping
-                        if abs(head_y_offset) < 0.07:
-                            alert = self.add_alert("Head drooping symptom", "mild")
-                            head_droop = 1
-                        elif abs(head_y_offset) < 0.12:
-                            alert = self.add_alert("Head drooping started", "moderate")
-                            head_droop = 2
+                        pitch_threshold = self.settings.head_pitch_down_threshold_deg
+                    if self.filters.crossed("head_pitch", abs(pitch_offset), pitch_threshold, margin):
+                        level = severity_level(abs(pitch_offset), pitch_threshold)
+                        if pitch_offset > 0:
+                            head_tilt = level
+                            message = ("Mild Looking Upward", "Moderate Looking Upward", "Severe Looking Upward")[level - 1]
+                            result.states["head_tilt_up"] = True
                         else:
-                            alert = self.add_alert("Head drooped", "severe")
-                            head_droop = 3
-                        result.states["head_droop"] = True
-                    result.alerts.append(alert)
+                            head_droop = level
+                            message = ("Head drooping symptom", "Head drooping started", "Head drooped")[level - 1]
+                            result.states["head_droop"] = True
+                        alert = self.add_alert(message, SEVERITIES[level - 1])
+                        result.alerts.append(alert)
             
             # Extract face landmarks for visualization
             result.face_landmarks = [
@@ -320,31 +642,31 @@ class DriverMonitorProcessor:
             ]
         
         # Hand detection
-        if hand_result.multi_hand_landmarks:
+        if hand_landmarks:
             hand_coords = []
-            for hand_landmarks in hand_result.multi_hand_landmarks:
-                if face_result.multi_face_landmarks:
-                    landmarks = face_result.multi_face_landmarks[0].landmark
+            for hand in hand_landmarks:
+                if face_landmarks:
+                    landmarks = face_landmarks
                     face_center = (int(landmarks[self.NOSE_TIP].x * w), int(landmarks[self.NOSE_TIP].y * h))
                     
-                    if self.hand_near_ear(landmarks, hand_landmarks, w, h):
+                    if self.hand_near_ear(landmarks, hand, w, h):
                         alert = self.add_alert("Likely mobile call", "warning")
                         result.alerts.append(alert)
                         hands_free = True
                         result.states["phone_use"] = True
-                    elif self.hand_near_face(face_center, hand_landmarks, (h, w)):
+                    elif self.hand_near_face(face_center, hand, (h, w)):
                         alert = self.add_alert("Hand near the face", "warning")
                         result.alerts.append(alert)
                         hands_free = True
                         result.states["hand_near_face"] = True
                 
-                xs = [lm.x for lm in hand_landmarks.landmark]
-                ys = [lm.y for lm in hand_landmarks.landmark]
+                xs = [lm.x for lm in hand]
+                ys = [lm.y for lm in hand]
                 hand_coords.append((np.mean(xs), np.mean(ys)))
                 
                 # Store hand landmarks
                 result.hand_landmarks.append([
-                    {"x": lm.x, "y": lm.y} for lm in hand_landmarks.landmark
+                    {"x": lm.x, "y": lm.y} for lm in hand
                 ])
             
             # Texting detection
@@ -379,38 +701,31 @@ class DriverMonitorProcessor:
             result.alerts.append(alert)
             result.states["distraction"] = "severe"
         
-        # Clean up expired alerts
-        expired = [k for k, t in self.active_alerts.items() 
-                  if current_time - t > self.settings.alert_duration]
-        for k in expired:
-            del self.active_alerts[k]
-        
-        # Add all active alerts to result
-        for alert_key in self.active_alerts:
-            # Parse alert message from key
-            parts = alert_key.split(" ", 1)
-            if len(parts) == 2:
-                ts, msg = parts
-                if not any(a.message == msg for a in result.alerts):
-                    # Determine severity and color
-                    if "Mild" in msg or "Warning" in msg:
-                        severity = "mild"
-                        color = "white"
-                    elif "Moderate" in msg or "Alert" in msg:
-                        severity = "moderate"
-                        color = "yellow"
-                    elif "Severe" in msg:
-                        severity = "severe"
-                        color = "red"
-                    else:
-                        severity = "warning"
-                        color = "red"
-                    
-                    result.alerts.append(Alert(
-                        message=msg,
-                        severity=severity,
-                        timestamp=ts,
-                        color=color
-                    ))
+        # Rolling-window fatigue metrics
+        self.fatigue.update(
+            current_time, face_landmarks is not None, eyes_closed_now, blink_duration, yawn_started
+        )
+        result.metrics.update(self.fatigue.metrics())
+        
+        # Expire alerts not raised again within alert_duration. Raises are
+        # queued in time order; an entry superseded by a later raise of the
+        # same message is dropped without expiring it.
+        expiry = self.alert_expiry
+        while expiry and current_time - expiry[0][0] > self.settings.alert_duration:
+            raised, message = expiry.popleft()
+            active = self.active_alerts.get(message)
+            if active is not None and active[0] == raised:
+                del self.active_alerts[message]
+                self.lingering_alerts.pop(message, None)
+        
+        # Keep showing active alerts that were not raised on this frame
+        # (the Alert is built once per raise, not on every frame it lingers)
+        raised_now = {a.message for a in result.alerts}
+        for message, (_, ts) in self.active_alerts.items():
+            if message not in raised_now:
+                alert = self.lingering_alerts.get(message)
+                if alert is None or alert.timestamp != ts:
+                    alert = self.lingering_alerts[message] = self.lingering_alert(message, ts)
+                result.alerts.append(alert)
         
         return result
\ No newline at end of file
@@ -0,0 +1,160 @@
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.config import Settings
+
+# Capture widths below the client's own that it is stepped through, largest first
+RESOLUTION_LADDER = [1920, 1280, 960, 640, 480, 320]
+
+class LoadMonitor:
+    """Server-wide frame load shared by all connections in this process
+
+    Utilization is the fraction of wall time, over a short window, that
+    the event loop spent on frames (decode, rules, serialization), not
+    counting time a frame waited for the inference workers, since frames
+    of other connections run on the loop meanwhile. With the worker pool
+    (`scheduler`), the workers' share of busy time counts too, and the
+    queue depth is the frames waiting for a worker; inline, it is the
+    frames received but not yet answered.
+    """
+
+    def __init__(self, window_s: float = 2.0):
+        self.window_s = window_s
+        self.in_flight = 0
+        self.busy_s = 0.0
+        self.window_start = time.monotonic()
+        self.utilization = 0.0
+        # core.inference.InferenceScheduler, when inference runs on the worker pool
+        self.scheduler: Optional[Any] = None
+        self.pool_busy_s = 0.0
+
+    def _pool(self) -> Optional[Any]:
+        return self.scheduler if self.scheduler is not None and self.scheduler.running else None
+
+    def frame_started(self):
+        self.in_flight += 1
+
+    def frame_finished(self, busy_s: float):
+        """Record a frame and the event-loop time it took"""
+        self.in_flight = max(0, self.in_flight - 1)
+        self.busy_s += busy_s
+        now = time.monotonic()
+        elapsed = now - self.window_start
+        if elapsed >= self.window_s:
+            utilization = self.busy_s / elapsed
+            pool = self._pool()
+            if pool is not None:
+                utilization = max(utilization, (pool.busy_s - self.pool_busy_s) / (elapsed * pool.workers))
+                self.pool_busy_s = pool.busy_s
+            self.utilization = min(1.0, utilization)
+            self.busy_s = 0.0
+            self.window_start = now
+
+    def snapshot(self) -> Dict[str, float]:
+        pool = self._pool()
+        in_flight = pool.waiting if pool is not None else self.in_flight
+        return {"in_flight": in_flight, "utilization": round(self.utilization, 3)}
+
+load_monitor = LoadMonitor()
+
+class AdaptiveRateController:
+    """Per-connection AIMD controller for client frame rate and capture resolution
+
+    Each processed frame reports its server latency (receive to result). Once
+    per control interval the controller compares the smoothed latency and the
+    server load against the targets: when saturated it cuts the frame rate
+    multiplicatively and, once at the minimum rate, steps the resolution down;
+    with headroom it restores resolution first and then raises the frame rate
+    additively. Only changed values produce hints.
+
+    The ladder starts at the size of the client's first frame (capped at the
+    inference width), so a step down always shrinks the frame and a recovery
+    never asks for more than the client captures.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.fps = settings.max_fps
+        # (width, height) of the client's first frame, before any hint
+        self.source: Optional[Tuple[int, int]] = None
+        self.ladder = self._ladder()
+        self.level = 0
+        self.latency_ms: Optional[float] = None
+        self.last_adjust = time.monotonic()
+        # The client starts at its own default rate and size; hint only changes
+        self.sent_fps = self.fps
+        self.sent_resolution = self.resolution()
+
+    def _ladder(self) -> List[int]:
+        top = int(self.settings.frame_width * self.settings.scale_factor)
+        if self.source is not None:
+            top = min(top, self.source[0])
+        return [top] + [w for w in RESOLUTION_LADDER if w < top]
+
+    def set_source(self, width: int, height: int):
+        """Record the client's capture size from its first frame"""
+        self.source = (width, height)
+        self.ladder = self._ladder()
+        self.level = 0
+        self.sent_resolution = (width, height)
+
+    def update_settings(self, settings: Settings):
+        self.settings = settings
+        self.fps = min(max(self.fps, settings.min_fps), settings.max_fps)
+        self.ladder = self._ladder()
+        self.level = min(self.level, len(self.ladder) - 1)
+
+    def resolution(self) -> Tuple[int, int]:
+        width = self.ladder[self.level]
+        if self.source is not None and width == self.source[0]:
+            return self.source
+        source_width, source_height = self.source or (self.settings.frame_width, self.settings.frame_height)
+        return width, int(round(width * source_height / source_width / 2) * 2)
+
+    def observe(self, latency_ms: float, load: Dict[str, float]) -> List[Dict[str, Any]]:
+        """Record one frame's latency and return any hint messages to send"""
+        alpha = 0.2
+        self.latency_ms = latency_ms if self.latency_ms is None else (
+            self.latency_ms + alpha * (latency_ms - self.latency_ms)
+        )
+
+        now = time.monotonic()
+        if not self.settings.adaptive_rate or now - self.last_adjust < self.settings.rate_control_interval_s:
+            return []
+        self.last_adjust = now
+
+        target = self.settings.target_latency_ms
+        saturated = (
+            self.latency_ms > target
+            or load["utilization"] > 0.9
+            or load["in_flight"] > self.settings.max_queue_depth
+        )
+        headroom = (
+            self.latency_ms < target * 0.5
+            and load["utilization"] < 0.6
+            and load["in_flight"] <= 1
+        )
+
+        if saturated:
+            if self.fps > self.settings.min_fps:
+                self.fps = max(self.settings.min_fps, round(self.fps * 0.75, 1))
+            elif self.level < len(self.ladder) - 1:
+                self.level += 1
+        elif headroom:
+            if self.level > 0:
+                self.level -= 1
+            elif self.fps < self.settings.max_fps:
+                self.fps = min(self.settings.max_fps, self.fps + 1)
+
+        return self._hints()
+
+    def _hints(self) -> List[Dict[str, Any]]:
+        hints: List[Dict[str, Any]] = []
+        if self.fps != self.sent_fps:
+            self.sent_fps = self.fps
+            hints.append({"type": "rate_hint", "fps": self.fps})
+        resolution = self.resolution()
+        if resolution != self.sent_resolution:
+            self.sent_resolution = resolution
+            hints.append({"type": "resolution_hint", "width": resolution[0], "height": resolution[1]})
+        return hints
@@ -0,0 +1,77 @@
+"""
+Driver risk scoring shared by daily statistics and the analytics endpoints.
+
+A score (0-100) comes from three aggregates per driver and period:
+
+- incident windows: distinct 5-second windows with at least one alert, so
+  conditions reported on every processed frame count once per window;
+- monitoring seconds;
+- alert counts, in total and by severity.
+
+70% of the score is the share of monitored time spent in incidents and 30%
+is the average severity weight over all alerts (mild 0.5, moderate 1.5,
+severe 3; warnings weigh nothing but count towards the average). Every
+function takes arrays with one element per driver (or driver and period),
+so a whole fleet is scored, ranked and placed in percentiles with a few
+NumPy operations instead of a loop over alerts.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+INCIDENT_WINDOW_S = 5
+SEVERITY_WEIGHTS = {"mild": 0.5, "moderate": 1.5, "severe": 3.0}
+INCIDENT_RATE_SHARE = 0.7
+SEVERITY_SHARE = 30.0
+
+def incident_window(seconds: float) -> int:
+    """Index of the incident window containing a time in epoch seconds"""
+    return int(seconds // INCIDENT_WINDOW_S)
+
+def risk_scores(incidents, monitoring_seconds, alerts, mild, moderate, severe) -> np.ndarray:
+    """Risk scores for arrays (or scalars) of per-driver aggregates
+
+    `alerts` is the total alert count, including severities without a weight.
+    """
+    incidents = np.asarray(incidents, dtype=np.float64)
+    monitoring = np.asarray(monitoring_seconds, dtype=np.float64)
+    alerts = np.asarray(alerts, dtype=np.float64)
+    mild = np.asarray(mild, dtype=np.float64)
+    moderate = np.asarray(moderate, dtype=np.float64)
+    severe = np.asarray(severe, dtype=np.float64)
+    scored = (monitoring > 0) & (alerts > 0)
+
+    # Divide only where defined; unscored drivers get 0
+    incident_rate = np.minimum(
+        100.0,
+        np.divide(incidents * INCIDENT_WINDOW_S * 100.0, monitoring,
+                  out=np.zeros(np.broadcast(incidents, monitoring).shape), where=monitoring > 0)
+    )
+    weighted = (
+        mild * SEVERITY_WEIGHTS["mild"]
+        + moderate * SEVERITY_WEIGHTS["moderate"]
+        + severe * SEVERITY_WEIGHTS["severe"]
+    )
+    severity_weight = np.divide(weighted, alerts, out=np.zeros(alerts.shape), where=alerts > 0)
+    scores = np.minimum(100.0, incident_rate * INCIDENT_RATE_SHARE + severity_weight * SEVERITY_SHARE)
+    return np.where(scored, scores, 0.0)
+
+def risk_score(incidents: int, monitoring_seconds: float, alerts: int, mild: int, moderate: int, severe: int) -> float:
+    """Risk score of a single driver and period"""
+    return float(risk_scores(incidents, monitoring_seconds, alerts, mild, moderate, severe))
+
+def rank_order(scores: np.ndarray, tiebreak: Optional[np.ndarray] = None) -> np.ndarray:
+    """Indices sorting drivers riskiest first (ties broken by `tiebreak`, descending)"""
+    scores = np.asarray(scores, dtype=np.float64)
+    if tiebreak is None:
+        return np.argsort(-scores, kind="stable")
+    return np.lexsort((-np.asarray(tiebreak, dtype=np.float64), -scores))
+
+def percentiles(scores: np.ndarray) -> np.ndarray:
+    """Percentage of drivers whose score is at or below each driver's score"""
+    scores = np.asarray(scores, dtype=np.float64)
+    if scores.size == 0:
+        return scores
+    ordered = np.sort(scores)
+    return np.searchsorted(ordered, scores, side="right") * 100.0 / scores.size
@@ -0,0 +1,129 @@
+"""
+Skips FaceMesh and Hands on frames where the driver's face region is unchanged.
+
+After each inference the face region (the face's bounding box widened by a
+margin and extended over any detected hands) is reduced to a small grayscale
+thumbnail: a strided sample of the region, area-resized so neighbouring
+samples average out sensor noise. On the next frames the same region is
+reduced again and compared with that reference: when no thumbnail pixel
+moved by more than the motion threshold, the previous landmarks are reused
+instead of running the graphs.
+
+The reference is only replaced by an inference, so slow drift accumulates
+until it crosses the threshold, and reuse is bounded by `max_skip_s` so a
+change the thumbnail misses is never held that long. The processor keeps
+that bound below the shortest blink and runs inference on every frame while
+the eyes are closing or closed. Frames without
+a face, a resolution change or a timebase restart always run inference.
+"""
+
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.landmarks import LandmarkPoint
+
+Landmarks = Tuple[Optional[List[LandmarkPoint]], List[List[LandmarkPoint]]]
+
+THUMB_SIZE = 32
+# Pixels sampled per thumbnail side before the area resize (bounds its cost on large regions)
+SAMPLE_SIZE = 2 * THUMB_SIZE
+# Fraction of the region's size added on each side
+ROI_MARGIN = 0.15
+
+def landmark_roi(landmarks: Landmarks, w: int, h: int, margin: float = ROI_MARGIN) -> Optional[Tuple[int, int, int, int]]:
+    """Pixel box (x0, y0, x1, y1) around the face and hands, None without a face"""
+    face, hands = landmarks
+    if not face:
+        return None
+    points = [p for group in [face, *hands] for p in group]
+    xs = [p.x for p in points]
+    ys = [p.y for p in points]
+    x0, x1, y0, y1 = min(xs), max(xs), min(ys), max(ys)
+    dx, dy = (x1 - x0) * margin, (y1 - y0) * margin
+    box = (
+        max(0, int((x0 - dx) * w)), max(0, int((y0 - dy) * h)),
+        min(w, int(np.ceil((x1 + dx) * w))), min(h, int(np.ceil((y1 + dy) * h))),
+    )
+    if box[2] - box[0] < 2 or box[3] - box[1] < 2:
+        return None
+    return box
+
+def thumbnail(frame: np.ndarray, roi: Tuple[int, int, int, int]) -> np.ndarray:
+    """Grayscale THUMB_SIZE x THUMB_SIZE area average of a BGR frame region"""
+    import cv2
+    x0, y0, x1, y1 = roi
+    sy = max(1, (y1 - y0) // SAMPLE_SIZE)
+    sx = max(1, (x1 - x0) // SAMPLE_SIZE)
+    small = cv2.resize(frame[y0:y1:sy, x0:x1:sx], (THUMB_SIZE, THUMB_SIZE), interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+class RoiGate:
+    """Decides per frame whether the previous landmarks can stand in for inference"""
+
+    def __init__(self):
+        self.reference: Optional[np.ndarray] = None
+        self.roi: Optional[Tuple[int, int, int, int]] = None
+        self.shape: Optional[Tuple[int, ...]] = None
+        self.landmarks: Optional[Landmarks] = None
+        self.inferred_at = 0.0
+        self.reset_stats()
+
+    def reset(self):
+        """Drop the reference so the next frame runs inference, and clear the counters"""
+        self.reference = None
+        self.landmarks = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.frames = 0
+        self.skipped = 0
+        self.inferred = 0
+        self.inference_s = 0.0
+        self.gate_s = 0.0
+
+    def reuse(self, frame: np.ndarray, t: float, threshold: float, max_skip_s: float) -> Optional[Landmarks]:
+        """Previous landmarks if the region has not moved since the last inference, else None"""
+        self.frames += 1
+        if (self.reference is None or frame.shape != self.shape
+                or not 0.0 <= t - self.inferred_at < max_skip_s):
+            return None
+        started = time.perf_counter()
+        import cv2
+        motion = cv2.absdiff(thumbnail(frame, self.roi), self.reference).max()
+        self.gate_s += time.perf_counter() - started
+        if motion > threshold:
+            return None
+        self.skipped += 1
+        return self.landmarks
+
+    def store(self, frame: np.ndarray, landmarks: Landmarks, t: float, inference_s: float):
+        """Record an inference and take its region as the new reference"""
+        self.inferred += 1
+        self.inference_s += inference_s
+        started = time.perf_counter()
+        h, w = frame.shape[:2]
+        self.roi = landmark_roi(landmarks, w, h)
+        if self.roi is None:
+            self.reference = None
+            return
+        self.reference = thumbnail(frame, self.roi)
+        self.shape = frame.shape
+        self.landmarks = landmarks
+        self.inferred_at = t
+        self.gate_s += time.perf_counter() - started
+
+    def stats(self) -> Dict[str, Any]:
+        """Skip ratio and the inference time it saved (estimated from the mean inference time)"""
+        avg_inference_s = self.inference_s / self.inferred if self.inferred else 0.0
+        saved_s = self.skipped * avg_inference_s
+        return {
+            "frames": self.frames,
+            "skipped": self.skipped,
+            "skip_ratio": round(self.skipped / self.frames, 3) if self.frames else 0.0,
+            "avg_inference_ms": round(avg_inference_s * 1000.0, 2),
+            "saved_cpu_s": round(saved_s, 3),
+            "gate_overhead_s": round(self.gate_s, 3),
+            "net_saved_cpu_s": round(saved_s - self.gate_s, 3),
+        }
@@ -0,0 +1,94 @@
+"""
+Per-user detection state shared between API processes.
+
+Each user's DriverMonitorProcessor state (settings, calibration, counters,
+filters, fatigue windows and active alerts) is checkpointed here as JSON so
+any uvicorn worker or node can resume a session. The store also holds
+named counters, such as the per-user data versions the response cache
+(core.cache) validates against. The in-process backend keeps the
+single-process behaviour; the Redis backend (any Redis-compatible server,
+needs the optional `redis` package) shares state across processes.
+"""
+
+import json
+import os
+from typing import Any, Dict, Optional
+
+STATE_BACKEND = os.getenv("DMS_STATE_BACKEND", "memory")
+REDIS_URL = os.getenv("DMS_REDIS_URL", "redis://localhost:6379/0")
+# Seconds an idle user's state is kept in Redis
+STATE_TTL_S = int(os.getenv("DMS_STATE_TTL_S", str(7 * 24 * 3600)))
+# Seconds between checkpoints while frames are streaming
+STATE_CHECKPOINT_S = float(os.getenv("DMS_STATE_CHECKPOINT_S", "1.0"))
+
+class InProcessStateStore:
+    """State kept in this process only (single uvicorn worker)"""
+
+    def __init__(self):
+        self.states: Dict[str, str] = {}
+        self.counters: Dict[str, int] = {}
+
+    async def load(self, user_id: str) -> Optional[Dict[str, Any]]:
+        data = self.states.get(user_id)
+        return json.loads(data) if data is not None else None
+
+    async def save(self, user_id: str, state: Dict[str, Any]):
+        # Stored serialized so both backends behave the same
+        self.states[user_id] = json.dumps(state)
+
+    async def delete(self, user_id: str):
+        self.states.pop(user_id, None)
+
+    async def counter(self, name: str) -> int:
+        return self.counters.get(name, 0)
+
+    async def increment(self, name: str) -> int:
+        self.counters[name] = self.counters.get(name, 0) + 1
+        return self.counters[name]
+
+    async def close(self):
+        pass
+
+class RedisStateStore:
+    """State kept in a Redis-compatible server shared by all API processes"""
+
+    def __init__(self, url: str, ttl_s: int, prefix: str = "dms:state:", counter_prefix: str = "dms:counter:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("DMS_STATE_BACKEND=redis requires the 'redis' package") from e
+        self.client = redis.from_url(url)
+        self.ttl_s = ttl_s
+        self.prefix = prefix
+        self.counter_prefix = counter_prefix
+
+    async def load(self, user_id: str) -> Optional[Dict[str, Any]]:
+        data = await self.client.get(self.prefix + user_id)
+        return json.loads(data) if data is not None else None
+
+    async def save(self, user_id: str, state: Dict[str, Any]):
+        await self.client.set(self.prefix + user_id, json.dumps(state), ex=self.ttl_s)
+
+    async def delete(self, user_id: str):
+        await self.client.delete(self.prefix + user_id)
+
+    async def counter(self, name: str) -> int:
+        value = await self.client.get(self.counter_prefix + name)
+        return int(value) if value is not None else 0
+
+    async def increment(self, name: str) -> int:
+        key = self.counter_prefix + name
+        async with self.client.pipeline(transaction=True) as pipe:
+            value, _ = await pipe.incr(key).expire(key, self.ttl_s).execute()
+        return int(value)
+
+    async def close(self):
+        await self.client.close()
+
+def create_state_store():
+    """Build the state store selected by DMS_STATE_BACKEND (memory or redis)"""
+    if STATE_BACKEND == "redis":
+        return RedisStateStore(REDIS_URL, STATE_TTL_S)
+    return InProcessStateStore()
+
+state_store = create_state_store()
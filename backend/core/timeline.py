@@ -0,0 +1,179 @@
+"""
+Per-session metric timeline stored as fixed-width binary records.
+
+While a session runs, per-frame EAR, MAR, gaze, head position, head pose
+(yaw/pitch/roll) and PERCLOS are averaged into 1-2 Hz samples (state flags
+are OR-ed) and appended to `<DMS_TIMELINE_DIR>/<session_id>.tl2` as records
+of TIMELINE_DTYPE. The file is read back with np.memmap; samples are in time
+order, so a range read is two binary searches on the `t` column and no
+parsing.
+
+Sessions recorded before head pose was added have `<session_id>.tl` files
+of LEGACY_DTYPE; they are still read, with empty head pose columns.
+Retention (database.retention) deletes timelines with their session's alerts.
+"""
+
+import os
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from models.detection import DetectionResult
+
+TIMELINE_DIR = os.getenv("DMS_TIMELINE_DIR", "./timelines")
+TIMELINE_HZ = float(os.getenv("DMS_TIMELINE_HZ", "2"))
+
+# Value columns, in record order after `t` (seconds since session start)
+LEGACY_FIELDS = ["ear", "mar", "gaze_x", "head_x", "head_y", "perclos"]
+TIMELINE_FIELDS = LEGACY_FIELDS + ["head_yaw", "head_pitch", "head_roll"]
+# Metric name in DetectionResult.metrics for each value column
+METRIC_SOURCES = {
+    "ear": "avg_ear",
+    "mar": "mar",
+    "gaze_x": "gaze_x",
+    "head_x": "head_x",
+    "head_y": "head_y",
+    "perclos": "perclos_60s",
+    "head_yaw": "head_yaw",
+    "head_pitch": "head_pitch",
+    "head_roll": "head_roll",
+}
+# DetectionResult.states keys packed into the `flags` bitmask, bit i = STATE_FLAGS[i]
+STATE_FLAGS = [
+    "eyes_closed", "blink", "yawning", "gaze_deviation", "head_turn",
+    "head_tilt_up", "head_droop", "phone_use", "hand_near_face", "texting",
+]
+
+def _record_dtype(fields: List[str]) -> np.dtype:
+    return np.dtype([("t", "<f8")] + [(name, "<f4") for name in fields] + [("flags", "<u2")])
+
+TIMELINE_DTYPE = _record_dtype(TIMELINE_FIELDS)
+LEGACY_DTYPE = _record_dtype(LEGACY_FIELDS)
+# File extension of each record format, current first
+TIMELINE_FORMATS = {".tl2": TIMELINE_DTYPE, ".tl": LEGACY_DTYPE}
+
+def timeline_path(session_id: str, extension: str = ".tl2") -> str:
+    # Session ids are UUIDs; keep only the file name part regardless
+    return os.path.join(TIMELINE_DIR, f"{os.path.basename(session_id)}{extension}")
+
+class TimelineWriter:
+    """Downsamples detection results for one session and appends them to its file"""
+
+    FLUSH_EVERY = 32
+
+    def __init__(self, session_id: str, hz: float = TIMELINE_HZ):
+        self.path = timeline_path(session_id)
+        self.interval = 1.0 / hz
+        self.started = time.monotonic()
+        self.pending = np.zeros(self.FLUSH_EVERY, dtype=TIMELINE_DTYPE)
+        self.n_pending = 0
+        self.samples = 0
+        os.makedirs(TIMELINE_DIR, exist_ok=True)
+        self._reset_bucket(0.0)
+
+    def _reset_bucket(self, t: float):
+        self.bucket_start = t
+        self.sums = np.zeros(len(TIMELINE_FIELDS), dtype=np.float64)
+        self.counts = np.zeros(len(TIMELINE_FIELDS), dtype=np.int32)
+        self.flags = 0
+
+    def add(self, result: DetectionResult, now: Optional[float] = None):
+        """Fold one frame's metrics into the current sample"""
+        t = (time.monotonic() if now is None else now) - self.started
+        if t - self.bucket_start >= self.interval:
+            self._emit()
+            self._reset_bucket(t - (t - self.bucket_start) % self.interval)
+
+        for i, name in enumerate(TIMELINE_FIELDS):
+            value = result.metrics.get(METRIC_SOURCES[name])
+            if value is not None:
+                self.sums[i] += value
+                self.counts[i] += 1
+        for bit, state in enumerate(STATE_FLAGS):
+            if result.states.get(state):
+                self.flags |= 1 << bit
+
+    def _emit(self):
+        """Close the current sample (skipped if no frame carried any metric)"""
+        if not self.counts.any() and not self.flags:
+            return
+        record = self.pending[self.n_pending]
+        record["t"] = self.bucket_start
+        for i, name in enumerate(TIMELINE_FIELDS):
+            record[name] = self.sums[i] / self.counts[i] if self.counts[i] else np.nan
+        record["flags"] = self.flags
+        self.n_pending += 1
+        self.samples += 1
+        if self.n_pending == self.FLUSH_EVERY:
+            self.flush()
+
+    def flush(self):
+        if self.n_pending:
+            with open(self.path, "ab") as f:
+                f.write(self.pending[:self.n_pending].tobytes())
+            self.n_pending = 0
+
+    def close(self):
+        self._emit()
+        self._reset_bucket(self.bucket_start)
+        self.flush()
+
+def read_timeline(
+    session_id: str,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    max_points: Optional[int] = None
+) -> Optional[Dict[str, Any]]:
+    """Columnar samples with start <= t <= end, decimated to at most max_points
+
+    Returns None if the session has no timeline file.
+    """
+    for extension, dtype in TIMELINE_FORMATS.items():
+        path = timeline_path(session_id, extension)
+        if os.path.exists(path):
+            break
+    else:
+        return None
+    size = os.path.getsize(path) // dtype.itemsize
+    if size == 0:
+        records = np.zeros(0, dtype=dtype)
+    else:
+        records = np.memmap(path, dtype=dtype, mode="r", shape=(size,))
+
+    t = records["t"]
+    lo = int(np.searchsorted(t, start, side="left")) if start is not None else 0
+    hi = int(np.searchsorted(t, end, side="right")) if end is not None else len(t)
+    window = records[lo:hi]
+    if max_points and len(window) > max_points:
+        window = window[::int(np.ceil(len(window) / max_points))]
+
+    columns: Dict[str, Any] = {"t": np.round(window["t"], 3).tolist()}
+    for name in TIMELINE_FIELDS:
+        if name not in dtype.names:
+            # Recorded before the column existed
+            columns[name] = [None] * len(window)
+            continue
+        values = window[name].astype(np.float64)
+        # NaN marks samples where the face was not visible; JSON has no NaN
+        columns[name] = [None if np.isnan(v) else round(v, 4) for v in values]
+    flags = window["flags"]
+    columns["states"] = {
+        state: ((flags >> bit) & 1).astype(bool).tolist() for bit, state in enumerate(STATE_FLAGS)
+    }
+    return {"samples": len(window), "total_samples": size, **columns}
+
+def timeline_session_ids() -> Iterator[str]:
+    """Ids of the sessions with a timeline file"""
+    if not os.path.isdir(TIMELINE_DIR):
+        return
+    for name in os.listdir(TIMELINE_DIR):
+        session_id, extension = os.path.splitext(name)
+        if extension in TIMELINE_FORMATS:
+            yield session_id
+
+def delete_timeline(session_id: str):
+    for extension in TIMELINE_FORMATS:
+        path = timeline_path(session_id, extension)
+        if os.path.exists(path):
+            os.remove(path)
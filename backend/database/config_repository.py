@@ -0,0 +1,183 @@
+"""
+Cached access to per-user configuration and calibration.
+
+Settings live in the Configuration table (one row per user, created at
+registration) and the active calibration in the Calibration table. Both are
+read once per user into an in-process cache and written through to the
+database on every change, so frame processing never touches the database.
+"""
+
+import os
+from datetime import timedelta
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from core.config import Settings
+from database.models import Calibration, Configuration, MonitoringSession
+from models.detection import CalibrationData
+from utils.timezone import get_ist_datetime_for_db
+
+# Drivers with a monitoring session in this many days are preloaded at startup
+PRELOAD_ACTIVE_DAYS = int(os.getenv("DMS_PRELOAD_ACTIVE_DAYS", "7"))
+
+# Settings stored in their own Configuration columns; the rest go to extra_settings
+CONFIG_COLUMNS = [
+    "ear_threshold",
+    "eye_closed_frames_threshold",
+    "blink_rate_threshold",
+    "mar_threshold",
+    "yawn_threshold",
+    "gaze_deviation_threshold",
+    "head_turn_threshold",
+    "hand_near_face_px",
+    "alert_duration",
+    "frame_width",
+    "frame_height",
+    "scale_factor",
+]
+
+UserConfig = Tuple[Settings, Optional[CalibrationData]]
+
+def settings_from_row(row: Optional[Configuration]) -> Settings:
+    """Build Settings from a Configuration row (defaults if there is none)"""
+    settings = Settings()
+    if row is None:
+        return settings
+    values = {
+        column: getattr(row, column) for column in CONFIG_COLUMNS
+        if getattr(row, column) is not None
+    }
+    values.update(row.extra_settings or {})
+    settings.update(values)
+    return settings
+
+def calibration_from_row(row: Optional[Calibration]) -> Optional[CalibrationData]:
+    if row is None:
+        return None
+    # Head pose baselines live in the JSON column; rows from before pose
+    # estimation have none, and the processor keeps nose-offset head rules for them
+    pose = {
+        key: value for key, value in (row.calibration_data or {}).items()
+        if key in ("head_yaw", "head_pitch", "head_roll")
+    }
+    return CalibrationData(
+        gaze_center=row.gaze_center,
+        head_center_x=row.head_center_x,
+        head_center_y=row.head_center_y,
+        **pose
+    )
+
+class ConfigRepository:
+    """Read-once, write-through cache of user settings and active calibration"""
+
+    def __init__(self):
+        self.cache: Dict[str, UserConfig] = {}
+        self.lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, db: Session, user_id: str) -> UserConfig:
+        """Settings and active calibration for a user, from the cache if present"""
+        with self.lock:
+            cached = self.cache.get(user_id)
+            if cached is not None:
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        row = db.query(Configuration).filter(Configuration.user_id == user_id).first()
+        calibration = db.query(Calibration).filter(
+            Calibration.user_id == user_id,
+            Calibration.is_active == True
+        ).order_by(Calibration.timestamp.desc()).first()
+        entry = (settings_from_row(row), calibration_from_row(calibration))
+        with self.lock:
+            self.cache[user_id] = entry
+        return entry
+
+    def preload(self, db: Session, user_ids: Optional[Iterable[str]] = None) -> int:
+        """Bulk-load users into the cache with two queries; returns the number loaded
+
+        Without user_ids, drivers with a monitoring session in the last
+        PRELOAD_ACTIVE_DAYS days are loaded.
+        """
+        if user_ids is None:
+            cutoff = get_ist_datetime_for_db() - timedelta(days=PRELOAD_ACTIVE_DAYS)
+            user_ids = [
+                user_id for (user_id,) in db.query(MonitoringSession.user_id)
+                .filter(MonitoringSession.start_time >= cutoff)
+                .distinct()
+            ]
+        user_ids = list(user_ids)
+        if not user_ids:
+            return 0
+
+        rows = {
+            row.user_id: row for row in
+            db.query(Configuration).filter(Configuration.user_id.in_(user_ids))
+        }
+        calibrations: Dict[str, Calibration] = {}
+        for row in db.query(Calibration).filter(
+            Calibration.user_id.in_(user_ids),
+            Calibration.is_active == True
+        ).order_by(Calibration.timestamp):
+            # Ordered oldest first, so the newest active calibration wins
+            calibrations[row.user_id] = row
+
+        with self.lock:
+            for user_id in user_ids:
+                self.cache[user_id] = (
+                    settings_from_row(rows.get(user_id)),
+                    calibration_from_row(calibrations.get(user_id))
+                )
+        return len(user_ids)
+
+    def save_settings(self, db: Session, user_id: str, settings: Settings):
+        """Write settings through to the Configuration row and the cache"""
+        values = settings.dict()
+        row = db.query(Configuration).filter(Configuration.user_id == user_id).first()
+        if row is None:
+            row = Configuration(user_id=user_id)
+            db.add(row)
+        for column in CONFIG_COLUMNS:
+            setattr(row, column, values.pop(column))
+        row.extra_settings = values
+        db.commit()
+
+        with self.lock:
+            _, calibration = self.cache.get(user_id, (None, None))
+            self.cache[user_id] = (settings, calibration)
+
+    def save_calibration(self, db: Session, user_id: str, calibration: CalibrationData):
+        """Store a new active calibration, deactivating earlier ones"""
+        db.query(Calibration).filter(
+            Calibration.user_id == user_id
+        ).update({"is_active": False})
+        db.add(Calibration(
+            user_id=user_id,
+            gaze_center=calibration.gaze_center,
+            head_center_x=calibration.head_center_x,
+            head_center_y=calibration.head_center_y,
+            calibration_data=calibration.dict()
+        ))
+        db.commit()
+
+        with self.lock:
+            cached = self.cache.get(user_id)
+            if cached is not None:
+                self.cache[user_id] = (cached[0], calibration)
+
+    def invalidate(self, user_id: Optional[str] = None):
+        """Drop one user (or everyone) from the cache"""
+        with self.lock:
+            if user_id is None:
+                self.cache.clear()
+            else:
+                self.cache.pop(user_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {"cached_users": len(self.cache), "hits": self.hits, "misses": self.misses}
+
+config_repository = ConfigRepository()
@@ -5,6 +5,8 @@ import os
 from typing import Generator
 
 from database.models import Base
+# Registers the hook that keeps hourly alert rollups current on insert
+import database.rollups  # noqa: F401
 
 # Database URL - using SQLite for simplicity, can be changed to PostgreSQL/MySQL
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./dms_database.db")
@@ -0,0 +1,211 @@
+"""
+Bulk alert ingestion for edge devices that buffer alerts while offline.
+
+An upload is stored in one transaction:
+
+1. items whose idempotency key (`client_id`) the user already uploaded are
+   reported as duplicates, found by key in the hot table and every month
+   partition (an item's timestamp can differ between retries: items sent
+   without one are stamped with the time they arrive);
+2. the new alerts are written with a single executemany INSERT and added
+   to the rollups in the same transaction (Core inserts bypass the ORM
+   flush hook);
+3. each session's counters are updated once.
+
+A concurrent upload of the same keys hits the unique (user_id, client_id)
+index. The batch insert runs in a savepoint; if it fails, the alerts are
+inserted one savepoint each, and those whose key is taken are reported as
+duplicates.
+
+Sessions recorded offline are uploaded first under the device's own ids
+(store_sessions), so their alerts can refer to them; re-sending a session
+updates its times and metadata but never its alert counters.
+"""
+
+import os
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import and_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from database.models import Alert, MonitoringSession
+from database.partitions import alerts_between
+from database.rollups import record_alerts
+from models.alert import BulkAlertItem, BulkItemStatus, EdgeSession
+from utils.timezone import IST, get_ist_datetime_for_db
+
+BULK_MAX_ITEMS = int(os.getenv("DMS_BULK_MAX_ITEMS", "5000"))
+# Limit on the decompressed payload
+BULK_MAX_BYTES = int(os.getenv("DMS_BULK_MAX_BYTES", str(32 * 1024 * 1024)))
+# Keys per IN (...) lookup, below SQLite's bound-parameter limit
+KEY_CHUNK = 500
+
+def _db_timestamp(value: Optional[datetime], now: datetime) -> datetime:
+    """Client time as the naive IST datetime alerts are stored with"""
+    if value is None:
+        return now
+    if value.tzinfo is not None:
+        return value.astimezone(IST).replace(tzinfo=None)
+    return value
+
+def _existing_keys(db: Session, user_id: str, keys: List[str]) -> Set[str]:
+    alerts = alerts_between(db, user_ids=[user_id])
+    found: Set[str] = set()
+    for i in range(0, len(keys), KEY_CHUNK):
+        found.update(
+            client_id for (client_id,) in db.query(alerts.client_id).filter(
+                and_(alerts.user_id == user_id, alerts.client_id.in_(keys[i:i + KEY_CHUNK]))
+            )
+        )
+    return found
+
+def _user_sessions(db: Session, user_id: str, session_ids: Set[str]) -> Set[str]:
+    if not session_ids:
+        return set()
+    return {
+        session_id for (session_id,) in db.query(MonitoringSession.id).filter(
+            and_(MonitoringSession.user_id == user_id, MonitoringSession.id.in_(list(session_ids)))
+        )
+    }
+
+def _active_session(db: Session, user_id: str) -> str:
+    """The user's open session, created (not committed) if there is none"""
+    active = db.query(MonitoringSession.id).filter(
+        and_(MonitoringSession.user_id == user_id, MonitoringSession.end_time == None)
+    ).first()
+    if active:
+        return active[0]
+    session = MonitoringSession(user_id=user_id)
+    db.add(session)
+    db.flush()
+    return session.id
+
+def _insert(db: Session, rows: List[Dict]) -> Set[str]:
+    """Insert alert rows; returns the ids of rows whose client_id another upload stored first"""
+    table = Alert.__table__
+    try:
+        with db.begin_nested():
+            db.execute(table.insert(), rows)
+        return set()
+    except IntegrityError:
+        pass
+    taken: Set[str] = set()
+    for row in rows:
+        try:
+            with db.begin_nested():
+                db.execute(table.insert(), row)
+        except IntegrityError:
+            taken.add(row["id"])
+    return taken
+
+def store_alerts(db: Session, user_id: str, items: Sequence[Tuple[int, BulkAlertItem]]) -> List[BulkItemStatus]:
+    """Store (index, item) pairs of one upload for a user; returns a status per item"""
+    if not items:
+        return []
+    now = get_ist_datetime_for_db()
+    keys = list({item.client_id for _, item in items if item.client_id})
+    seen = _existing_keys(db, user_id, keys) if keys else set()
+    owned = _user_sessions(db, user_id, {item.session_id for _, item in items if item.session_id})
+    default_session: Optional[str] = None
+
+    statuses: List[BulkItemStatus] = []
+    rows: List[Dict] = []
+    for index, item in items:
+        if item.client_id and item.client_id in seen:
+            statuses.append(BulkItemStatus(index=index, client_id=item.client_id, status="duplicate"))
+            continue
+        if item.session_id and item.session_id not in owned:
+            statuses.append(BulkItemStatus(
+                index=index, client_id=item.client_id, status="invalid", error="Unknown session"
+            ))
+            continue
+        if item.session_id:
+            session_id = item.session_id
+        else:
+            session_id = default_session = default_session or _active_session(db, user_id)
+        if item.client_id:
+            seen.add(item.client_id)
+
+        alert_id = str(uuid.uuid4())
+        rows.append({
+            "id": alert_id,
+            "user_id": user_id,
+            "session_id": session_id,
+            "timestamp": _db_timestamp(item.timestamp, now),
+            "alert_type": item.alert_type,
+            "severity": item.severity,
+            "message": item.message,
+            "eye_aspect_ratio": item.eye_aspect_ratio,
+            "mouth_aspect_ratio": item.mouth_aspect_ratio,
+            "blink_count": item.blink_count,
+            "head_position": item.head_position,
+            "gaze_metrics": item.gaze_metrics,
+            "states": item.states,
+            "duration_ms": item.duration_ms,
+            "image_path": None,
+            "client_id": item.client_id,
+        })
+        statuses.append(BulkItemStatus(index=index, client_id=item.client_id, status="created", id=alert_id))
+
+    taken = _insert(db, rows) if rows else set()
+    if taken:
+        for status in statuses:
+            if status.id in taken:
+                status.status, status.id = "duplicate", None
+        rows = [row for row in rows if row["id"] not in taken]
+    if rows:
+        record_alerts(db.connection(), [SimpleNamespace(**row) for row in rows])
+        counters: Dict[str, List[int]] = defaultdict(lambda: [0, 0, 0])
+        for row in rows:
+            session_counters = counters[row["session_id"]]
+            session_counters[0] += 1
+            if "drowsiness" in row["alert_type"].lower():
+                session_counters[1] += 1
+            elif "distraction" in row["alert_type"].lower():
+                session_counters[2] += 1
+        for session_id, (total, drowsiness, distraction) in counters.items():
+            db.query(MonitoringSession).filter(MonitoringSession.id == session_id).update(
+                {
+                    MonitoringSession.total_alerts: MonitoringSession.total_alerts + total,
+                    MonitoringSession.drowsiness_alerts: MonitoringSession.drowsiness_alerts + drowsiness,
+                    MonitoringSession.distraction_alerts: MonitoringSession.distraction_alerts + distraction,
+                },
+                synchronize_session=False
+            )
+    db.commit()
+    return statuses
+
+def store_sessions(db: Session, user_id: str, items: Sequence[Tuple[int, EdgeSession]]) -> List[BulkItemStatus]:
+    """Create or update (index, session) pairs recorded by a user's edge device"""
+    ids = list({item.id for _, item in items})
+    existing: Dict[str, MonitoringSession] = {}
+    for i in range(0, len(ids), KEY_CHUNK):
+        existing.update(
+            (session.id, session)
+            for session in db.query(MonitoringSession).filter(MonitoringSession.id.in_(ids[i:i + KEY_CHUNK]))
+        )
+
+    statuses: List[BulkItemStatus] = []
+    for index, item in items:
+        session = existing.get(item.id)
+        if session is not None and session.user_id != user_id:
+            statuses.append(BulkItemStatus(index=index, client_id=item.id, status="invalid", error="Unknown session"))
+            continue
+        status = "updated" if session is not None else "created"
+        if session is None:
+            session = existing[item.id] = MonitoringSession(id=item.id, user_id=user_id)
+            db.add(session)
+        session.start_time = _db_timestamp(item.start_time, item.start_time)
+        if item.end_time is not None:
+            session.end_time = _db_timestamp(item.end_time, item.end_time)
+            session.duration_seconds = max(0, int((session.end_time - session.start_time).total_seconds()))
+        if item.session_metadata is not None:
+            session.session_metadata = {**(session.session_metadata or {}), **item.session_metadata}
+        statuses.append(BulkItemStatus(index=index, client_id=item.id, status=status, id=item.id))
+    db.commit()
+    return statuses
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON, Boolean, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON, Boolean, Text, UniqueConstraint, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -46,6 +46,10 @@ class MonitoringSession(Base):
 
 class Alert(Base):
     __tablename__ = "alerts"
+    __table_args__ = (
+        # Idempotency keys of bulk uploads are unique per user (NULLs allowed)
+        Index("ux_alerts_user_client_id", "user_id", "client_id", unique=True),
+    )
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, ForeignKey("users.id"), nullable=False)
@@ -66,6 +70,7 @@ class Alert(Base):
     states = Column(JSON, nullable=True)  # All active states
     duration_ms = Column(Integer, nullable=True)  # How long the condition persisted
     image_path = Column(String, nullable=True)  # Optional: path to saved frame
+    client_id = Column(String, nullable=True)  # Idempotency key sent by edge devices
     
     # Relationships
     user = relationship("User", back_populates="alerts")
@@ -117,6 +122,40 @@ class AlertStatistics(Base):
     # Relationships
     user_rel = relationship("User")
 
+class AlertRollup(Base):
+    """Fleet-wide alert counts per time bucket, type, severity and message, maintained on insert"""
+    __tablename__ = "alert_rollups"
+    __table_args__ = (
+        UniqueConstraint("grain", "bucket", "alert_type", "severity", "message", name="uq_alert_rollup"),
+    )
+    
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    grain = Column(String, nullable=False)  # hour, day, month
+    bucket = Column(DateTime, nullable=False)  # start of the hour/day/month
+    alert_type = Column(String, nullable=False)
+    severity = Column(String, nullable=False)
+    message = Column(String, nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+
+class UserAlertRollup(Base):
+    """Per-user alert counts per time bucket, type and severity, maintained on insert"""
+    __tablename__ = "user_alert_rollups"
+    __table_args__ = (
+        UniqueConstraint("grain", "bucket", "user_id", "alert_type", "severity", name="uq_user_alert_rollup"),
+    )
+    
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    grain = Column(String, nullable=False)  # hour, day, month
+    bucket = Column(DateTime, nullable=False)  # start of the hour/day/month
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    alert_type = Column(String, nullable=False)
+    severity = Column(String, nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+    incidents = Column(Integer, nullable=False, default=0)  # distinct incident windows (core.risk)
+    
+    # Relationships
+    user_rel = relationship("User")
+
 class Configuration(Base):
     __tablename__ = "configurations"
     
@@ -140,8 +179,18 @@ class Configuration(Base):
     frame_height = Column(Integer, default=1080)
     scale_factor = Column(Float, default=1.0)
     
+    # Settings without a dedicated column (durations, smoothing, rate control, ...)
+    extra_settings = Column(JSON, nullable=True)
+    
     created_at = Column(DateTime, default=get_ist_datetime_for_db)
     updated_at = Column(DateTime, default=get_ist_datetime_for_db, onupdate=get_ist_datetime_for_db)
     
     # Relationships
-    user_rel = relationship("User")
\ No newline at end of file
+    user_rel = relationship("User")
+class JobLease(Base):
+    """Lease that lets one process at a time run a background job (e.g. retention)"""
+    __tablename__ = "job_leases"
+    
+    name = Column(String, primary_key=True)
+    owner = Column(String, nullable=False)  # hostname:pid
+    expires_at = Column(DateTime, nullable=False)
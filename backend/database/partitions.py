@@ -0,0 +1,216 @@
+"""
+Monthly partitions for the alerts table.
+
+New alerts are always written to the `alerts` table, which acts as the hot
+partition. The roll job moves whole months older than DMS_HOT_MONTHS out of
+it into one table per month (`alerts_YYYY_MM`, same columns, indexed on
+user_id + timestamp and user_id + client_id). Readers call alerts_between(), which only touches the
+hot table and the month tables that overlap the requested range. Expiring a
+month is then a single DROP TABLE.
+
+Month tables live in the main database, not in ATTACHed files: SQLite
+allows at most 10 attached databases per connection (a year of history
+needs more), and the API shares one connection (StaticPool) on which ATTACH
+cannot run inside an open transaction. Plain tables work the same on
+PostgreSQL.
+
+Each process caches the list of month tables for DMS_PARTITION_CACHE_S
+seconds, so a roll or drop done by another worker is picked up within that
+time.
+
+    python -m database.partitions list
+    python -m database.partitions roll
+"""
+
+import os
+import re
+import time
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Column, Index, MetaData, Table, and_, func, inspect, select, union_all
+from sqlalchemy.orm import Session, aliased
+
+from database.models import Alert
+from utils.timezone import get_ist_datetime_for_db
+
+PARTITIONS_ENABLED = os.getenv("DMS_ALERT_PARTITIONS", "1") == "1"
+# Current month plus this many - 1 previous months stay in the hot table
+HOT_MONTHS = max(1, int(os.getenv("DMS_HOT_MONTHS", "2")))
+PARTITION_BATCH = int(os.getenv("DMS_PARTITION_BATCH", "5000"))
+PARTITION_CACHE_S = float(os.getenv("DMS_PARTITION_CACHE_S", "30"))
+
+PARTITION_PATTERN = re.compile(r"^alerts_(\d{4})_(\d{2})$")
+
+partition_metadata = MetaData()
+_tables: Dict[Tuple[int, int], Table] = {}
+_known: Optional[List[Tuple[int, int]]] = None
+_known_at = 0.0
+
+Month = Tuple[int, int]
+
+def month_of(value: datetime) -> Month:
+    return value.year, value.month
+
+def next_month(month: Month) -> Month:
+    year, m = month
+    return (year + 1, 1) if m == 12 else (year, m + 1)
+
+def month_start(month: Month) -> datetime:
+    return datetime(month[0], month[1], 1)
+
+def month_range(month: Month) -> Tuple[datetime, datetime]:
+    """[start, end) of a month"""
+    return month_start(month), month_start(next_month(month))
+
+def partition_name(month: Month) -> str:
+    return f"alerts_{month[0]:04d}_{month[1]:02d}"
+
+def partition_table(month: Month) -> Table:
+    """Table object for a month partition (columns mirror `alerts`, without foreign keys)"""
+    table = _tables.get(month)
+    if table is None:
+        name = partition_name(month)
+        table = Table(
+            name, partition_metadata,
+            *[
+                Column(c.name, c.type, primary_key=c.primary_key, nullable=c.nullable)
+                for c in Alert.__table__.columns
+            ]
+        )
+        Index(f"ix_{name}_user_timestamp", table.c.user_id, table.c.timestamp)
+        Index(f"ix_{name}_user_client_id", table.c.user_id, table.c.client_id)
+        _tables[month] = table
+    return table
+
+def known_partitions(db: Session, refresh: bool = False) -> List[Month]:
+    """Existing month partitions, oldest first (cached for PARTITION_CACHE_S seconds)"""
+    global _known, _known_at
+    if _known is None or refresh or time.monotonic() - _known_at >= PARTITION_CACHE_S:
+        months = []
+        for name in inspect(db.get_bind()).get_table_names():
+            match = PARTITION_PATTERN.match(name)
+            if match:
+                months.append((int(match.group(1)), int(match.group(2))))
+        _known = sorted(months)
+        _known_at = time.monotonic()
+    return _known
+
+def alert_tables(db: Session, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[Table]:
+    """The hot table plus every month partition overlapping [start, end]"""
+    tables = [Alert.__table__]
+    if not PARTITIONS_ENABLED:
+        return tables
+    for month in known_partitions(db):
+        first, after = month_range(month)
+        if (start is None or after > start) and (end is None or first <= end):
+            tables.append(partition_table(month))
+    return tables
+
+def _range_filter(table: Table, start, end, user_ids):
+    conditions = []
+    if start is not None:
+        conditions.append(table.c.timestamp >= start)
+    if end is not None:
+        conditions.append(table.c.timestamp <= end)
+    if user_ids is not None:
+        conditions.append(table.c.user_id.in_(list(user_ids)))
+    return and_(*conditions) if conditions else None
+
+def alerts_between(
+    db: Session,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    user_ids: Optional[Sequence[str]] = None
+):
+    """ORM entity to query alerts from only the partitions overlapping [start, end]
+
+    Returns the Alert class itself when only the hot table is involved;
+    otherwise an alias over a UNION ALL of the overlapping tables, with the
+    range (and user) filter applied inside each branch. Callers filter on
+    the returned entity's attributes as they would on Alert.
+    """
+    tables = alert_tables(db, start, end)
+    if len(tables) == 1:
+        return Alert
+    selects = []
+    for table in tables:
+        query = select(*table.c)
+        condition = _range_filter(table, start, end, user_ids)
+        if condition is not None:
+            query = query.where(condition)
+        selects.append(query)
+    return aliased(Alert, union_all(*selects).subquery("alerts_partitioned"), adapt_on_names=True)
+
+def roll_partitions(db: Session, now: Optional[datetime] = None, batch_size: int = PARTITION_BATCH) -> Iterator[Dict[str, object]]:
+    """Move months older than the hot window out of `alerts`; yields progress per batch"""
+    if not PARTITIONS_ENABLED:
+        return
+    now = now or get_ist_datetime_for_db()
+    hot_month = month_of(now)
+    for _ in range(HOT_MONTHS - 1):
+        year, m = hot_month
+        hot_month = (year - 1, 12) if m == 1 else (year, m - 1)
+    hot_start = month_start(hot_month)
+
+    hot = Alert.__table__
+    oldest = db.query(func.min(hot.c.timestamp)).filter(hot.c.timestamp < hot_start).scalar()
+    if oldest is None:
+        return
+
+    month = month_of(oldest)
+    while month_start(month) < hot_start:
+        first, after = month_range(month)
+        in_month = and_(hot.c.timestamp >= first, hot.c.timestamp < after)
+        table = partition_table(month)
+        table.create(bind=db.connection(), checkfirst=True)
+        for index in table.indexes:
+            index.create(bind=db.connection(), checkfirst=True)
+        db.commit()
+        known_partitions(db, refresh=True)
+
+        while True:
+            ids = [row[0] for row in db.execute(select(hot.c.id).where(in_month).limit(batch_size))]
+            if not ids:
+                break
+            db.execute(table.insert().from_select(
+                [c.name for c in hot.c], select(*hot.c).where(hot.c.id.in_(ids))
+            ))
+            db.execute(hot.delete().where(hot.c.id.in_(ids)))
+            db.commit()
+            yield {"partition": table.name, "moved": len(ids)}
+        month = next_month(month)
+
+def drop_partition(db: Session, month: Month):
+    """Drop a month partition (the caller archives it first)"""
+    partition_table(month).drop(bind=db.connection(), checkfirst=True)
+    db.commit()
+    known_partitions(db, refresh=True)
+
+def main():
+    import argparse
+    from database.connection import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Manage monthly alert partitions")
+    parser.add_argument("command", choices=["list", "roll"])
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.command == "roll":
+            moved = 0
+            for progress in roll_partitions(db):
+                moved += progress["moved"]
+                print(f"{progress['partition']}: moved {progress['moved']}")
+            print(f"Moved {moved} alerts out of the hot table")
+        for month in known_partitions(db, refresh=True):
+            table = partition_table(month)
+            count = db.execute(select(func.count()).select_from(table)).scalar()
+            print(f"{table.name}: {count} alerts")
+        hot_count = db.execute(select(func.count()).select_from(Alert.__table__)).scalar()
+        print(f"alerts (hot): {hot_count} alerts")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
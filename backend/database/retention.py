@@ -0,0 +1,363 @@
+"""
+Retention for raw alerts: roll up, archive, then delete in bounded batches.
+
+Alerts older than the retention period of their owner's role are processed
+one user-day at a time:
+
+1. the day's AlertStatistics rollup is (re)computed from the raw alerts,
+2. the raw alerts are appended to `<DMS_ARCHIVE_DIR>/<user_id>/<day>.ndjson.gz`,
+3. they are deleted in batches of DMS_RETENTION_BATCH rows.
+
+Each batch is archived before it is deleted, and each batch commits on its
+own, so the job can stop at any point and pick up again on the next run.
+
+With monthly partitions (database.partitions) each run first rolls old
+months out of the hot table. Month partitions that are past the retention
+period of every role are rolled up, archived whole to
+`<DMS_ARCHIVE_DIR>/partitions/<table>.ndjson.gz` and dropped, with no
+row-by-row deletes. Shorter role retentions are then applied per user-day
+across the remaining tables.
+
+Session timelines (core.timeline) of sessions that started before their
+user's role cutoff, or whose session no longer exists, are deleted too.
+SQLite reuses the freed pages, so the database file stops growing. Run with
+`--vacuum` to return the space to the filesystem.
+
+The job runs every DMS_RETENTION_INTERVAL_H hours in the API process, or
+from the command line. Only one process runs it at a time: a run first
+takes the `retention` row of `job_leases` for DMS_RETENTION_LEASE_S seconds
+(renewed as it goes), and the other workers and nodes skip that run.
+
+
+    python -m database.retention [--dry-run] [--vacuum]
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import socket
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import and_, func, or_, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from core.timeline import delete_timeline, timeline_session_ids
+from database.models import JobLease, MonitoringSession, User
+from database.partitions import (
+    alert_tables, alerts_between, drop_partition, known_partitions, month_range,
+    partition_table, roll_partitions
+)
+from database.statistics import build_daily_statistics, get_daily_rollup
+from utils.timezone import get_ist_datetime_for_db
+
+RETENTION_DAYS = int(os.getenv("DMS_RETENTION_DAYS", "90"))
+# Per-role overrides, e.g. DMS_RETENTION_DAYS_MANAGER=180
+ROLE_RETENTION_DAYS = {
+    role: int(os.getenv(f"DMS_RETENTION_DAYS_{role.upper()}", str(RETENTION_DAYS)))
+    for role in ("driver", "manager", "admin")
+}
+RETENTION_BATCH = int(os.getenv("DMS_RETENTION_BATCH", "1000"))
+RETENTION_INTERVAL_H = float(os.getenv("DMS_RETENTION_INTERVAL_H", "24"))
+ARCHIVE_DIR = os.getenv("DMS_ARCHIVE_DIR", "./archive/alerts")
+RETENTION_LEASE_S = float(os.getenv("DMS_RETENTION_LEASE_S", "600"))
+LEASE_NAME = "retention"
+
+ARCHIVE_COLUMNS = [
+    "id", "user_id", "session_id", "timestamp", "alert_type", "severity", "message",
+    "eye_aspect_ratio", "mouth_aspect_ratio", "blink_count", "head_position",
+    "gaze_metrics", "states", "duration_ms", "image_path", "client_id",
+]
+
+def lease_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def acquire_lease(db: Session, owner: str, lease_s: float = RETENTION_LEASE_S, name: str = LEASE_NAME) -> bool:
+    """Take or renew a job lease; False while another owner holds an unexpired one"""
+    now = get_ist_datetime_for_db()
+    expires_at = now + timedelta(seconds=lease_s)
+    renewed = db.query(JobLease).filter(
+        JobLease.name == name,
+        or_(JobLease.owner == owner, JobLease.expires_at < now)
+    ).update({"owner": owner, "expires_at": expires_at}, synchronize_session=False)
+    if not renewed:
+        db.add(JobLease(name=name, owner=owner, expires_at=expires_at))
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another owner holds the lease
+        db.rollback()
+        return False
+    return True
+
+def release_lease(db: Session, owner: str, name: str = LEASE_NAME):
+    db.query(JobLease).filter(JobLease.name == name, JobLease.owner == owner).delete(synchronize_session=False)
+    db.commit()
+
+def under_lease(db: Session, owner: str, steps: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Pass steps through, renewing the lease; stops if it was lost"""
+    renewed_at = time.monotonic()
+    for progress in steps:
+        yield progress
+        if time.monotonic() - renewed_at >= RETENTION_LEASE_S / 3:
+            if not acquire_lease(db, owner):
+                print("Retention: lease lost, stopping this run")
+                return
+            renewed_at = time.monotonic()
+
+def retention_cutoffs(now: Optional[datetime] = None) -> Dict[str, datetime]:
+    """Start of the oldest kept day for each role"""
+    now = now or get_ist_datetime_for_db()
+    return {
+        role: datetime.combine((now - timedelta(days=days)).date(), datetime.min.time())
+        for role, days in ROLE_RETENTION_DAYS.items()
+    }
+
+def _as_date(value: Any) -> date:
+    # func.date() returns a string on SQLite and a date elsewhere
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+def expired_user_days(db: Session, role: str, cutoff: datetime) -> List[Tuple[str, date]]:
+    alerts = alerts_between(db, None, cutoff)
+    rows = db.query(alerts.user_id, func.date(alerts.timestamp)).join(
+        User, User.id == alerts.user_id
+    ).filter(
+        and_(User.role == role, alerts.timestamp < cutoff)
+    ).distinct().all()
+    return sorted((user_id, _as_date(day)) for user_id, day in rows)
+
+def archive_path(user_id: str, day: date) -> str:
+    return os.path.join(ARCHIVE_DIR, os.path.basename(user_id), f"{day.isoformat()}.ndjson.gz")
+
+def _alert_record(row) -> Dict[str, Any]:
+    record = {column: row[column] for column in ARCHIVE_COLUMNS}
+    if record["timestamp"] is not None:
+        record["timestamp"] = record["timestamp"].isoformat()
+    return record
+
+def _archive(path: str, rows):
+    """Append alert rows as NDJSON; each append adds a gzip member, which readers concatenate"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with gzip.open(path, "at", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(_alert_record(row)) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+def _rollup_user_day(db: Session, user_id: str, day: date):
+    """(Re)compute a user-day rollup before its raw alerts are removed"""
+    stats = get_daily_rollup(db, user_id, day)
+    day_start = datetime.combine(day, datetime.min.time())
+    day_end = datetime.combine(day, datetime.max.time())
+    alerts = alerts_between(db, day_start, day_end, [user_id])
+    remaining = db.query(func.count(alerts.id)).filter(
+        and_(alerts.user_id == user_id, alerts.timestamp >= day_start, alerts.timestamp <= day_end)
+    ).scalar()
+
+    # A rollup with more alerts than are left means an earlier run already
+    # deleted part of this day; keep it rather than recount the remainder
+    if stats is None:
+        db.add(build_daily_statistics(db, user_id, day))
+    elif remaining >= (stats.total_alerts or 0):
+        build_daily_statistics(db, user_id, day, stats)
+    db.commit()
+
+def compact_user_day(db: Session, user_id: str, day: date, batch_size: int = RETENTION_BATCH) -> Iterator[int]:
+    """Roll up, archive and delete one user's alerts for one day; yields rows deleted per batch"""
+    _rollup_user_day(db, user_id, day)
+    day_start = datetime.combine(day, datetime.min.time())
+    day_end = datetime.combine(day, datetime.max.time())
+
+    path = archive_path(user_id, day)
+    for table in alert_tables(db, day_start, day_end):
+        day_filter = and_(
+            table.c.user_id == user_id,
+            table.c.timestamp >= day_start,
+            table.c.timestamp <= day_end
+        )
+        while True:
+            batch = db.execute(
+                select(table).where(day_filter).order_by(table.c.timestamp).limit(batch_size)
+            ).mappings().all()
+            if not batch:
+                break
+            _archive(path, batch)
+            ids = [row["id"] for row in batch]
+            db.execute(table.delete().where(table.c.id.in_(ids)))
+            db.commit()
+            yield len(ids)
+
+def drop_expired_partitions(
+    db: Session,
+    cutoffs: Dict[str, datetime],
+    batch_size: int = RETENTION_BATCH
+) -> Iterator[Dict[str, Any]]:
+    """Roll up, archive and drop month partitions past every role's retention
+
+    Yields after each rolled-up user-day and each archived batch, so the
+    caller can hand control back between steps. Batches are read by primary
+    key rather than through an open cursor, so nothing is held across a yield.
+    """
+    oldest_kept = min(cutoffs.values())
+    for month in list(known_partitions(db, refresh=True)):
+        first, after = month_range(month)
+        if after > oldest_kept:
+            continue
+        table = partition_table(month)
+        user_days = db.execute(
+            select(table.c.user_id, func.date(table.c.timestamp)).distinct()
+        ).all()
+        for user_id, day in user_days:
+            _rollup_user_day(db, user_id, _as_date(day))
+            yield {"action": "rollup", "partition": table.name, "user_id": user_id, "day": str(day), "deleted": 0}
+
+        path = os.path.join(ARCHIVE_DIR, "partitions", f"{table.name}.ndjson.gz")
+        if os.path.exists(path):
+            # Left over from an interrupted run; rewrite it from the table
+            os.remove(path)
+        archived = 0
+        last_id = None
+        while True:
+            query = select(table).order_by(table.c.id).limit(batch_size)
+            if last_id is not None:
+                query = query.where(table.c.id > last_id)
+            batch = db.execute(query).mappings().all()
+            db.commit()
+            if not batch:
+                break
+            _archive(path, batch)
+            archived += len(batch)
+            last_id = batch[-1]["id"]
+            yield {"action": "archive", "partition": table.name, "archived": archived, "deleted": 0}
+        drop_partition(db, month)
+        yield {"action": "drop", "partition": table.name, "deleted": archived}
+
+def expire_timelines(
+    db: Session,
+    cutoffs: Dict[str, datetime],
+    batch_size: int = RETENTION_BATCH
+) -> Iterator[Dict[str, Any]]:
+    """Delete the timeline files of expired or deleted sessions, yielding after each batch of sessions"""
+    session_ids = sorted(timeline_session_ids())
+    for i in range(0, len(session_ids), batch_size):
+        chunk = session_ids[i:i + batch_size]
+        sessions = {
+            session_id: (start_time, role) for session_id, start_time, role in
+            db.query(MonitoringSession.id, MonitoringSession.start_time, User.role)
+            .join(User, User.id == MonitoringSession.user_id)
+            .filter(MonitoringSession.id.in_(chunk))
+        }
+        db.commit()
+        expired = 0
+        for session_id in chunk:
+            session = sessions.get(session_id)
+            if session is None or session[0] < cutoffs.get(session[1], min(cutoffs.values())):
+                delete_timeline(session_id)
+                expired += 1
+        yield {"action": "timelines", "timelines": expired, "deleted": 0}
+
+def run_retention(
+    db: Session,
+    now: Optional[datetime] = None,
+    batch_size: int = RETENTION_BATCH
+) -> Iterator[Dict[str, Any]]:
+    """Process every expired user-day, yielding progress after each rollup and each archived or deleted batch"""
+    for progress in roll_partitions(db, now):
+        yield {"action": "roll", "deleted": 0, **progress}
+    cutoffs = retention_cutoffs(now)
+    yield from drop_expired_partitions(db, cutoffs, batch_size)
+    for role, cutoff in cutoffs.items():
+        for user_id, day in expired_user_days(db, role, cutoff):
+            for deleted in compact_user_day(db, user_id, day, batch_size):
+                yield {"action": "delete", "role": role, "user_id": user_id, "day": day.isoformat(), "deleted": deleted}
+    yield from expire_timelines(db, cutoffs, batch_size)
+
+def expired_summary(db: Session, now: Optional[datetime] = None) -> Dict[str, int]:
+    """Alerts per role that the next run would compact (used by --dry-run)"""
+    summary = {}
+    for role, cutoff in retention_cutoffs(now).items():
+        alerts = alerts_between(db, None, cutoff)
+        summary[role] = db.query(func.count(alerts.id)).join(User, User.id == alerts.user_id).filter(
+            and_(User.role == role, alerts.timestamp < cutoff)
+        ).scalar()
+    return summary
+
+async def retention_loop(session_factory, initial_delay_s: float = 300.0, pause_s: float = 0.05):
+    """Run the retention job every RETENTION_INTERVAL_H hours inside the API process
+
+    Steps run on the event loop (the SQLite engine shares one connection),
+    with a short pause after each rollup and batch so live sessions keep
+    priority; no step covers more than one user-day or one batch of rows.
+    Runs are skipped while another process holds the retention lease.
+    """
+    owner = lease_owner()
+    await asyncio.sleep(initial_delay_s)
+    while True:
+        db = session_factory()
+        deleted = 0
+        leased = False
+        try:
+            leased = acquire_lease(db, owner)
+            if leased:
+                for progress in under_lease(db, owner, run_retention(db)):
+                    deleted += progress["deleted"]
+                    await asyncio.sleep(pause_s)
+            if deleted:
+                print(f"Retention: archived and deleted {deleted} alerts")
+        except Exception as e:
+            db.rollback()
+            print(f"Retention error: {e}")
+        finally:
+            if leased:
+                try:
+                    release_lease(db, owner)
+                except Exception as e:
+                    print(f"Retention lease release error: {e}")
+            db.close()
+        await asyncio.sleep(RETENTION_INTERVAL_H * 3600)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact, archive and delete expired alerts")
+    parser.add_argument("--dry-run", action="store_true", help="Only report how many alerts are expired")
+    parser.add_argument("--batch-size", type=int, default=RETENTION_BATCH)
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM the SQLite database afterwards")
+    args = parser.parse_args()
+
+    from database.connection import SessionLocal, engine, DATABASE_URL
+    db = SessionLocal()
+    try:
+        if args.dry_run:
+            for role, count in expired_summary(db).items():
+                print(f"{role}: {count} alerts older than {ROLE_RETENTION_DAYS[role]} days")
+            return
+        owner = lease_owner()
+        if not acquire_lease(db, owner):
+            print("Retention is running in another process")
+            return
+        total = 0
+        for progress in under_lease(db, owner, run_retention(db, batch_size=args.batch_size)):
+            total += progress["deleted"]
+            if progress["action"] == "roll":
+                print(f"{progress['partition']}: moved {progress['moved']} from the hot table")
+            elif progress["action"] == "drop":
+                print(f"{progress['partition']}: archived {progress['deleted']} and dropped")
+            elif progress["action"] == "delete":
+                print(f"{progress['user_id']} {progress['day']}: deleted {progress['deleted']}")
+            elif progress["action"] == "timelines" and progress["timelines"]:
+                print(f"Deleted {progress['timelines']} session timelines")
+        print(f"Archived and deleted {total} alerts")
+        release_lease(db, owner)
+    finally:
+        db.close()
+
+    if args.vacuum and "sqlite" in DATABASE_URL:
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("VACUUM"))
+        print("Database vacuumed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Alert rollups for fleet-wide analytics.
+
+Every flushed Alert increments, for each grain (hour, day, month), its
+(type, severity, message) row in `alert_rollups` and its (user, type,
+severity) row in `user_alert_rollups`. Analytics periods are aligned to a
+grain (the last 24 hours, 7 or 30 days, 12 months), so a query reads only
+the rows of that grain inside the range: a few per bucket fleet-wide, and
+a few per bucket and driver for rankings, however many alerts there are.
+Rollups are independent of the raw rows: partition rolls and retention
+deletes leave them in place.
+
+Per-user rows also count incident windows (core.risk) for risk rankings:
+an alert adds one, on its own (type, severity) row, when it opens a new
+window for its user, tracked per process from the last window seen; a
+window that spans a restart or receives out-of-order inserts can be
+counted twice. Summed over a user's rows, the counts give one incident
+per window with alerts, whatever their types.
+
+Existing alerts (or alerts inserted outside the ORM) are counted with
+
+    python -m database.rollups backfill [--since YYYY-MM-DD]
+
+A backfill replaces only the buckets from `--since` (rounded up to a month)
+onwards, and rebuilds them from the raw alerts in that range. Once the
+retention job has archived alerts, buckets older than the shortest role
+retention have lost raw rows and exist only as rollups, so the default start
+is the first month after that cutoff and an earlier one is refused.
+"""
+
+from collections import defaultdict
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, event, func, select, true, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from core.risk import incident_window
+from database.models import Alert, AlertRollup, UserAlertRollup
+from database.partitions import alerts_between
+from database.statistics import incident_window_expr
+from utils.timezone import get_ist_datetime_for_db
+
+GRAINS = ("hour", "day", "month")
+# Key columns of each rollup table (also its unique constraint and upsert target)
+ROLLUP_KEYS = {
+    AlertRollup.__table__: ["grain", "bucket", "alert_type", "severity", "message"],
+    UserAlertRollup.__table__: ["grain", "bucket", "user_id", "alert_type", "severity"],
+}
+# Counter columns of each rollup table, added to on conflict
+ROLLUP_VALUES = {
+    AlertRollup.__table__: ["count"],
+    UserAlertRollup.__table__: ["count", "incidents"],
+}
+EPOCH = datetime(1970, 1, 1)
+
+# SQLite stores datetimes as ISO strings, so truncating is a prefix plus a
+# constant suffix (much cheaper than strftime); PostgreSQL uses date_trunc
+SQLITE_PREFIXES = {"hour": (13, ":00:00"), "day": (10, " 00:00:00"), "month": (7, "-01 00:00:00")}
+
+RollupKey = Tuple[Any, ...]
+
+# Last incident window seen per user in this process
+_last_windows: Dict[str, int] = {}
+# Joins type and severity in the backfill's per-window MIN()
+_KEY_SEP = "\x1f"
+
+def truncate(value: datetime, grain: str) -> datetime:
+    """Start of the hour, day or month containing `value`"""
+    value = value.replace(minute=0, second=0, microsecond=0)
+    if grain == "hour":
+        return value
+    value = value.replace(hour=0)
+    return value if grain == "day" else value.replace(day=1)
+
+def truncate_expr(dialect: str, column, grain: str):
+    """SQL expression truncating a datetime column to a grain"""
+    if dialect == "sqlite":
+        length, suffix = SQLITE_PREFIXES[grain]
+        return func.substr(column, 1, length) + suffix
+    return func.date_trunc(grain, column)
+
+def as_datetime(value: Any) -> datetime:
+    # truncate_expr returns a string on SQLite
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+def add_counts(connection, table, counts: Dict[RollupKey, List[int]]):
+    """Add counters (in ROLLUP_VALUES order) to a rollup table's rows in one upsert statement"""
+    if not counts:
+        return
+    key_columns = ROLLUP_KEYS[table]
+    value_columns = ROLLUP_VALUES[table]
+    rows = [
+        {**dict(zip(key_columns, key)), **dict(zip(value_columns, values))}
+        for key, values in counts.items()
+    ]
+    dialect = connection.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        insert = sqlite_insert(table) if dialect == "sqlite" else pg_insert(table)
+        connection.execute(
+            insert.on_conflict_do_update(
+                index_elements=key_columns,
+                set_={column: table.c[column] + insert.excluded[column] for column in value_columns}
+            ),
+            rows
+        )
+        return
+    for row in rows:
+        matched = connection.execute(
+            update(table).where(
+                and_(*[table.c[column] == row[column] for column in key_columns])
+            ).values({column: table.c[column] + row[column] for column in value_columns})
+        ).rowcount
+        if not matched:
+            connection.execute(table.insert(), row)
+
+def count_alerts(alerts: Iterable[Any]) -> Dict[Any, Dict[RollupKey, List[int]]]:
+    """Rollup increments per table (one row per grain) for alert rows or objects"""
+    fleet: Dict[RollupKey, List[int]] = defaultdict(lambda: [0])
+    per_user: Dict[RollupKey, List[int]] = defaultdict(lambda: [0, 0])
+    now = get_ist_datetime_for_db()
+    for alert in sorted(alerts, key=lambda a: a.timestamp or now):
+        timestamp = alert.timestamp or now
+        window = incident_window((timestamp - EPOCH).total_seconds())
+        new_incident = _last_windows.get(alert.user_id) != window
+        _last_windows[alert.user_id] = window
+        for grain in GRAINS:
+            bucket = truncate(timestamp, grain)
+            fleet[(grain, bucket, alert.alert_type, alert.severity, alert.message)][0] += 1
+            user_counts = per_user[(grain, bucket, alert.user_id, alert.alert_type, alert.severity)]
+            user_counts[0] += 1
+            user_counts[1] += new_incident
+    return {AlertRollup.__table__: fleet, UserAlertRollup.__table__: per_user}
+
+def record_alerts(connection, alerts: Iterable[Any]):
+    """Add alerts to every rollup table"""
+    for table, counts in count_alerts(alerts).items():
+        add_counts(connection, table, counts)
+
+@event.listens_for(Session, "after_flush")
+def _rollup_new_alerts(session: Session, flush_context):
+    """Count alerts inserted by this flush in the same transaction"""
+    new_alerts = [obj for obj in session.new if isinstance(obj, Alert)]
+    if new_alerts:
+        record_alerts(session.connection(), new_alerts)
+
+def next_month(value: datetime) -> datetime:
+    """`value` if it starts a month, else the start of the following month"""
+    start = truncate(value, "month")
+    if start == value:
+        return start
+    return start.replace(year=start.year + 1, month=1) if start.month == 12 else start.replace(month=start.month + 1)
+
+def complete_since() -> Optional[datetime]:
+    """Earliest month whose raw alerts are all still stored (None if retention never archived any)"""
+    from database.retention import ARCHIVE_DIR, retention_cutoffs
+    if not os.path.isdir(ARCHIVE_DIR) or not os.listdir(ARCHIVE_DIR):
+        return None
+    return next_month(max(retention_cutoffs().values()))
+
+def backfill(db: Session, since: Optional[datetime] = None) -> int:
+    """Rebuild the rollups from `since` onwards from the raw alerts; returns rollup rows written
+
+    Buckets before `since` are left as they are. Raises ValueError when
+    `since` reaches back into months whose alerts retention has archived.
+    """
+    complete = complete_since()
+    if since is None:
+        since = complete
+    elif complete is not None and since < complete:
+        raise ValueError(
+            f"Alerts before {complete:%Y-%m-%d} have been archived; "
+            "their rollups cannot be rebuilt from the raw rows"
+        )
+    if since is not None:
+        since = next_month(since)
+
+    alerts = alerts_between(db, since)
+    dialect = db.get_bind().dialect.name
+    written = 0
+    window = incident_window_expr(dialect, alerts.timestamp).label("window")
+    in_range = alerts.timestamp >= since if since is not None else true()
+    for table, key_columns in ROLLUP_KEYS.items():
+        counts: Dict[RollupKey, List[int]] = {}
+        for grain in GRAINS:
+            bucket = truncate_expr(dialect, alerts.timestamp, grain)
+            columns = [getattr(alerts, column) for column in key_columns[2:]]
+            for row in db.query(bucket, *columns, func.count(alerts.id)).filter(in_range).group_by(bucket, *columns):
+                counts[(grain, as_datetime(row[0]), *row[1:-1])] = [row[-1]]
+            if "incidents" not in ROLLUP_VALUES[table]:
+                continue
+            for key, values in counts.items():
+                if key[0] == grain:
+                    values.append(0)
+            # One incident per (user, window), on the row of the smallest (type, severity) in it
+            first = func.min(alerts.alert_type + _KEY_SEP + alerts.severity)
+            windows = db.query(
+                bucket.label("bucket"), alerts.user_id.label("user_id"), first.label("first")
+            ).filter(in_range).group_by(bucket, alerts.user_id, window).subquery()
+            for row in db.query(windows.c.bucket, windows.c.user_id, windows.c.first, func.count()).group_by(
+                windows.c.bucket, windows.c.user_id, windows.c.first
+            ):
+                alert_type, severity = row[2].split(_KEY_SEP, 1)
+                counts[(grain, as_datetime(row[0]), row[1], alert_type, severity)][1] += row[3]
+        delete = table.delete()
+        if since is not None:
+            delete = delete.where(table.c.bucket >= since)
+        db.execute(delete)
+        add_counts(db.connection(), table, counts)
+        written += len(counts)
+    db.commit()
+    return written
+
+def main():
+    import argparse
+    from database.connection import SessionLocal, init_db
+
+    parser = argparse.ArgumentParser(description="Maintain alert rollups")
+    parser.add_argument("command", choices=["backfill"])
+    parser.add_argument(
+        "--since", type=datetime.fromisoformat,
+        help="Rebuild buckets from this date (rounded up to a month); default: every month still fully stored"
+    )
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    try:
+        try:
+            rows = backfill(db, args.since)
+        except ValueError as e:
+            parser.error(str(e))
+        total = db.execute(
+            select(func.coalesce(func.sum(AlertRollup.count), 0)).where(AlertRollup.grain == "month")
+        ).scalar()
+        print(f"Wrote {rows} rollup rows covering {total} alerts")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
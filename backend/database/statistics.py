@@ -0,0 +1,123 @@
+"""
+Daily AlertStatistics rollups computed from raw alerts and sessions.
+
+Shared by the /api/alerts/statistics/daily endpoint and the retention job,
+which compacts raw alerts into these rollups before archiving them.
+"""
+
+from datetime import date, datetime
+from typing import Dict, Optional
+
+from sqlalchemy import Integer, and_, case, cast, func
+from sqlalchemy.orm import Session
+
+from core.risk import INCIDENT_WINDOW_S, risk_score
+from database.models import AlertStatistics, MonitoringSession
+from database.partitions import alerts_between
+
+def _count(condition):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+def _contains(column, text: str):
+    return func.lower(column).like(f"%{text}%")
+
+def incident_window_expr(dialect: str, column):
+    """SQL expression for the incident window (core.risk) containing a datetime column"""
+    if dialect == "sqlite":
+        return cast(func.strftime("%s", column), Integer) // INCIDENT_WINDOW_S
+    return cast(func.floor(func.extract("epoch", column) / INCIDENT_WINDOW_S), Integer)
+
+def incident_counts(db: Session, alerts, condition) -> Dict[str, int]:
+    """Incident windows per user among the alerts matching `condition`
+
+    Distinct (user, window) pairs are counted in SQL, so the alerts are
+    never loaded.
+    """
+    window = incident_window_expr(db.get_bind().dialect.name, alerts.timestamp)
+    incidents = db.query(
+        alerts.user_id.label("user_id"),
+        window.label("window")
+    ).filter(condition).distinct().subquery()
+    return {
+        user_id: int(count)
+        for user_id, count in db.query(incidents.c.user_id, func.count()).group_by(incidents.c.user_id)
+    }
+
+def build_daily_statistics(
+    db: Session,
+    user_id: str,
+    target_date: date,
+    stats: Optional[AlertStatistics] = None
+) -> AlertStatistics:
+    """Compute one user's rollup for a day, filling `stats` or a new (unsaved) row
+
+    Counts are aggregated in SQL, so days with many alerts are not loaded
+    into memory.
+    """
+    day_start = datetime.combine(target_date, datetime.min.time())
+    day_end = datetime.combine(target_date, datetime.max.time())
+    alerts = alerts_between(db, day_start, day_end, [user_id])
+
+    drowsiness = _contains(alerts.alert_type, "drowsiness")
+    distraction = _contains(alerts.alert_type, "distraction")
+    in_day = and_(
+        alerts.user_id == user_id,
+        alerts.timestamp >= day_start,
+        alerts.timestamp <= day_end
+    )
+    counts = db.query(
+        func.count(alerts.id),
+        _count(and_(alerts.severity == "mild", drowsiness)),
+        _count(and_(alerts.severity == "moderate", drowsiness)),
+        _count(and_(alerts.severity == "severe", drowsiness)),
+        _count(and_(alerts.severity == "mild", distraction)),
+        _count(and_(alerts.severity == "moderate", distraction)),
+        _count(and_(alerts.severity == "severe", distraction)),
+        _count(_contains(alerts.message, "yawn")),
+        _count(_contains(alerts.message, "phone") | _contains(alerts.message, "mobile")),
+        _count(_contains(alerts.message, "head turn")),
+        _count(alerts.severity == "mild"),
+        _count(alerts.severity == "moderate"),
+        _count(alerts.severity == "severe"),
+    ).filter(in_day).one()
+
+    monitoring_time = db.query(
+        func.coalesce(func.sum(MonitoringSession.duration_seconds), 0)
+    ).filter(
+        and_(
+            MonitoringSession.user_id == user_id,
+            MonitoringSession.start_time >= day_start,
+            MonitoringSession.start_time <= day_end
+        )
+    ).scalar()
+
+    if stats is None:
+        stats = AlertStatistics(user_id=user_id, date=day_start)
+    stats.total_monitoring_time = int(monitoring_time or 0)
+    (
+        stats.total_alerts,
+        stats.drowsiness_mild,
+        stats.drowsiness_moderate,
+        stats.drowsiness_severe,
+        stats.distraction_mild,
+        stats.distraction_moderate,
+        stats.distraction_severe,
+        stats.total_yawns,
+        stats.phone_usage_count,
+        stats.head_turn_count,
+    ) = (int(c) for c in counts[:10])
+    stats.daily_risk_score = risk_score(
+        incident_counts(db, alerts, in_day).get(user_id, 0),
+        stats.total_monitoring_time,
+        stats.total_alerts,
+        *(int(c) for c in counts[10:])
+    )
+    return stats
+
+def get_daily_rollup(db: Session, user_id: str, target_date: date) -> Optional[AlertStatistics]:
+    return db.query(AlertStatistics).filter(
+        and_(
+            AlertStatistics.user_id == user_id,
+            func.date(AlertStatistics.date) == target_date
+        )
+    ).first()
@@ -0,0 +1,229 @@
+"""
+Edge agent: runs DriverMonitorProcessor in the vehicle and stores and forwards its results.
+
+Frames from a local camera (or a video file) are processed on the device,
+so no frames leave the vehicle and the backend does no inference. Alerts
+and the session record (start, end, fatigue summary) go to a local SQLite
+outbox (edge.outbox), and a background thread uploads them to the backend
+in gzip NDJSON batches whenever it is reachable (edge.sync).
+
+Settings are fetched from the backend (GET /api/config) when it is
+reachable at startup and cached in the outbox for offline starts. The
+calibration baseline is measured locally over the first seconds of the
+first run and cached the same way.
+
+Run from the backend directory:
+
+    python -m edge.agent --server http://localhost:8000 --username driver1 \\
+        --password secret --source 0
+
+    # Upload whatever is queued and exit
+    python -m edge.agent --server http://localhost:8000 --username driver1 --password secret --sync-only
+"""
+
+import argparse
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from core.config import Settings
+from core.processor import DriverMonitorProcessor
+from edge.outbox import Outbox
+from edge.sync import SyncClient, SyncError, SyncLoop, sync_once
+from models.detection import CalibrationData, DetectionResult
+from utils.timezone import now_ist
+
+logger = logging.getLogger(__name__)
+
+def alert_records(result: DetectionResult, session_id: str, timestamp: datetime) -> List[Dict[str, Any]]:
+    """Alert documents for /api/alerts/bulk, classified as the /ws endpoint does"""
+    return [
+        {
+            "session_id": session_id,
+            "timestamp": timestamp.isoformat(),
+            "alert_type": "drowsiness" if "drowsiness" in alert.message.lower() else "distraction",
+            "severity": alert.severity,
+            "message": alert.message,
+            "eye_aspect_ratio": result.metrics.get("avg_ear"),
+            "mouth_aspect_ratio": result.metrics.get("mar"),
+            "blink_count": result.metrics.get("blink_count"),
+            "states": result.states,
+        }
+        for alert in result.alerts
+    ]
+
+class EdgeAgent:
+    """Processes frames locally and queues alerts and session records in an outbox"""
+
+    def __init__(self, outbox: Outbox, processor: Optional[DriverMonitorProcessor] = None,
+                 calibration_s: float = 5.0):
+        self.outbox = outbox
+        self.processor = processor or DriverMonitorProcessor()
+        self.calibration_s = calibration_s
+        self.session: Optional[Dict[str, Any]] = None
+        self.session_started: Optional[float] = None
+        self.frames = 0
+        self.calibration_samples: List[Dict[str, float]] = []
+
+        settings = outbox.get("settings")
+        if settings:
+            self.processor.update_settings(Settings(**settings))
+        calibration = outbox.get("calibration")
+        if calibration:
+            self.processor.calibrate(CalibrationData(**calibration))
+
+    def apply_settings(self, settings: Dict[str, Any]):
+        """Use settings from the backend and cache them for offline starts"""
+        self.processor.update_settings(Settings(**settings))
+        self.outbox.set("settings", settings)
+
+    def start_session(self) -> str:
+        self.processor.reset_state()
+        self.session = {"id": str(uuid.uuid4()), "start_time": now_ist().isoformat()}
+        self.session_started = time.monotonic()
+        self.frames = 0
+        self.outbox.put_session(self.session)
+        return self.session["id"]
+
+    def end_session(self):
+        if self.session is None:
+            return
+        self.session = {
+            **self.session,
+            "end_time": now_ist().isoformat(),
+            "session_metadata": {
+                "source": "edge",
+                "frames": self.frames,
+                "fatigue": self.processor.fatigue.summary(),
+                "roi_gate": self.processor.roi_gate.stats(),
+                "face_tracker": self.processor.face_tracker.stats(),
+            },
+        }
+        self.outbox.put_session(self.session)
+        self.session = None
+
+    def _calibrate(self, result: DetectionResult, t: float):
+        if result.calibration_data:
+            self.calibration_samples.append(result.calibration_data)
+        if t - self.session_started < self.calibration_s or not self.calibration_samples:
+            return
+        # Baseline from the median of the samples, robust to glances during calibration
+        pose = {
+            key: float(np.median([s[key] for s in self.calibration_samples if key in s]))
+            for key in ("head_yaw", "head_pitch", "head_roll")
+            if any(key in s for s in self.calibration_samples)
+        }
+        calibration = CalibrationData(
+            gaze_center=float(np.median([s["gaze_x"] for s in self.calibration_samples])),
+            head_center_x=float(np.median([s["head_x"] for s in self.calibration_samples])),
+            head_center_y=float(np.median([s["head_y"] for s in self.calibration_samples])),
+            **pose
+        )
+        self.processor.calibrate(calibration)
+        self.outbox.set("calibration", calibration.dict())
+        self.calibration_samples = []
+        logger.info("Calibrated: %s", calibration.dict())
+
+    def process(self, frame: np.ndarray, timestamp: Optional[float] = None) -> DetectionResult:
+        """Run detection on a BGR frame and queue its alerts in the current session"""
+        if self.session is None:
+            self.start_session()
+        t = timestamp if timestamp is not None else time.monotonic()
+        result = self.processor.process_frame(frame, t)
+        self.frames += 1
+        if self.processor.calibration_mode:
+            self._calibrate(result, t)
+        elif result.alerts:
+            self.outbox.put_alerts(alert_records(result, self.session["id"], now_ist()))
+        return result
+
+    def run(self, capture, duration_s: Optional[float] = None, max_fps: Optional[float] = None) -> int:
+        """Process frames from a cv2.VideoCapture until it ends or `duration_s` passes; returns frames"""
+        self.start_session()
+        min_interval = 1.0 / max_fps if max_fps else 0.0
+        started = time.monotonic()
+        try:
+            while duration_s is None or time.monotonic() - started < duration_s:
+                frame_started = time.monotonic()
+                ok, frame = capture.read()
+                if not ok:
+                    break
+                self.process(frame, frame_started)
+                wait = min_interval - (time.monotonic() - frame_started)
+                if wait > 0:
+                    time.sleep(wait)
+        finally:
+            frames = self.frames
+            self.end_session()
+        return frames
+
+def main():
+    parser = argparse.ArgumentParser(description="On-vehicle driver monitoring with store-and-forward sync")
+    parser.add_argument("--server", default=os.getenv("DMS_EDGE_SERVER", "http://localhost:8000"))
+    parser.add_argument("--username", default=os.getenv("DMS_EDGE_USERNAME"))
+    parser.add_argument("--password", default=os.getenv("DMS_EDGE_PASSWORD"))
+    parser.add_argument("--token", default=os.getenv("DMS_EDGE_TOKEN"), help="Access token instead of username/password")
+    parser.add_argument("--source", default="0", help="Camera index or video file")
+    parser.add_argument("--outbox", default=os.getenv("DMS_EDGE_OUTBOX", "./edge_outbox.db"))
+    parser.add_argument("--batch", type=int, default=500, help="Alerts per upload")
+    parser.add_argument("--sync-interval", type=float, default=10.0, help="Seconds between sync passes")
+    parser.add_argument("--max-pending", type=int, default=500000, help="Queued alerts kept during an outage")
+    parser.add_argument("--max-fps", type=float, default=None)
+    parser.add_argument("--duration", type=float, default=None, help="Stop after this many seconds")
+    parser.add_argument("--calibration-s", type=float, default=5.0)
+    parser.add_argument("--recalibrate", action="store_true", help="Measure a new calibration baseline")
+    parser.add_argument("--sync-only", action="store_true", help="Upload the outbox and exit")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    outbox = Outbox(args.outbox, max_pending=args.max_pending)
+    client = SyncClient(args.server, token=args.token)
+    if args.username and args.password:
+        client.credentials = {"username": args.username, "password": args.password}
+
+    if args.sync_only:
+        try:
+            print(sync_once(outbox, client, args.batch))
+        except SyncError as e:
+            raise SystemExit(f"Sync failed: {e}")
+        finally:
+            print(outbox.stats())
+            outbox.close()
+        return
+
+    if args.recalibrate:
+        outbox.set("calibration", None)
+    agent = EdgeAgent(outbox, calibration_s=args.calibration_s)
+    try:
+        agent.apply_settings(client.get("/api/config"))
+    except SyncError as e:
+        logger.warning("Using cached settings (%s)", e)
+
+    sync_loop = SyncLoop(outbox, client, args.sync_interval, args.batch)
+    sync_thread = threading.Thread(target=sync_loop.run, name="edge-sync", daemon=True)
+    sync_thread.start()
+
+    import cv2
+    capture = cv2.VideoCapture(int(args.source) if args.source.isdigit() else args.source)
+    try:
+        frames = agent.run(capture, args.duration, args.max_fps)
+        logger.info("Processed %d frames", frames)
+    except KeyboardInterrupt:
+        agent.end_session()
+    finally:
+        capture.release()
+        sync_loop.stop()
+        sync_thread.join()
+        # Final pass so a session that just ended is uploaded if the network is up
+        sync_loop.run_once()
+        print(outbox.stats())
+        outbox.close()
+
+if __name__ == "__main__":
+    main()
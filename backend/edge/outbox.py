@@ -0,0 +1,173 @@
+"""
+Local SQLite outbox for the edge agent.
+
+Alerts and session records are written here as they happen and stay until
+the backend has acknowledged them, so nothing is lost while the vehicle is
+offline or if the agent restarts mid-upload. Every alert gets its
+idempotency key (`client_id`) when it is queued, which makes any upload
+safe to repeat: a batch whose response never arrived is sent again and the
+backend reports the alerts it already has as duplicates.
+
+Sessions are kept as one row per session with a version that increases on
+every change (start, end), and are only marked synced if the version that
+was uploaded is still the latest.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Sequence, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1,
+    synced_version INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS alerts (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    client_id TEXT NOT NULL UNIQUE,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    error TEXT,
+    queued_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_alerts_status_seq ON alerts (status, seq);
+CREATE TABLE IF NOT EXISTS kv (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+class Outbox:
+    """Durable queue of alerts and sessions waiting to be uploaded"""
+
+    def __init__(self, path: str, max_pending: int = 500000):
+        self.path = path
+        self.max_pending = max_pending
+        self.lock = threading.Lock()
+        # Shared by the capture and sync threads, serialized by the lock
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.dropped = 0
+        # Kept in step with every insert and delete so queuing never has to count the table
+        self.pending = self.conn.execute("SELECT COUNT(*) FROM alerts WHERE status = 'pending'").fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def put_session(self, session: Dict[str, Any]):
+        """Insert or replace a session record; it is re-uploaded on the next sync"""
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO sessions (id, payload) VALUES (?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET payload = excluded.payload, version = version + 1",
+                (session["id"], json.dumps(session))
+            )
+
+    def put_alerts(self, alerts: Sequence[Dict[str, Any]]):
+        """Queue alerts, assigning each an idempotency key"""
+        if not alerts:
+            return
+        now = time.time()
+        rows = []
+        for alert in alerts:
+            alert = dict(alert)
+            alert.setdefault("client_id", str(uuid.uuid4()))
+            rows.append((alert["client_id"], json.dumps(alert), now))
+        with self.lock:
+            self.conn.execute("BEGIN")
+            inserted = self.conn.executemany(
+                "INSERT OR IGNORE INTO alerts (client_id, payload, queued_at) VALUES (?, ?, ?)", rows
+            ).rowcount
+            self.pending += inserted
+            self._trim()
+            self.conn.execute("COMMIT")
+
+    def _trim(self):
+        # Bound local storage during long outages by dropping the oldest alerts
+        excess = self.pending - self.max_pending
+        if excess > 0:
+            deleted = self.conn.execute(
+                "DELETE FROM alerts WHERE seq IN ("
+                "SELECT seq FROM alerts WHERE status = 'pending' ORDER BY seq LIMIT ?)",
+                (excess,)
+            ).rowcount
+            self.pending -= deleted
+            self.dropped += deleted
+
+    def pending_sessions(self) -> List[Tuple[Dict[str, Any], int]]:
+        """(session, version) for sessions changed since their last upload"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT payload, version FROM sessions WHERE synced_version < version"
+            ).fetchall()
+        return [(json.loads(payload), version) for payload, version in rows]
+
+    def mark_sessions(self, uploaded: Sequence[Tuple[str, int]]):
+        """Record the versions of sessions the backend accepted"""
+        with self.lock:
+            self.conn.executemany(
+                "UPDATE sessions SET synced_version = MAX(synced_version, ?) WHERE id = ?",
+                [(version, session_id) for session_id, version in uploaded]
+            )
+
+    def last_seq(self) -> int:
+        """Position of the newest queued alert"""
+        with self.lock:
+            return self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM alerts").fetchone()[0]
+
+    def next_batch(self, limit: int, up_to: int) -> List[Dict[str, Any]]:
+        """Oldest pending alerts queued at or before position `up_to`"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT payload FROM alerts WHERE status = 'pending' AND seq <= ? ORDER BY seq LIMIT ?",
+                (up_to, limit)
+            ).fetchall()
+        return [json.loads(payload) for (payload,) in rows]
+
+    def mark_alerts(self, statuses: Sequence[Dict[str, Any]]):
+        """Apply the backend's per-item statuses: stored alerts leave the queue, rejected ones are kept as failed"""
+        done = [(s["client_id"],) for s in statuses if s["status"] in ("created", "duplicate") and s.get("client_id")]
+        failed = [(s.get("error"), s["client_id"]) for s in statuses if s["status"] == "invalid" and s.get("client_id")]
+        with self.lock:
+            self.conn.execute("BEGIN")
+            # Only pending alerts are uploaded, so only pending ones are acknowledged
+            self.pending -= self.conn.executemany(
+                "DELETE FROM alerts WHERE client_id = ? AND status = 'pending'", done
+            ).rowcount
+            self.pending -= self.conn.executemany(
+                "UPDATE alerts SET status = 'failed', error = ? WHERE client_id = ? AND status = 'pending'", failed
+            ).rowcount
+            self.conn.execute("COMMIT")
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set(self, key: str, value: Any):
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO kv (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, json.dumps(value))
+            )
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            counts = dict(self.conn.execute("SELECT status, COUNT(*) FROM alerts GROUP BY status").fetchall())
+            sessions = self.conn.execute(
+                "SELECT COUNT(*) FROM sessions WHERE synced_version < version"
+            ).fetchone()[0]
+        return {
+            "pending_alerts": counts.get("pending", 0),
+            "failed_alerts": counts.get("failed", 0),
+            "pending_sessions": sessions,
+            "dropped_alerts": self.dropped,
+        }
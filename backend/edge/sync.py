@@ -0,0 +1,156 @@
+"""
+Uploads the edge outbox to the backend in gzip-compressed NDJSON batches.
+
+A sync pass first uploads every session changed since its last upload
+(POST /api/alerts/sessions/bulk), then drains the alert queue in batches
+(POST /api/alerts/bulk) up to the newest alert queued when the pass
+started, so every alert it sends belongs to a session the backend already
+has. Each batch is removed from the outbox only after the backend answered
+with per-item statuses; if the connection drops mid-batch the same alerts
+are sent again on the next pass and come back as duplicates. This makes
+uploads resumable at batch granularity.
+"""
+
+import gzip
+import json
+import logging
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Any, Dict, List, Optional
+
+from edge.outbox import Outbox
+
+logger = logging.getLogger(__name__)
+
+class SyncError(Exception):
+    """The backend could not be reached or refused the upload"""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+class SyncClient:
+    """Minimal HTTP client for the backend's bulk endpoints"""
+
+    def __init__(self, base_url: str, token: Optional[str] = None, timeout_s: float = 30.0):
+        self.base_url = base_url.rstrip("/")
+        self.token = token
+        self.timeout_s = timeout_s
+        self.credentials: Optional[Dict[str, str]] = None
+
+    def login(self, username: str, password: str):
+        """Get a token; it is renewed with the same credentials when it expires"""
+        self.credentials = {"username": username, "password": password}
+        body = urllib.parse.urlencode(self.credentials).encode()
+        request = urllib.request.Request(
+            f"{self.base_url}/api/auth/login", data=body,
+            headers={"Content-Type": "application/x-www-form-urlencoded"}
+        )
+        self.token = self._send(request)["access_token"]
+
+    def get(self, path: str) -> Any:
+        return self._authorized(lambda: urllib.request.Request(f"{self.base_url}{path}", headers=self._headers()))
+
+    def post_batch(self, path: str, documents: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """POST documents as gzip NDJSON and return the decoded response"""
+        body = gzip.compress("\n".join(json.dumps(d, separators=(",", ":")) for d in documents).encode())
+        return self._authorized(lambda: urllib.request.Request(
+            f"{self.base_url}{path}", data=body,
+            headers={
+                **self._headers(),
+                "Content-Type": "application/x-ndjson",
+                "Content-Encoding": "gzip",
+            }
+        ))
+
+    def _authorized(self, build) -> Any:
+        # Agents started offline log in on their first successful contact
+        if self.token is None and self.credentials:
+            self.login(**self.credentials)
+        try:
+            return self._send(build())
+        except SyncError as e:
+            if e.status != 401 or not self.credentials:
+                raise
+        self.login(**self.credentials)
+        return self._send(build())
+
+    def _headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.token}"} if self.token else {}
+
+    def _send(self, request: urllib.request.Request) -> Any:
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout_s) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            raise SyncError(f"HTTP {e.code} from {request.full_url}: {e.read()[:200]!r}", e.code) from e
+        except (urllib.error.URLError, OSError) as e:
+            raise SyncError(f"{request.full_url} unreachable: {e}") from e
+
+def sync_once(outbox: Outbox, client: SyncClient, batch_size: int = 500) -> Dict[str, int]:
+    """Upload pending sessions, then pending alerts; raises SyncError when offline"""
+    counts = {"sessions": 0, "created": 0, "duplicates": 0, "invalid": 0, "batches": 0}
+    up_to = outbox.last_seq()
+
+    sessions = outbox.pending_sessions()
+    if sessions:
+        result = client.post_batch("/api/alerts/sessions/bulk", [session for session, _ in sessions])
+        accepted = {item["id"] for item in result["items"] if item["status"] in ("created", "updated")}
+        outbox.mark_sessions([(s["id"], version) for s, version in sessions if s["id"] in accepted])
+        counts["sessions"] = len(accepted)
+
+    while True:
+        batch = outbox.next_batch(batch_size, up_to)
+        if not batch:
+            return counts
+        result = client.post_batch("/api/alerts/bulk", batch)
+        outbox.mark_alerts(result["items"])
+        counts["batches"] += 1
+        counts["created"] += result["created"]
+        counts["duplicates"] += result["duplicates"]
+        counts["invalid"] += result["invalid"]
+
+class SyncLoop:
+    """Runs sync passes every `interval_s`, backing off exponentially while offline"""
+
+    def __init__(self, outbox: Outbox, client: SyncClient, interval_s: float = 10.0,
+                 batch_size: int = 500, max_backoff_s: float = 300.0):
+        self.outbox = outbox
+        self.client = client
+        self.interval_s = interval_s
+        self.batch_size = batch_size
+        self.max_backoff_s = max_backoff_s
+        self.failures = 0
+        self.last_sync: Optional[float] = None
+        self.running = True
+
+    def delay(self) -> float:
+        """Seconds until the next pass"""
+        if not self.failures:
+            return self.interval_s
+        return min(self.max_backoff_s, self.interval_s * 2 ** self.failures)
+
+    def run_once(self) -> Optional[Dict[str, int]]:
+        try:
+            counts = sync_once(self.outbox, self.client, self.batch_size)
+        except SyncError as e:
+            self.failures += 1
+            logger.warning("Sync failed (%s); retrying in %.0fs", e, self.delay())
+            return None
+        self.failures = 0
+        self.last_sync = time.time()
+        if counts["batches"] or counts["sessions"]:
+            logger.info("Synced %s", counts)
+        return counts
+
+    def run(self):
+        while self.running:
+            self.run_once()
+            deadline = time.monotonic() + self.delay()
+            while self.running and time.monotonic() < deadline:
+                time.sleep(0.2)
+
+    def stop(self):
+        self.running = False
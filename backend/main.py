@@ -3,10 +3,10 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import json
 import base64
-import cv2
 import numpy as np
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 import asyncio
+import time
 from datetime import datetime
 from sqlalchemy.orm import Session
 
@@ -15,21 +15,28 @@ from utils.timezone import get_ist_datetime_for_db
 
 from core.processor import DriverMonitorProcessor
 from core.config import Settings
+from core.rate_control import AdaptiveRateController, load_monitor
+from core.inference import scheduler as inference_scheduler
+from core.graph_pool import graph_pool
+from core.overlay import OverlayRenderer
+from core.timeline import TimelineWriter
+from core.state_store import state_store, STATE_CHECKPOINT_S
+from core.cache import response_cache
 from models.detection import DetectionResult, CalibrationData, ConfigUpdate
 from models.alert import AlertCreate
 
 # Database and Auth
-from database.connection import init_db, get_db
+from database.connection import init_db, get_db, SessionLocal
+from database.config_repository import config_repository
+from database.retention import retention_loop, RETENTION_INTERVAL_H
 from database.models import User, MonitoringSession, Alert as AlertModel
 from auth.security import get_current_active_user, decode_token
+from auth.permissions import require_manager_or_admin
 from auth.routes import router as auth_router
 from api.alerts import router as alerts_router
 
 app = FastAPI(title="Driver Monitoring System API")
 
-# Initialize database
-init_db()
-
 # CORS configuration
 app.add_middleware(
     CORSMiddleware,
@@ -47,42 +54,217 @@ app.include_router(alerts_router)
 from api.users import router as users_router
 app.include_router(users_router)
 
-# Global processor instances (per user)
+from api.analytics import router as analytics_router
+app.include_router(analytics_router)
+
+# Processor instances (per user) cached in this process; the state store
+# holds the latest state so a session can resume in any worker or node
 processors: Dict[str, DriverMonitorProcessor] = {}
 user_settings: Dict[str, Settings] = {}
+state_versions: Dict[str, int] = {}
+
+def apply_user_config(processor: DriverMonitorProcessor, user_id: str):
+    """Apply the user's stored settings and calibration to their processor"""
+    db = SessionLocal()
+    try:
+        settings, calibration = config_repository.load(db, user_id)
+    finally:
+        db.close()
+    processor.update_settings(settings)
+    if calibration:
+        processor.calibrate(calibration)
+    user_settings[user_id] = settings
 
 def get_user_processor(user_id: str) -> DriverMonitorProcessor:
-    """Get or create processor for user"""
+    """Get or create processor for user with their stored settings and calibration"""
     if user_id not in processors:
-        processors[user_id] = DriverMonitorProcessor()
-        user_settings[user_id] = Settings()
+        # Inline inference takes a prewarmed graph pair; pooled workers need none here
+        graphs = graph_pool.acquire() if inference_scheduler is None else None
+        processor = DriverMonitorProcessor(*(graphs or ()))
+        apply_user_config(processor, user_id)
+        processors[user_id] = processor
     return processors[user_id]
 
+def write_through(save, *args):
+    """Run a config repository write with a short-lived database session"""
+    db = SessionLocal()
+    try:
+        save(db, *args)
+    finally:
+        db.close()
+
+async def load_user_processor(user_id: str) -> DriverMonitorProcessor:
+    """Get the user's processor, refreshed if newer state was saved by another process
+
+    Another process may also have changed the user's settings or calibration,
+    so they are re-read from the database before its detection state is applied.
+    """
+    processor = get_user_processor(user_id)
+    state = await state_store.load(user_id)
+    if state and state.get("version", 0) > state_versions.get(user_id, 0):
+        config_repository.invalidate(user_id)
+        apply_user_config(processor, user_id)
+        processor.load_state(state)
+        state_versions[user_id] = state["version"]
+    return processor
+
+async def save_user_state(user_id: str):
+    """Checkpoint the user's detection state to the state store
+
+    Write settings and calibration changes to the config repository first,
+    so a process that sees the new checkpoint reads them from the database.
+    """
+    processor = processors.get(user_id)
+    if processor is None:
+        return
+    # Wall-clock versions order checkpoints written by different nodes
+    version = max(time.time_ns(), state_versions.get(user_id, 0) + 1)
+    state_versions[user_id] = version
+    await state_store.save(user_id, {**processor.export_state(), "version": version})
+
+# Startup progress reported by /ready
+db_ready = False
+warmup_task: Optional[asyncio.Task] = None
+retention_task: Optional[asyncio.Task] = None
+
+@app.on_event("startup")
+async def initialize_database():
+    """Create database tables"""
+    global db_ready
+    init_db()
+    db_ready = True
+
+@app.on_event("startup")
+async def preload_user_configs():
+    """Warm the config cache for recently active drivers"""
+    db = SessionLocal()
+    try:
+        loaded = config_repository.preload(db)
+    finally:
+        db.close()
+    print(f"Preloaded configuration for {loaded} drivers")
+
+async def warm_up():
+    """Build prewarmed graphs and start inference workers in parallel"""
+    started = time.perf_counter()
+    tasks = [graph_pool.prewarm()]
+    if inference_scheduler:
+        tasks.append(inference_scheduler.start())
+        load_monitor.scheduler = inference_scheduler
+    try:
+        await asyncio.gather(*tasks)
+        print(f"Warm-up finished in {time.perf_counter() - started:.2f}s")
+    except Exception as e:
+        print(f"Warm-up error: {e}")
+
+@app.on_event("startup")
+async def start_warm_up():
+    """Warm up in the background so the server accepts connections immediately"""
+    global warmup_task
+    warmup_task = asyncio.create_task(warm_up())
+
+@app.on_event("startup")
+async def start_retention():
+    """Schedule the alert retention job (DMS_RETENTION_INTERVAL_H=0 disables it)"""
+    global retention_task
+    if RETENTION_INTERVAL_H > 0:
+        retention_task = asyncio.create_task(retention_loop(SessionLocal))
+
+@app.on_event("shutdown")
+async def stop_inference_workers():
+    for task in (warmup_task, retention_task):
+        if task and not task.done():
+            task.cancel()
+    if inference_scheduler:
+        await inference_scheduler.stop()
+    graph_pool.close()
+    await state_store.close()
+
+async def detect(
+    processor: DriverMonitorProcessor,
+    frame: np.ndarray,
+    timestamp: Optional[float]
+) -> Tuple[DetectionResult, float]:
+    """Run detection on a decoded BGR frame, batched on the worker pool when enabled
+
+    Returns the result and the seconds spent waiting for the workers, during
+    which the event loop was free for other connections.
+    """
+    if inference_scheduler and inference_scheduler.running:
+        h, w = frame.shape[:2]
+        t = timestamp if timestamp is not None else time.monotonic()
+        waited = 0.0
+        landmarks = processor.reuse_landmarks(frame, t)
+        if landmarks is None:
+            started = time.perf_counter()
+            faces, hands = await inference_scheduler.submit(frame)
+            waited = time.perf_counter() - started
+            landmarks = processor.driver_landmarks(faces, hands, t)
+            processor.remember_landmarks(frame, landmarks, t, waited)
+        face_landmarks, hand_landmarks = landmarks
+        return processor.process_landmarks(face_landmarks, hand_landmarks, w, h, t), waited
+    return processor.process_frame(frame, timestamp), 0.0
+
+def frame_timestamp(message: Dict[str, Any]) -> Optional[float]:
+    """Client capture timestamp (monotonic milliseconds) in seconds, if provided"""
+    timestamp = message.get("timestamp")
+    if isinstance(timestamp, (int, float)):
+        return timestamp / 1000.0
+    return None
+
 @app.get("/")
 async def health_check():
     return {"status": "healthy", "service": "Driver Monitoring System", "version": "2.0.0"}
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 503 until the database is up and warm inference capacity exists"""
+    graphs = graph_pool.stats()
+    if inference_scheduler:
+        inference = inference_scheduler.stats()
+        warm_capacity = inference["ready_workers"] if inference_scheduler.running else 0
+    else:
+        inference = None
+        warm_capacity = graphs["warm"]
+    ready = db_ready and (warm_capacity > 0 or (inference_scheduler is None and graph_pool.size == 0))
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "ready": ready,
+            "database": db_ready,
+            "warm_capacity": warm_capacity,
+            "graphs": graphs,
+            "inference": inference
+        }
+    )
+
+@app.get("/api/cache/stats")
+async def get_cache_stats(
+    current_user: User = Depends(require_manager_or_admin)
+):
+    """Hit/miss counters of the analytics response cache"""
+    return response_cache.stats()
+
 @app.get("/api/config")
 async def get_config(
     current_user: User = Depends(get_current_active_user)
 ):
     """Get current configuration settings for authenticated user"""
-    if current_user.id not in user_settings:
-        user_settings[current_user.id] = Settings()
+    await load_user_processor(current_user.id)
     return user_settings[current_user.id].dict()
 
 @app.post("/api/config")
 async def update_config(
     config: ConfigUpdate,
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
 ):
     """Update configuration settings for authenticated user"""
-    if current_user.id not in user_settings:
-        user_settings[current_user.id] = Settings()
-    
+    processor = await load_user_processor(current_user.id)
     updated = user_settings[current_user.id].update(config.dict(exclude_unset=True))
-    processor = get_user_processor(current_user.id)
     processor.update_settings(user_settings[current_user.id])
+    config_repository.save_settings(db, current_user.id, user_settings[current_user.id])
+    await save_user_state(current_user.id)
     
     return {"status": "success", "config": updated}
 
@@ -93,27 +275,12 @@ async def calibrate(
     db: Session = Depends(get_db)
 ):
     """Calibrate the system with user's normal position"""
-    processor = get_user_processor(current_user.id)
+    processor = await load_user_processor(current_user.id)
     processor.calibrate(calibration)
     
     # Store calibration in database
-    from database.models import Calibration
-    
-    # Deactivate previous calibrations
-    db.query(Calibration).filter(
-        Calibration.user_id == current_user.id
-    ).update({"is_active": False})
-    
-    # Create new calibration
-    new_calibration = Calibration(
-        user_id=current_user.id,
-        gaze_center=calibration.gaze_center,
-        head_center_x=calibration.head_center_x,
-        head_center_y=calibration.head_center_y,
-        calibration_data=calibration.dict()
-    )
-    db.add(new_calibration)
-    db.commit()
+    config_repository.save_calibration(db, current_user.id, calibration)
+    await save_user_state(current_user.id)
     
     return {"status": "success", "message": "Calibration completed"}
 
@@ -133,17 +300,15 @@ async def process_frame(
         if "," in image_data:
             image_data = image_data.split(",")[1]
         
-        # Decode and process
-        image_bytes = base64.b64decode(image_data)
-        nparr = np.frombuffer(image_bytes, np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        # Decode at the inference size and process with the user's processor
+        processor = await load_user_processor(current_user.id)
+        frame = processor.decoder.decode(base64.b64decode(image_data))
         
         if frame is None:
             raise HTTPException(status_code=400, detail="Invalid image data")
         
-        # Process frame with user's processor
-        processor = get_user_processor(current_user.id)
-        result = processor.process_frame(frame)
+        result, _ = await detect(processor, frame, frame_timestamp(data))
+        await save_user_state(current_user.id)
         
         return result.dict()
     except Exception as e:
@@ -157,6 +322,12 @@ async def websocket_endpoint(websocket: WebSocket):
     user_id = None
     db_session = None
     current_session = None
+    rate_controller = None
+    last_checkpoint = time.monotonic()
+    # Server-rendered overlay preview, enabled per connection by thin clients
+    overlay: Optional[OverlayRenderer] = None
+    lean_results = False
+    timeline: Optional[TimelineWriter] = None
     
     try:
         while True:
@@ -171,6 +342,8 @@ async def websocket_endpoint(websocket: WebSocket):
                     payload = decode_token(token)
                     if payload:
                         user_id = payload.get("sub")
+                        # Resume detection state saved by whichever node served this user last
+                        await load_user_processor(user_id)
                         await websocket.send_json({
                             "type": "auth_success",
                             "user_id": user_id
@@ -191,17 +364,22 @@ async def websocket_endpoint(websocket: WebSocket):
                 continue
             
             processor = get_user_processor(user_id)
+            if rate_controller is None:
+                rate_controller = AdaptiveRateController(user_settings[user_id])
             
             if message.get("type") == "start_monitoring":
                 monitoring_active = True
                 processor.reset_state()
+                await save_user_state(user_id)
                 
                 # Create new monitoring session
-                from database.connection import SessionLocal
                 db_session = SessionLocal()
                 current_session = MonitoringSession(user_id=user_id)
                 db_session.add(current_session)
                 db_session.commit()
+                if timeline:
+                    timeline.close()
+                timeline = TimelineWriter(current_session.id)
                 
                 await websocket.send_json({
                     "type": "monitoring_status",
@@ -212,7 +390,14 @@ async def websocket_endpoint(websocket: WebSocket):
             
             elif message.get("type") == "stop_monitoring":
                 monitoring_active = False
+                fatigue_summary = processor.fatigue.summary()
+                roi_gate_stats = processor.roi_gate.stats()
+                face_tracker_stats = processor.face_tracker.stats()
                 processor.reset_state()
+                await save_user_state(user_id)
+                if timeline:
+                    timeline.close()
+                    timeline = None
                 
                 # End monitoring session
                 if current_session and db_session:
@@ -220,10 +405,17 @@ async def websocket_endpoint(websocket: WebSocket):
                     current_session.duration_seconds = int(
                         (current_session.end_time - current_session.start_time).total_seconds()
                     )
+                    current_session.session_metadata = {
+                        **(current_session.session_metadata or {}),
+                        "fatigue": fatigue_summary,
+                        "roi_gate": roi_gate_stats,
+                        "face_tracker": face_tracker_stats
+                    }
                     db_session.commit()
                     db_session.close()
                     current_session = None
                     db_session = None
+                    await response_cache.invalidate_user(user_id)
                 
                 await websocket.send_json({
                     "type": "monitoring_status",
@@ -233,18 +425,33 @@ async def websocket_endpoint(websocket: WebSocket):
             
             elif message.get("type") == "frame" and monitoring_active:
                 # Process frame only if monitoring is active
-                image_data = message.get("data")
-                if "," in image_data:
-                    image_data = image_data.split(",")[1]
-                
-                image_bytes = base64.b64decode(image_data)
-                nparr = np.frombuffer(image_bytes, np.uint8)
-                frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+                received_at = time.perf_counter()
+                load_monitor.frame_started()
+                waited = 0.0
+                try:
+                    image_data = message.get("data")
+                    if "," in image_data:
+                        image_data = image_data.split(",")[1]
+                    
+                    frame = processor.decoder.decode(base64.b64decode(image_data))
+                    if frame is not None and rate_controller.source is None:
+                        # The first frame of a connection is at the client's own capture size
+                        rate_controller.set_source(*processor.decoder.source_size)
+                        processor.reference_width = processor.decoder.source_size[0]
+                    result = None
+                    if frame is not None:
+                        result, waited = await detect(processor, frame, frame_timestamp(message))
+                finally:
+                    load_monitor.frame_finished(time.perf_counter() - received_at - waited)
                 
-                if frame is not None:
-                    result = processor.process_frame(frame)
+                if result is not None:
+                    if timeline:
+                        timeline.add(result)
                     result_dict = result.dict()
                     result_dict["is_monitoring"] = monitoring_active
+                    if lean_results:
+                        # Clients showing the overlay preview do not need raw landmarks
+                        del result_dict["face_landmarks"], result_dict["hand_landmarks"]
                     
                     # Store alerts in database
                     if result.alerts and db_session and current_session:
@@ -270,8 +477,22 @@ async def websocket_endpoint(websocket: WebSocket):
                                 current_session.distraction_alerts += 1
                         
                         db_session.commit()
+                        await response_cache.invalidate_user(user_id)
                     
                     await websocket.send_json(result_dict)
+                    
+                    if overlay and overlay.due():
+                        loop = asyncio.get_running_loop()
+                        await websocket.send_json(await loop.run_in_executor(None, overlay.render, frame, result))
+                    
+                    # Ask the client to slow down or speed up based on latency and node load
+                    latency_ms = (time.perf_counter() - received_at) * 1000.0
+                    for hint in rate_controller.observe(latency_ms, load_monitor.snapshot()):
+                        await websocket.send_json(hint)
+                
+                if time.monotonic() - last_checkpoint >= STATE_CHECKPOINT_S:
+                    last_checkpoint = time.monotonic()
+                    await save_user_state(user_id)
             
             elif message.get("type") == "frame" and not monitoring_active:
                 # Send empty result when not monitoring
@@ -286,6 +507,7 @@ async def websocket_endpoint(websocket: WebSocket):
             elif message.get("type") == "start_calibration":
                 # Reset processor to calibration mode
                 processor.calibration_mode = True
+                await save_user_state(user_id)
                 await websocket.send_json({
                     "type": "calibration_started",
                     "calibration_mode": True,
@@ -296,36 +518,47 @@ async def websocket_endpoint(websocket: WebSocket):
                 calibration_data = CalibrationData(**message.get("data", {}))
                 processor.calibrate(calibration_data)
                 
-                # Store calibration if authenticated
-                if user_id and db_session:
-                    from database.models import Calibration
-                    
-                    # Deactivate previous calibrations
-                    db_session.query(Calibration).filter(
-                        Calibration.user_id == user_id
-                    ).update({"is_active": False})
-                    
-                    # Create new calibration
-                    new_calibration = Calibration(
-                        user_id=user_id,
-                        gaze_center=calibration_data.gaze_center,
-                        head_center_x=calibration_data.head_center_x,
-                        head_center_y=calibration_data.head_center_y
-                    )
-                    db_session.add(new_calibration)
-                    db_session.commit()
+                # Store calibration so it is restored on the next session
+                write_through(config_repository.save_calibration, user_id, calibration_data)
+                await save_user_state(user_id)
                 
                 await websocket.send_json({
                     "type": "calibration_complete",
                     "status": "success"
                 })
             
+            elif message.get("type") == "overlay":
+                # {"type": "overlay", "enabled": true, "fps": 5, "format": "jpeg"|"webp", "quality": 70, "width": 640, "lean": true}
+                if message.get("enabled", True):
+                    options = (
+                        float(message.get("fps", 5.0)),
+                        message.get("format", "jpeg"),
+                        int(message.get("quality", 70)),
+                        int(message.get("width", 640))
+                    )
+                    if overlay is None:
+                        overlay = OverlayRenderer(*options)
+                    else:
+                        overlay.configure(*options)
+                    lean_results = bool(message.get("lean", False))
+                else:
+                    overlay = None
+                    lean_results = False
+                
+                await websocket.send_json({
+                    "type": "overlay_status",
+                    "enabled": overlay is not None,
+                    "lean": lean_results,
+                    **(overlay.options() if overlay else {})
+                })
+            
             elif message.get("type") == "update_config":
                 config_data = message.get("data", {})
-                if user_id not in user_settings:
-                    user_settings[user_id] = Settings()
                 user_settings[user_id].update(config_data)
                 processor.update_settings(user_settings[user_id])
+                rate_controller.update_settings(user_settings[user_id])
+                write_through(config_repository.save_settings, user_id, user_settings[user_id])
+                await save_user_state(user_id)
                 
                 await websocket.send_json({
                     "type": "config_updated",
@@ -335,6 +568,14 @@ async def websocket_endpoint(websocket: WebSocket):
     except Exception as e:
         print(f"WebSocket error: {e}")
     finally:
+        if timeline:
+            timeline.close()
+        if user_id:
+            try:
+                await save_user_state(user_id)
+            except Exception as e:
+                print(f"State checkpoint error: {e}")
+        
         # Clean up session if still active
         if current_session and db_session:
             if not current_session.end_time:
@@ -342,7 +583,15 @@ async def websocket_endpoint(websocket: WebSocket):
                 current_session.duration_seconds = int(
                     (current_session.end_time - current_session.start_time).total_seconds()
                 )
+                if user_id in processors:
+                    current_session.session_metadata = {
+                        **(current_session.session_metadata or {}),
+                        "fatigue": processors[user_id].fatigue.summary(),
+                        "roi_gate": processors[user_id].roi_gate.stats(),
+                        "face_tracker": processors[user_id].face_tracker.stats()
+                    }
                 db_session.commit()
+                await response_cache.invalidate_user(user_id)
             db_session.close()
         
         # Only close websocket if it's not already closed
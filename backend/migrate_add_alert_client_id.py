@@ -0,0 +1,51 @@
+"""
+Database migration script to add the client_id column to alerts.
+Run this script on databases created before bulk uploads; it adds the
+idempotency key column to the alerts table and every monthly partition,
+and the unique (user_id, client_id) index on the alerts table.
+"""
+
+from sqlalchemy import create_engine, text
+from database.connection import DATABASE_URL
+from database.partitions import PARTITION_PATTERN
+import sys
+
+def migrate_add_alert_client_id():
+    """Add client_id column and its unique index"""
+    print("Starting migration: Adding client_id to alerts...")
+
+    # Create engine
+    engine = create_engine(DATABASE_URL)
+
+    try:
+        with engine.connect() as conn:
+            result = conn.execute(text(
+                "SELECT name, sql FROM sqlite_master WHERE type='table' AND name LIKE 'alerts%'"
+            ))
+            tables = [
+                (name, sql) for name, sql in result
+                if name == "alerts" or PARTITION_PATTERN.match(name)
+            ]
+
+            # Partitions mirror the alerts columns, so they need it too
+            for name, sql in tables:
+                if 'client_id' not in sql:
+                    print(f"Adding 'client_id' column to {name} table...")
+                    conn.execute(text(f"ALTER TABLE {name} ADD COLUMN client_id VARCHAR"))
+                else:
+                    print(f"client_id column already exists in {name}.")
+
+            conn.execute(text(
+                "CREATE UNIQUE INDEX IF NOT EXISTS ux_alerts_user_client_id ON alerts (user_id, client_id)"
+            ))
+            conn.commit()
+            print("Unique index on (user_id, client_id) created.")
+
+        print("\nMigration completed successfully!")
+
+    except Exception as e:
+        print(f"Migration failed: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    migrate_add_alert_client_id()
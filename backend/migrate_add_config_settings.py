@@ -0,0 +1,60 @@
+"""
+Database migration script to add the extra_settings column to configurations.
+Run this script to store settings that have no dedicated column (durations,
+smoothing, rate control, fatigue windows) and to create missing
+configuration rows for existing users.
+"""
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from database.models import User, Configuration
+from database.connection import DATABASE_URL
+import sys
+
+def migrate_add_config_settings():
+    """Add extra_settings column and default configurations"""
+    print("Starting migration: Adding extra_settings to configurations...")
+
+    # Create engine and session
+    engine = create_engine(DATABASE_URL)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    try:
+        # Check if extra_settings column exists
+        with engine.connect() as conn:
+            result = conn.execute(text(
+                "SELECT sql FROM sqlite_master WHERE type='table' AND name='configurations'"
+            ))
+            table_schema = result.fetchone()
+
+            if table_schema and 'extra_settings' not in table_schema[0]:
+                print("Adding 'extra_settings' column to configurations table...")
+                conn.execute(text(
+                    "ALTER TABLE configurations ADD COLUMN extra_settings JSON"
+                ))
+                conn.commit()
+                print("extra_settings column added successfully.")
+            else:
+                print("extra_settings column already exists.")
+
+        # Users registered before configurations were created get default rows
+        db = SessionLocal()
+        configured = {user_id for (user_id,) in db.query(Configuration.user_id)}
+        missing = [user for user in db.query(User).all() if user.id not in configured]
+
+        for user in missing:
+            db.add(Configuration(user_id=user.id))
+            print(f"Created default configuration for user '{user.username}'.")
+
+        db.commit()
+        print(f"Created {len(missing)} missing configurations.")
+
+        db.close()
+        print("\nMigration completed successfully!")
+
+    except Exception as e:
+        print(f"Migration failed: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    migrate_add_config_settings()
@@ -0,0 +1,53 @@
+"""
+Database migration script to add the incidents column to user_alert_rollups.
+Run this script on databases created before risk scores were computed from
+rollups; it adds the column and rebuilds the rollups so existing buckets
+get their incident window counts.
+"""
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from database.connection import DATABASE_URL
+from database.rollups import backfill
+import sys
+
+def migrate_add_rollup_incidents():
+    """Add incidents column and backfill rollups"""
+    print("Starting migration: Adding incidents to user_alert_rollups...")
+
+    # Create engine and session
+    engine = create_engine(DATABASE_URL)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    try:
+        # Check if incidents column exists
+        with engine.connect() as conn:
+            result = conn.execute(text(
+                "SELECT sql FROM sqlite_master WHERE type='table' AND name='user_alert_rollups'"
+            ))
+            table_schema = result.fetchone()
+
+            if table_schema and 'incidents' not in table_schema[0]:
+                print("Adding 'incidents' column to user_alert_rollups table...")
+                conn.execute(text(
+                    "ALTER TABLE user_alert_rollups ADD COLUMN incidents INTEGER NOT NULL DEFAULT 0"
+                ))
+                conn.commit()
+                print("incidents column added successfully.")
+            else:
+                print("incidents column already exists.")
+
+        # Incident windows can only be counted from the raw alerts
+        db = SessionLocal()
+        rows = backfill(db)
+        print(f"Rebuilt {rows} rollup rows.")
+
+        db.close()
+        print("\nMigration completed successfully!")
+
+    except Exception as e:
+        print(f"Migration failed: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    migrate_add_rollup_incidents()
@@ -15,6 +15,41 @@ class AlertCreate(BaseModel):
     states: Optional[Dict[str, Any]] = None
     duration_ms: Optional[int] = None
 
+class BulkAlertItem(AlertCreate):
+    """Alert buffered by an edge device, with its idempotency key and time"""
+    client_id: Optional[str] = Field(None, max_length=128)
+    timestamp: Optional[datetime] = None
+    session_id: Optional[str] = None
+
+class EdgeSession(BaseModel):
+    """Monitoring session recorded by an edge device under its own id"""
+    id: str = Field(..., min_length=1, max_length=64)
+    start_time: datetime
+    end_time: Optional[datetime] = None
+    session_metadata: Optional[Dict[str, Any]] = None
+
+class BulkItemStatus(BaseModel):
+    """Outcome of one item of a bulk upload"""
+    index: int
+    client_id: Optional[str] = None
+    status: str  # created, updated, duplicate, invalid
+    id: Optional[str] = None
+    error: Optional[str] = None
+
+class BulkAlertResult(BaseModel):
+    """Bulk upload response"""
+    created: int
+    duplicates: int
+    invalid: int
+    items: List[BulkItemStatus]
+
+class BulkSessionResult(BaseModel):
+    """Edge session upload response"""
+    created: int
+    updated: int
+    invalid: int
+    items: List[BulkItemStatus]
+
 class AlertResponse(BaseModel):
     """Alert response model"""
     id: str
@@ -75,4 +110,27 @@ class AlertStatisticsResponse(BaseModel):
     drowsiness: Dict[str, int]
     distraction: Dict[str, int]
     specific_events: Dict[str, int]
-    risk_score: float
\ No newline at end of file
+    risk_score: float
+
+class SystemAnalytics(BaseModel):
+    """Fleet-wide analytics response"""
+    period: str
+    bucket: str
+    start_date: datetime
+    end_date: datetime
+    totals: Dict[str, Any]
+    role_distribution: List[Dict[str, Any]]
+    severity_breakdown: Dict[str, int]
+    alert_types: List[Dict[str, Any]]
+    most_common_alerts: List[Dict[str, Any]]
+    activity: List[Dict[str, Any]]
+    top_risk_drivers: List[Dict[str, Any]]
+
+class RiskRanking(BaseModel):
+    """Fleet risk ranking response"""
+    period: str
+    start_date: datetime
+    end_date: datetime
+    total_drivers: int
+    distribution: Dict[str, float]
+    drivers: List[Dict[str, Any]]
@@ -14,21 +14,48 @@ class CalibrationData(BaseModel):
     gaze_center: float = Field(default=0.5)
     head_center_x: float = Field(default=0.5)
     head_center_y: float = Field(default=0.5)
+    # Head pose (degrees) in the calibrated position; None for calibrations made before pose estimation
+    head_yaw: Optional[float] = None
+    head_pitch: Optional[float] = None
+    head_roll: Optional[float] = None
 
 class ConfigUpdate(BaseModel):
     """Configuration update request"""
     ear_threshold: Optional[float] = None
     eye_closed_frames_threshold: Optional[int] = None
+    eye_closed_warning_s: Optional[float] = Field(default=None, gt=0)
+    eye_closed_severe_s: Optional[float] = Field(default=None, gt=0)
+    blink_min_s: Optional[float] = Field(default=None, ge=0)
     blink_rate_threshold: Optional[int] = None
     mar_threshold: Optional[float] = None
     yawn_threshold: Optional[int] = None
+    yawn_duration_s: Optional[float] = Field(default=None, gt=0)
+    reference_fps: Optional[float] = Field(default=None, gt=0)
+    max_frame_gap_s: Optional[float] = Field(default=None, gt=0)
     frame_width: Optional[int] = None
     frame_height: Optional[int] = None
     scale_factor: Optional[float] = None
+    adaptive_rate: Optional[bool] = None
+    min_fps: Optional[float] = Field(default=None, gt=0)
+    max_fps: Optional[float] = Field(default=None, gt=0)
+    target_latency_ms: Optional[float] = Field(default=None, gt=0)
+    max_queue_depth: Optional[int] = Field(default=None, ge=1)
+    rate_control_interval_s: Optional[float] = Field(default=None, gt=0)
     gaze_deviation_threshold: Optional[float] = None
     head_turn_threshold: Optional[float] = None
+    head_yaw_threshold_deg: Optional[float] = Field(default=None, gt=0, lt=90)
+    head_pitch_up_threshold_deg: Optional[float] = Field(default=None, gt=0, lt=90)
+    head_pitch_down_threshold_deg: Optional[float] = Field(default=None, gt=0, lt=90)
     hand_near_face_px: Optional[int] = None
     alert_duration: Optional[int] = None
+    signal_filter: Optional[str] = Field(default=None, regex="^(median|ema|none)$")
+    ema_alpha: Optional[float] = Field(default=None, gt=0, le=1)
+    median_window: Optional[int] = Field(default=None, ge=1, le=15)
+    hysteresis_margin: Optional[float] = Field(default=None, ge=0, lt=1)
+    fatigue_windows: Optional[List[int]] = None
+    roi_skip: Optional[bool] = None
+    roi_motion_threshold: Optional[float] = Field(default=None, ge=0, le=255)
+    roi_max_skip_s: Optional[float] = Field(default=None, ge=0)
 
 class DetectionResult(BaseModel):
     """Result of frame processing"""
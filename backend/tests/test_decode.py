@@ -0,0 +1,44 @@
+"""Reduced-size decode and the reused RGB buffer of core.decode"""
+
+import tracemalloc
+
+import cv2
+import numpy as np
+import pytest
+
+from core.decode import FrameDecoder, jpeg_size
+
+# Anything above an array header (~100 bytes) counts as a per-frame buffer
+MAX_RGB_PEAK_BYTES = 1024
+
+def synthetic_jpeg(h: int, w: int) -> bytes:
+    rng = np.random.default_rng(0)
+    image = cv2.GaussianBlur(rng.integers(0, 255, (h, w, 3), dtype=np.uint8), (7, 7), 2)
+    ok, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 80])
+    return encoded.tobytes()
+
+@pytest.mark.parametrize("h, w, decoded_width", [(480, 640, 640), (720, 1280, 640), (1080, 1920, 960)])
+def test_decode_reduces_to_the_inference_width(h, w, decoded_width):
+    data = synthetic_jpeg(h, w)
+    decoder = FrameDecoder(640)
+    frame = decoder.decode(data)
+    assert jpeg_size(data) == (w, h)
+    assert decoder.source_size == (w, h)
+    assert frame.shape[1] == decoded_width
+
+@pytest.mark.parametrize("h, w", [(480, 640), (720, 1280), (1080, 1920)])
+def test_to_rgb_allocates_no_frame_buffer(h, w):
+    decoder = FrameDecoder(640)
+    frame = decoder.decode(synthetic_jpeg(h, w))
+    rgb = decoder.to_rgb(frame)
+    assert np.array_equal(rgb, frame[:, :, ::-1])
+
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        decoder.to_rgb(frame)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert peak - before <= MAX_RGB_PEAK_BYTES
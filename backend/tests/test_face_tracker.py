@@ -0,0 +1,33 @@
+"""Driver identity across frames in which the driver's face is missed"""
+
+from core.face_tracker import FaceTracker
+from core.landmarks import LandmarkPoint
+
+FACE_POINTS = 478
+CALIBRATED_NOSE = (0.3, 0.5)
+
+def face(cx: float, cy: float, width: float = 0.2):
+    """Landmark list with the face-oval points of a `width`-wide face centred on (cx, cy)"""
+    points = [LandmarkPoint(cx, cy)] * FACE_POINTS
+    for index, (x, y) in {
+        10: (cx, cy - width / 2), 152: (cx, cy + width / 2),
+        234: (cx - width / 2, cy), 454: (cx + width / 2, cy),
+    }.items():
+        points[index] = LandmarkPoint(x, y)
+    return points
+
+def test_passenger_does_not_replace_a_missed_driver():
+    tracker = FaceTracker()
+    driver, passenger = face(0.3, 0.5), face(0.75, 0.45, 0.15)
+    t = 0.0
+    for _ in range(10):
+        t += 0.1
+        assert tracker.select([driver, passenger], t, CALIBRATED_NOSE) is driver
+    # Driver's head droops out of detection for longer than any track age
+    for _ in range(60):
+        t += 0.1
+        assert tracker.select([passenger], t, CALIBRATED_NOSE) is None
+    drooped = face(0.32, 0.62)
+    t += 0.1
+    assert tracker.select([drooped, passenger], t, CALIBRATED_NOSE) is drooped
+    assert tracker.stats()["frames_without_driver"] == 60
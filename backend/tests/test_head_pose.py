@@ -0,0 +1,56 @@
+"""Head pose sign conventions, checked on faces projected from a known rotation"""
+
+import cv2
+import numpy as np
+
+from core.head_pose import MODEL_POINTS, POSE_LANDMARKS, HeadPoseEstimator
+from core.landmarks import LandmarkPoint
+from core.processor import DriverMonitorProcessor
+from models.detection import CalibrationData
+
+W, H = 640, 480
+CAMERA = np.array([[W, 0.0, W / 2], [0.0, W, H / 2], [0.0, 0.0, 1.0]])
+FACE_POINTS = 478
+
+def projected_face(pitch_down_deg: float = 0.0, yaw_deg: float = 0.0):
+    """FaceMesh-sized landmark list with the pose points of the model head rotated about x (chin down) and y"""
+    rvec = np.radians([pitch_down_deg, yaw_deg, 0.0])
+    points, _ = cv2.projectPoints(MODEL_POINTS, rvec, np.array([0.0, 0.0, 3000.0]), CAMERA, None)
+    nose = points[0, 0]
+    face = [LandmarkPoint(nose[0] / W, nose[1] / H)] * FACE_POINTS
+    for row, index in enumerate(POSE_LANDMARKS):
+        face[index] = LandmarkPoint(points[row, 0, 0] / W, points[row, 0, 1] / H)
+    return face
+
+def head_alerts(pitch_down_deg: float, calibration: CalibrationData = CalibrationData(head_yaw=0.0, head_pitch=0.0, head_roll=0.0)):
+    processor = DriverMonitorProcessor()
+    processor.calibrate(calibration)
+    face = projected_face(pitch_down_deg)
+    messages = set()
+    for i in range(30):
+        result = processor.process_landmarks(face, [], W, H, i / 15.0)
+        messages.update(alert.message for alert in result.alerts)
+    return messages, result
+
+def test_chin_down_gives_negative_pitch():
+    yaw, pitch, roll = HeadPoseEstimator().estimate(projected_face(pitch_down_deg=20.0), W, H)
+    assert abs(pitch + 20.0) < 0.5
+    assert abs(yaw) < 0.5 and abs(roll) < 0.5
+
+def test_chin_down_raises_droop_alert():
+    messages, _ = head_alerts(pitch_down_deg=30.0)
+    assert any("droop" in m for m in messages)
+    assert not any("Looking Upward" in m for m in messages)
+
+def test_chin_up_raises_looking_up_alert():
+    messages, _ = head_alerts(pitch_down_deg=-30.0)
+    assert any("Looking Upward" in m for m in messages)
+    assert not any("droop" in m for m in messages)
+
+def test_calibration_without_pose_keeps_nose_offset_rules():
+    # Saved before pose estimation: no yaw/pitch baseline, so the pose must not be compared with 0
+    nose = projected_face(30.0)[POSE_LANDMARKS[0]]
+    legacy = CalibrationData(head_center_x=nose.x, head_center_y=nose.y)
+    messages, result = head_alerts(pitch_down_deg=30.0, calibration=legacy)
+    assert not any("droop" in m or "Head Turn" in m or "Looking Upward" in m for m in messages)
+    assert result.states.get("recalibration_needed")
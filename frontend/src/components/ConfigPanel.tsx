@@ -200,14 +200,40 @@ const ConfigPanel: React.FC<ConfigPanelProps> = ({ config, onUpdate }) => {
             </Grid>
             <Grid item xs={12}>
               <Typography variant="body2" gutterBottom>
-                Head Turn Threshold: {localConfig.head_turn_threshold.toFixed(3)}
+                Head Turn (°): {localConfig.head_yaw_threshold_deg ?? 20}
               </Typography>
               <Slider
-                value={localConfig.head_turn_threshold}
-                onChange={(_, value) => handleChange('head_turn_threshold', value as number)}
-                min={0.02}
-                max={0.2}
-                step={0.01}
+                value={localConfig.head_yaw_threshold_deg ?? 20}
+                onChange={(_, value) => handleChange('head_yaw_threshold_deg', value as number)}
+                min={5}
+                max={60}
+                step={1}
+                valueLabelDisplay="auto"
+              />
+            </Grid>
+            <Grid item xs={12}>
+              <Typography variant="body2" gutterBottom>
+                Looking Up (°): {localConfig.head_pitch_up_threshold_deg ?? 15}
+              </Typography>
+              <Slider
+                value={localConfig.head_pitch_up_threshold_deg ?? 15}
+                onChange={(_, value) => handleChange('head_pitch_up_threshold_deg', value as number)}
+                min={5}
+                max={45}
+                step={1}
+                valueLabelDisplay="auto"
+              />
+            </Grid>
+            <Grid item xs={12}>
+              <Typography variant="body2" gutterBottom>
+                Head Droop (°): {localConfig.head_pitch_down_threshold_deg ?? 15}
+              </Typography>
+              <Slider
+                value={localConfig.head_pitch_down_threshold_deg ?? 15}
+                onChange={(_, value) => handleChange('head_pitch_down_threshold_deg', value as number)}
+                min={5}
+                max={45}
+                step={1}
                 valueLabelDisplay="auto"
               />
             </Grid>
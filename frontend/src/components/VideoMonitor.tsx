@@ -17,6 +17,8 @@ interface VideoMonitorProps {
   soundAlertTriggered?: boolean;
   severeAlertCount?: number;
   onTestSound?: () => void;
+  captureFps?: number;
+  captureSize?: { width: number; height: number };
 }
 
 const VideoMonitor: React.FC<VideoMonitorProps> = ({
@@ -32,6 +34,8 @@ const VideoMonitor: React.FC<VideoMonitorProps> = ({
   soundAlertTriggered = false,
   severeAlertCount = 0,
   onTestSound,
+  captureFps = 15,
+  captureSize,
 }) => {
   const webcamRef = useRef<Webcam>(null);
   const canvasRef = useRef<HTMLCanvasElement>(null);
@@ -47,17 +51,17 @@ const VideoMonitor: React.FC<VideoMonitorProps> = ({
 
   const captureFrame = useCallback(() => {
     if (webcamRef.current && isStreaming) {
-      const imageSrc = webcamRef.current.getScreenshot();
+      const imageSrc = webcamRef.current.getScreenshot(captureSize);
       if (imageSrc) {
         onFrameCapture(imageSrc);
       }
     }
-  }, [onFrameCapture, isStreaming]);
+  }, [onFrameCapture, isStreaming, captureSize]);
 
   useEffect(() => {
-    // Start capturing frames at 15 FPS
+    // Capture at the rate requested by the server (15 FPS by default)
     if (isStreaming) {
-      intervalRef.current = setInterval(captureFrame, 67); // ~15 FPS
+      intervalRef.current = setInterval(captureFrame, Math.round(1000 / captureFps));
     } else {
       if (intervalRef.current) {
         clearInterval(intervalRef.current);
@@ -69,7 +73,7 @@ const VideoMonitor: React.FC<VideoMonitorProps> = ({
         clearInterval(intervalRef.current);
       }
     };
-  }, [captureFrame, isStreaming]);
+  }, [captureFrame, isStreaming, captureFps]);
 
   useEffect(() => {
     // Draw landmarks on canvas if enabled and monitoring
@@ -137,6 +141,9 @@ const VideoMonitor: React.FC<VideoMonitorProps> = ({
         gaze_center: detectionResult.calibration_data.gaze_x,
         head_center_x: detectionResult.calibration_data.head_x,
         head_center_y: detectionResult.calibration_data.head_y,
+        head_yaw: detectionResult.calibration_data.head_yaw,
+        head_pitch: detectionResult.calibration_data.head_pitch,
+        head_roll: detectionResult.calibration_data.head_roll,
       });
     }
   };
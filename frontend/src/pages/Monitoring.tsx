@@ -19,6 +19,8 @@ const Monitoring: React.FC = () => {
   const [detectionResult, setDetectionResult] = useState<DetectionResult | null>(null);
   const [soundAlertTriggered, setSoundAlertTriggered] = useState(false);
   const [severealertCount, setSevereAlertCount] = useState(0);
+  const [captureFps, setCaptureFps] = useState(15);
+  const [captureSize, setCaptureSize] = useState<{ width: number; height: number } | undefined>(undefined);
   
   const wsService = useRef<WebSocketService | null>(null);
   const soundService = useRef<SoundAlertService | null>(null);
@@ -52,6 +54,11 @@ const Monitoring: React.FC = () => {
         setIsMonitoring(data.is_monitoring);
       } else if (data.type === 'calibration_complete') {
         setIsCalibrated(true);
+      } else if (data.type === 'rate_hint') {
+        // Server asks for a different capture rate based on its load
+        setCaptureFps(data.fps);
+      } else if (data.type === 'resolution_hint') {
+        setCaptureSize({ width: data.width, height: data.height });
       } else {
         // Detection result
         setDetectionResult(data);
@@ -185,6 +192,8 @@ const Monitoring: React.FC = () => {
               soundAlertTriggered={soundAlertTriggered}
               severeAlertCount={severealertCount}
               onTestSound={handleTestSound}
+              captureFps={captureFps}
+              captureSize={captureSize}
             />
           </Paper>
         </Grid>
@@ -214,6 +214,9 @@ const Settings: React.FC = () => {
                     scale_factor: 1.0,
                     gaze_deviation_threshold: 0.05,
                     head_turn_threshold: 0.08,
+                    head_yaw_threshold_deg: 20,
+                    head_pitch_up_threshold_deg: 15,
+                    head_pitch_down_threshold_deg: 15,
                     hand_near_face_px: 200,
                     alert_duration: 3,
                   };
@@ -63,55 +63,37 @@ const SystemAnalytics: React.FC = () => {
     try {
       setLoading(true);
       
-      // Fetch all users
-      const usersResponse = await api.get('/users/', {
+      // Fleet-wide figures are aggregated on the server from the hourly rollups
+      const response = await api.get('/analytics/system', {
+        params: { period },
         headers: { Authorization: `Bearer ${token}` }
       });
-      
-      const users = usersResponse.data;
-      
-      // Calculate role distribution
-      const roleDistribution = users.reduce((acc: any, user: any) => {
-        acc[user.role] = (acc[user.role] || 0) + 1;
-        return acc;
-      }, {});
+      const data = response.data;
 
-      // Fetch system-wide statistics (mock data for now - in real app, create dedicated endpoints)
-      const mockStats: SystemStats = {
-        totalUsers: users.length,
-        totalSessions: 145, // Would come from dedicated endpoint
-        totalAlerts: 89,   // Would come from dedicated endpoint
-        averageSessionDuration: 2.5 * 3600, // 2.5 hours in seconds
-        userRoleDistribution: Object.entries(roleDistribution).map(([role, count]) => ({
-          role: role.charAt(0).toUpperCase() + role.slice(1),
-          count: count as number
+      setStats({
+        totalUsers: data.totals.users,
+        totalSessions: data.totals.sessions,
+        totalAlerts: data.totals.alerts,
+        averageSessionDuration: data.totals.average_session_duration,
+        userRoleDistribution: data.role_distribution.map((entry: any) => ({
+          role: entry.role.charAt(0).toUpperCase() + entry.role.slice(1),
+          count: entry.count
         })),
-        alertsByType: [
-          { type: 'Drowsiness', count: 45 },
-          { type: 'Distraction', count: 32 },
-          { type: 'Phone Usage', count: 12 }
-        ],
-        dailyActivity: [
-          { date: '2024-01-15', sessions: 23, alerts: 12 },
-          { date: '2024-01-16', sessions: 28, alerts: 8 },
-          { date: '2024-01-17', sessions: 31, alerts: 15 },
-          { date: '2024-01-18', sessions: 25, alerts: 9 },
-          { date: '2024-01-19', sessions: 29, alerts: 11 },
-          { date: '2024-01-20', sessions: 33, alerts: 14 },
-          { date: '2024-01-21', sessions: 27, alerts: 10 }
-        ],
-        topRiskDrivers: users
-          .filter((user: any) => user.role === 'driver')
-          .slice(0, 5)
-          .map((user: any, index: number) => ({
-            username: user.username,
-            riskScore: Math.floor(Math.random() * 100), // Mock risk score
-            alertCount: Math.floor(Math.random() * 20) + 5 // Mock alert count
-          }))
-          .sort((a, b) => b.riskScore - a.riskScore)
-      };
-
-      setStats(mockStats);
+        alertsByType: data.alert_types.map((entry: any) => ({
+          type: entry.type.charAt(0).toUpperCase() + entry.type.slice(1),
+          count: entry.count
+        })),
+        dailyActivity: data.activity.map((entry: any) => ({
+          date: entry.bucket,
+          sessions: entry.sessions,
+          alerts: entry.alerts
+        })),
+        topRiskDrivers: data.top_risk_drivers.map((driver: any) => ({
+          username: driver.username,
+          riskScore: driver.risk_score,
+          alertCount: driver.alert_count
+        }))
+      });
       
     } catch (error) {
       console.error('Error fetching system stats:', error);
@@ -102,6 +102,8 @@ export class WebSocketService {
       this.ws.send(JSON.stringify({
         type: 'frame',
         data: imageData,
+        // Monotonic capture time so detection timing does not depend on frame rate
+        timestamp: performance.now(),
       }));
     }
   }
@@ -14,6 +14,9 @@ export interface DetectionResult {
     gaze_x: number;
     head_x: number;
     head_y: number;
+    head_yaw?: number;
+    head_pitch?: number;
+    head_roll?: number;
   };
   face_landmarks?: Array<{ x: number; y: number }>;
   hand_landmarks?: Array<Array<{ x: number; y: number }>>;
@@ -22,22 +25,42 @@ export interface DetectionResult {
 export interface Config {
   ear_threshold: number;
   eye_closed_frames_threshold: number;
+  eye_closed_warning_s?: number;
+  eye_closed_severe_s?: number;
+  blink_min_s?: number;
   blink_rate_threshold: number;
   mar_threshold: number;
   yawn_threshold: number;
+  yawn_duration_s?: number;
+  reference_fps?: number;
+  max_frame_gap_s?: number;
   frame_width: number;
   frame_height: number;
   scale_factor: number;
   gaze_deviation_threshold: number;
   head_turn_threshold: number;
+  head_yaw_threshold_deg?: number;
+  head_pitch_up_threshold_deg?: number;
+  head_pitch_down_threshold_deg?: number;
   hand_near_face_px: number;
   alert_duration: number;
+  signal_filter?: 'median' | 'ema' | 'none';
+  ema_alpha?: number;
+  median_window?: number;
+  hysteresis_margin?: number;
+  fatigue_windows?: number[];
+  roi_skip?: boolean;
+  roi_motion_threshold?: number;
+  roi_max_skip_s?: number;
 }
 
 export interface CalibrationData {
   gaze_center: number;
   head_center_x: number;
   head_center_y: number;
+  head_yaw?: number;
+  head_pitch?: number;
+  head_roll?: number;
 }
 
 export type UserRole = 'driver' | 'manager' | 'admin';